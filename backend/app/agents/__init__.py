@@ -1,7 +1,30 @@
-"""Fraud detection agents (Naive, RAG, RLM)."""
+"""Fraud detection agents (Naive, RAG, RLM).
 
-from .naive_agent import NaiveFraudAgent
-from .rag_agent import RAGFraudAgent
-from .rlm_agent import RLMFraudAgent
+Agent classes are imported on first access: they pull in ``pydantic_ai`` and
+``openai``, which lightweight users of this package (pool stats, caches,
+rate limiting) do not need.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .naive_agent import NaiveFraudAgent
+    from .rag_agent import RAGFraudAgent
+    from .rlm_agent import RLMFraudAgent
+
+# Exported name -> defining submodule
+_AGENT_MODULES = {
+    "NaiveFraudAgent": ".naive_agent",
+    "RAGFraudAgent": ".rag_agent",
+    "RLMFraudAgent": ".rlm_agent",
+}
 
 __all__ = ["NaiveFraudAgent", "RAGFraudAgent", "RLMFraudAgent"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import agent classes on first access."""
+    if name in _AGENT_MODULES:
+        return getattr(import_module(_AGENT_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,60 +2,361 @@
 
 import time
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Optional, Sequence, Tuple, Union
+
+from loguru import logger
+from pydantic_ai import Agent
 
 from app.core.config import settings
-from app.models.schemas import AnalysisMetrics, ApproachType, FraudAnalysisResult, Transaction
+from app.models.frame import AMOUNT_COL, TIME_COL, TransactionFrame, TransactionInput, as_frame
+from app.models.schemas import (
+    AnalysisMetrics,
+    ApproachType,
+    BatchAnalysisResult,
+    FraudAnalysisResult,
+    LLMResponse,
+    LLMUsage,
+    UsageRecord,
+)
+
+from .cassette import get_cassette
+from .clients import client_registry
+from .executor import get_cpu_executor
+from .filter_engine import SuspiciousTransactionFilter, create_filter
+from .pricing import get_model_pricing
+from .prompt_layout import MIN_CACHEABLE_TOKENS, PromptLayout
+from .rate_limiter import get_llm_governor
+from .response_cache import ResponseCache, get_response_cache
+from .risk_gate import RiskGate
+from .tokenizer import get_token_counter, output_tool_text
+from .usage import current_usage, stage, track_usage
 
 
 class BaseFraudAgent(ABC):
-    """Base class for fraud detection agents."""
+    """
+    Base class for fraud detection agents.
+
+    Subclasses set ``self.model``, ``self.system_prompt`` and ``self.agent``
+    (a pydantic-ai ``Agent``) and call the LLM through :meth:`run_llm`, or
+    :meth:`run_llm_cascade` for calls that may go through the model cascade.
+    """
 
     def __init__(self, approach: ApproachType):
         """Initialize the agent."""
         self.approach = approach
         self.settings = settings
 
+        # Model cascade counters (see run_llm_cascade)
+        self.cascade_calls = 0
+        self.cascade_escalations = 0
+        self._risk_filter: Optional[SuspiciousTransactionFilter] = None
+
     @abstractmethod
-    async def analyze(self, transactions: List[Transaction]) -> FraudAnalysisResult:
+    async def analyze(self, transactions: TransactionInput) -> FraudAnalysisResult:
         """
         Analyze transactions for fraud.
 
         Args:
-            transactions: List of transactions to analyze
+            transactions: List of transactions or a TransactionFrame to analyze
 
         Returns:
             FraudAnalysisResult: Analysis result
         """
         pass
 
-    def calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+    async def analyze_with_usage(
+        self, transactions: TransactionInput
+    ) -> Tuple[FraudAnalysisResult, UsageRecord]:
         """
-        Calculate cost in USD based on token usage.
+        Analyze transactions and report what the analysis consumed.
+
+        Args:
+            transactions: List of transactions or a TransactionFrame to analyze
+
+        Returns:
+            Tuple of the result and the usage record (tokens, cost, stage latencies)
+        """
+        with track_usage() as usage:
+            result = await self.analyze(transactions)
+        if usage.model is None:
+            usage.model = self.model.model_name
+        return result, usage
 
-        GPT-4o pricing (as of 2024):
-        - Input: $2.50 per 1M tokens
-        - Output: $10.00 per 1M tokens
+    async def run_llm(
+        self,
+        user_prompt: str,
+        agent: Optional[Agent] = None,
+        system_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> LLMResponse:
+        """
+        Run an LLM call, served from the response cache when possible.
 
-        GPT-4o-mini pricing:
-        - Input: $0.15 per 1M tokens
-        - Output: $0.60 per 1M tokens
+        Uncached calls are replayed from the cassette when one is active (see
+        :class:`Cassette`); otherwise they wait for the shared rate limiter and
+        the model's concurrency cap (see :class:`LLMGovernor`). Tokens and cost
+        are added to the current usage record (see :func:`track_usage`).
 
         Args:
-            prompt_tokens: Number of prompt tokens
-            completion_tokens: Number of completion tokens
+            user_prompt: User prompt
+            agent: pydantic-ai agent to run (defaults to ``self.agent``)
+            system_prompt: That agent's system prompt (defaults to ``self.system_prompt``)
+            model: Model to run the agent on instead of its own (e.g. a cascade tier)
 
         Returns:
-            float: Estimated cost in USD
+            LLMResponse: Parsed result and token usage
+        """
+        agent = agent or self.agent
+        system_prompt = system_prompt or self.system_prompt
+
+        model_name = model.split(":", 1)[-1] if model else self.model.model_name
+        key = ResponseCache.make_key(model_name, system_prompt, user_prompt)
+
+        usage = current_usage()
+        cache = get_response_cache()
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                logger.info(f"{self.approach.value} LLM response served from cache")
+                if usage is not None:
+                    usage.add_cache_hit(cached.usage)
+                return cached
+
+        start = time.perf_counter()
+        with stage("llm"):
+            cassette = get_cassette()
+            response = await cassette.play(key) if cassette is not None else None
+            if response is None:
+                response, latency_ms = await self._call_llm(
+                    agent, system_prompt, user_prompt, model_name
+                )
+                if cassette is not None:
+                    cassette.record(key, model_name, response, latency_ms)
+        call_ms = (time.perf_counter() - start) * 1000
+
+        logger.info(
+            f"{self.approach.value} LLM call: {response.usage.prompt_tokens} prompt tokens, "
+            f"{response.usage.cached_tokens} served from the provider prompt cache"
+        )
+        if usage is not None:
+            usage.add_call(
+                model_name,
+                response.usage,
+                self.calculate_cost(
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens,
+                    response.usage.cached_tokens,
+                    model_name,
+                ),
+                call_ms,
+            )
+        if cache is not None:
+            cache.set(key, response)
+        return response
+
+    async def _call_llm(
+        self, agent: Agent, system_prompt: str, user_prompt: str, model_name: str
+    ) -> Tuple[LLMResponse, float]:
         """
-        # Using GPT-4o pricing for main model
-        input_cost_per_token = 2.50 / 1_000_000
-        output_cost_per_token = 10.00 / 1_000_000
+        Call the model under the shared rate limiter and concurrency cap.
+
+        Args:
+            agent: pydantic-ai agent to run
+            system_prompt: That agent's system prompt
+            user_prompt: User prompt
+            model_name: Model to run on (the agent's own, or a cascade tier)
 
-        cost = (prompt_tokens * input_cost_per_token) + (
-            completion_tokens * output_cost_per_token
+        Returns:
+            Tuple of the parsed response and the call's latency in ms (excluding queueing)
+        """
+        override = None
+        if model_name != self.model.model_name:
+            override = client_registry.model(model_name)
+        estimated_tokens = (
+            get_token_counter(model_name).count_messages(
+                system_prompt, user_prompt, output_tool_text(agent.output_type)
+            )
+            + settings.rate_limit_expected_completion_tokens
         )
-        return round(cost, 6)
+        governor = get_llm_governor()
+        async with governor.slot(model_name, estimated_tokens):
+            start = time.perf_counter()
+            result = await agent.run(user_prompt, model=override)
+            latency_ms = (time.perf_counter() - start) * 1000
+
+        response = LLMResponse(output=result.output, usage=self._extract_usage(result))
+        governor.settle(estimated_tokens, response.usage.total_tokens)
+        return response, latency_ms
+
+    async def run_llm_cascade(
+        self,
+        user_prompt: str,
+        risk_score: Union[float, Sequence[float], None] = None,
+        agent: Optional[Agent] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        """
+        Run an LLM call through the model cascade (``CASCADE_ENABLED``).
+
+        ``sub_model`` answers first. The call is repeated on ``main_model`` only
+        when that answer is not confident enough or contradicts the
+        programmatic risk score (see :meth:`_escalation_reason`); if the
+        escalated call fails, the ``sub_model`` answer stands. Without the
+        cascade this is :meth:`run_llm` on the agent's own model.
+
+        Args:
+            user_prompt: User prompt
+            risk_score: Programmatic risk (0-100) of the analyzed rows, if known; one per
+                section for a multi-section (``BatchAnalysisResult``) agent
+            agent: pydantic-ai agent to run (defaults to ``self.agent``)
+            system_prompt: That agent's system prompt (defaults to ``self.system_prompt``)
+
+        Returns:
+            LLMResponse: Parsed result and token usage of the answering tier
+        """
+        if not settings.cascade_enabled:
+            return await self.run_llm(user_prompt, agent, system_prompt)
+
+        response = await self.run_llm(user_prompt, agent, system_prompt, model=settings.sub_model)
+        self.cascade_calls += 1
+        reason = self._escalation_reason(response.output, risk_score)
+        if reason is None:
+            return response
+
+        self.cascade_escalations += 1
+        usage = current_usage()
+        if usage is not None:
+            usage.escalations += 1
+        logger.info(
+            f"{self.approach.value} cascade: escalating to {settings.main_model} ({reason})"
+        )
+        try:
+            return await self.run_llm(
+                user_prompt, agent, system_prompt, model=settings.main_model
+            )
+        except Exception as e:
+            logger.warning(
+                f"{self.approach.value} cascade: escalation failed ({e}); "
+                "keeping the sub_model answer"
+            )
+            return response
+
+    @classmethod
+    def _escalation_reason(
+        cls,
+        output: Union[FraudAnalysisResult, BatchAnalysisResult],
+        risk_score: Union[float, Sequence[float], None],
+    ) -> Optional[str]:
+        """
+        Why a ``sub_model`` answer needs ``main_model``, if it does.
+
+        A multi-section answer escalates as a whole when any section does.
+
+        Args:
+            output: ``sub_model`` answer
+            risk_score: Programmatic risk (0-100) of the analyzed rows (one per
+                section for a multi-section answer), if known
+
+        Returns:
+            Escalation reason, or None to keep the answer
+        """
+        if isinstance(output, BatchAnalysisResult):
+            risks = list(risk_score) if risk_score is not None else []
+            for result in output.results:
+                risk = risks[result.section] if result.section < len(risks) else None
+                reason = cls._escalation_reason(result, risk)
+                if reason is not None:
+                    return f"section {result.section}: {reason}"
+            return None
+
+        if output.confidence < settings.cascade_min_confidence:
+            return f"confidence {output.confidence:.2f} < {settings.cascade_min_confidence}"
+        if risk_score is None:
+            return None
+        if not output.is_fraud and risk_score >= settings.cascade_risk_high:
+            return f"benign verdict at programmatic risk {risk_score:.0f}"
+        if output.is_fraud and risk_score <= settings.cascade_risk_low:
+            return f"fraud verdict at programmatic risk {risk_score:.0f}"
+        return None
+
+    async def cascade_risk(self, transactions: TransactionFrame) -> Optional[float]:
+        """
+        Programmatic risk of a batch for the cascade's disagreement check.
+
+        Args:
+            transactions: Rows sent to the LLM
+
+        Returns:
+            Aggregate filter risk (0-100), or None when the cascade is disabled
+        """
+        if not settings.cascade_enabled:
+            return None
+        if self._risk_filter is None:
+            self._risk_filter = create_filter()
+        suspicious, _ = await get_cpu_executor().run_array(
+            len(transactions), self._risk_filter.run, transactions.features
+        )
+        return RiskGate.aggregate_risk(suspicious)
+
+    def cascade_stats(self) -> dict:
+        """Cascade calls and escalations of this agent."""
+        return {
+            "calls": self.cascade_calls,
+            "escalations": self.cascade_escalations,
+            "escalation_rate": (
+                self.cascade_escalations / self.cascade_calls if self.cascade_calls else 0.0
+            ),
+        }
+
+    def _log_prompt_prefix(self, layout: PromptLayout) -> None:
+        """Log the static prompt prefix size against the provider's caching minimum."""
+        tokens = layout.prefix_tokens(get_token_counter(self.model.model_name))
+        if tokens >= MIN_CACHEABLE_TOKENS:
+            logger.info(f"{self.approach.value} static prompt prefix: {tokens} tokens (cacheable)")
+        else:
+            logger.info(
+                f"{self.approach.value} static prompt prefix: {tokens} tokens; provider prefix "
+                f"caching starts at {MIN_CACHEABLE_TOKENS} (incl. output schema and data)"
+            )
+
+    @staticmethod
+    def _extract_usage(result: Any) -> LLMUsage:
+        """Read token usage from a pydantic-ai run result."""
+        try:
+            usage = result.usage()
+            return LLMUsage(
+                prompt_tokens=usage.request_tokens or 0,
+                completion_tokens=usage.response_tokens or 0,
+                cached_tokens=(usage.details or {}).get("cached_tokens", 0),
+            )
+        except Exception as e:
+            logger.warning(f"Could not extract token usage: {e}")
+            return LLMUsage()
+
+    def calculate_cost(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+        model: Optional[str] = None,
+    ) -> float:
+        """
+        Calculate cost in USD based on token usage.
+
+        Prices come from the per-model table in :mod:`app.agents.pricing`;
+        cached prompt tokens are billed at the model's cached-input rate.
+
+        Args:
+            prompt_tokens: Number of prompt tokens (including cached ones)
+            completion_tokens: Number of completion tokens
+            cached_tokens: Prompt tokens served from the provider's prompt cache
+            model: Model name (defaults to this agent's model)
+
+        Returns:
+            float: Estimated cost in USD
+        """
+        pricing = get_model_pricing(model or self.model.model_name)
+        return round(pricing.cost(prompt_tokens, completion_tokens, cached_tokens), 6)
 
     def create_metrics(
         self,
@@ -64,6 +365,7 @@ class BaseFraudAgent(ABC):
         latency_ms: float,
         transactions_count: int,
         context_size: int | None = None,
+        cached_tokens: int = 0,
     ) -> AnalysisMetrics:
         """
         Create metrics object.
@@ -74,12 +376,13 @@ class BaseFraudAgent(ABC):
             latency_ms: Latency in milliseconds
             transactions_count: Number of transactions analyzed
             context_size: Size of context in characters
+            cached_tokens: Prompt tokens served from the provider's prompt cache
 
         Returns:
             AnalysisMetrics: Metrics object
         """
         total_tokens = prompt_tokens + completion_tokens
-        cost = self.calculate_cost(prompt_tokens, completion_tokens)
+        cost = self.calculate_cost(prompt_tokens, completion_tokens, cached_tokens)
 
         return AnalysisMetrics(
             approach=self.approach,
@@ -90,23 +393,26 @@ class BaseFraudAgent(ABC):
             cost_usd=cost,
             transactions_analyzed=transactions_count,
             context_size_chars=context_size,
+            model=self.model.model_name,
+            cached_tokens=cached_tokens,
         )
 
-    def format_transactions_for_context(self, transactions: List[Transaction]) -> str:
+    def format_transactions_for_context(self, transactions: TransactionInput) -> str:
         """
         Format transactions for LLM context.
 
         Args:
-            transactions: List of transactions
+            transactions: List of transactions or a TransactionFrame
 
         Returns:
             str: Formatted transaction context
         """
+        frame = as_frame(transactions)
         lines = ["Recent transactions:"]
-        for idx, txn in enumerate(transactions, 1):
+        for idx, row in enumerate(frame.features.tolist(), 1):
             lines.append(
-                f"{idx}. Time: {txn.time:.0f}s, Amount: ${txn.amount:.2f}, "
-                f"Features: V1={txn.v1:.2f}, V2={txn.v2:.2f}, V3={txn.v3:.2f}... "
+                f"{idx}. Time: {row[TIME_COL]:.0f}s, Amount: ${row[AMOUNT_COL]:.2f}, "
+                f"Features: V1={row[1]:.2f}, V2={row[2]:.2f}, V3={row[3]:.2f}... "
                 f"(28 features total)"
             )
         return "\n".join(lines)
@@ -0,0 +1,159 @@
+"""Record/replay of LLM calls for reproducible benchmarks.
+
+A cassette is a JSON Lines file (gzip-compressed when the path ends in
+``.gz``) with one line per recorded call: the prompt-hash key, the parsed
+response with its token usage, and the observed latency. Prompts are not
+stored, only their hashes, so cassettes stay compact.
+
+Modes (``LLM_CASSETTE_MODE``):
+
+- ``record``: every call goes to the model and is appended to the cassette
+- ``replay``: calls are answered from the cassette; a missing key is an error
+- ``auto``: replay when recorded, otherwise call the model and record
+
+Replaying makes before/after comparisons of prompt formatting and filtering
+changes use the same real model outputs without paying for tokens again.
+Only changed prompts miss the cassette.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Dict, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.models.schemas import LLMResponse
+
+MODES = ("off", "record", "replay", "auto")
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode for a call that is not on the cassette."""
+
+
+class Cassette:
+    """LLM responses recorded to, and replayed from, a JSON Lines file."""
+
+    def __init__(self, path: str, mode: str = "auto", replay_latency: bool = False):
+        """
+        Initialize the cassette, loading existing recordings.
+
+        Args:
+            path: Cassette file (``.jsonl`` or ``.jsonl.gz``)
+            mode: One of ``record``, ``replay`` or ``auto``
+            replay_latency: Sleep for the recorded latency when replaying
+        """
+        if mode not in MODES[1:]:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {MODES[1:]})")
+        self.path = Path(path)
+        self.mode = mode
+        self.replay_latency = replay_latency
+
+        self._entries: Dict[str, Dict] = {}
+        self.replayed = 0
+        self.recorded = 0
+        self.misses = 0
+        if mode != "record":
+            self._load()
+
+    def _open(self, mode: str) -> IO[str]:
+        """Open the cassette file as text, decompressing ``.gz`` files."""
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        """Read all recordings; later lines win for repeated keys."""
+        if not self.path.exists():
+            if self.mode == "replay":
+                logger.warning(f"Cassette {self.path} does not exist; every call will miss")
+            return
+        with self._open("r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+        logger.info(f"Loaded {len(self._entries)} LLM recordings from {self.path}")
+
+    @property
+    def replaying(self) -> bool:
+        """Whether lookups may be answered from the cassette."""
+        return self.mode in ("replay", "auto")
+
+    async def play(self, key: str) -> Optional[LLMResponse]:
+        """
+        Replay a recorded call.
+
+        Args:
+            key: Prompt-hash key of the call
+
+        Returns:
+            Recorded response, or None when not recorded (``auto`` mode) or recording
+
+        Raises:
+            CassetteMiss: In ``replay`` mode, when the call was not recorded
+        """
+        if not self.replaying:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise CassetteMiss(f"No recording for LLM call {key} in {self.path}")
+            return None
+
+        if self.replay_latency:
+            await asyncio.sleep(entry.get("latency_ms", 0.0) / 1000)
+        self.replayed += 1
+        return LLMResponse.model_validate(entry["response"])
+
+    def record(self, key: str, model: str, response: LLMResponse, latency_ms: float) -> None:
+        """
+        Append a call to the cassette.
+
+        Args:
+            key: Prompt-hash key of the call
+            model: Model that answered
+            response: Parsed response with usage
+            latency_ms: Observed latency of the call
+        """
+        entry = {
+            "key": key,
+            "model": model,
+            "latency_ms": round(latency_ms, 1),
+            "recorded_at": round(time.time()),
+            "response": response.model_dump(mode="json", exclude={"cached"}),
+        }
+        self._entries[key] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._open("a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.recorded += 1
+
+    def stats(self) -> Dict:
+        """Replay/record counters."""
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "entries": len(self._entries),
+            "replayed": self.replayed,
+            "recorded": self.recorded,
+            "misses": self.misses,
+        }
+
+
+@lru_cache
+def get_cassette() -> Optional[Cassette]:
+    """Get the cassette shared by all agents (None if disabled)."""
+    if settings.llm_cassette_mode == "off":
+        return None
+    return Cassette(
+        settings.llm_cassette_path,
+        mode=settings.llm_cassette_mode,
+        replay_latency=settings.llm_cassette_replay_latency,
+    )
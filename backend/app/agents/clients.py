@@ -0,0 +1,221 @@
+"""Shared provider clients for all agents.
+
+One :class:`ClientRegistry` owns a single keep-alive ``httpx.AsyncClient``
+(configurable pool limits, optional HTTP/2), the ``AsyncOpenAI`` client built
+on it, and the pydantic-ai provider, so agents share one connection pool
+instead of each opening their own.
+
+``openai`` and ``pydantic_ai`` are imported on first use, so importing this
+module (and the API that exposes pool stats) stays cheap.
+"""
+
+import asyncio
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import httpx
+from loguru import logger
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from pydantic_ai.models.openai import OpenAIModel
+    from pydantic_ai.providers.openai import OpenAIProvider
+
+FAKE_BASE_URL = "http://fake-llm/v1"
+
+
+def _http2_available() -> bool:
+    """Whether the optional ``h2`` package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _LoopTransport(httpx.AsyncBaseTransport):
+    """
+    Transport keeping one connection pool per event loop.
+
+    Pooled connections cannot move between event loops, and the Streamlit
+    dashboard runs each analysis in a fresh ``asyncio.run``. Within a loop
+    (e.g. the FastAPI server) all requests share one keep-alive pool.
+    """
+
+    def __init__(self, limits: httpx.Limits, http2: bool):
+        """
+        Initialize the transport.
+
+        Args:
+            limits: Connection pool limits
+            http2: Negotiate HTTP/2 where the server supports it
+        """
+        self.limits = limits
+        self.http2 = http2
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.requests_sent = 0
+        self.in_flight = 0
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        """Transport of the running event loop."""
+        loop = asyncio.get_running_loop()
+        transport = self._pools.get(loop)
+        if transport is None:
+            transport = self._pools[loop] = httpx.AsyncHTTPTransport(
+                limits=self.limits, http2=self.http2
+            )
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request through the current loop's pool."""
+        self.requests_sent += 1
+        self.in_flight += 1
+        try:
+            return await self._pool().handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+    async def aclose(self) -> None:
+        """Close the current loop's pool."""
+        loop = asyncio.get_running_loop()
+        transport = self._pools.pop(loop, None)
+        if transport is not None:
+            await transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection counts across all live pools."""
+        connections = idle = queued = 0
+        for transport in list(self._pools.values()):
+            pool = transport._pool
+            connections += len(pool.connections)
+            idle += sum(1 for connection in pool.connections if connection.is_idle())
+            queued += len(getattr(pool, "_requests", ()))
+        return {
+            "pools": len(self._pools),
+            "connections": connections,
+            "active_connections": connections - idle,
+            "idle_connections": idle,
+            "queued_requests": queued,
+            "in_flight_requests": self.in_flight,
+            "requests_sent": self.requests_sent,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "http2": self.http2,
+        }
+
+
+class ClientRegistry:
+    """Lazily builds and shares the HTTP, OpenAI and pydantic-ai provider clients."""
+
+    def __init__(self):
+        """Initialize an empty registry (clients are built on first use)."""
+        self._transport: Optional[_LoopTransport] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._openai_client: Optional["AsyncOpenAI"] = None
+        self._provider: Optional["OpenAIProvider"] = None
+        self._models: Dict[str, "OpenAIModel"] = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive HTTP client."""
+        if self._http_client is None and settings.fake_llm_enabled:
+            from .fake_llm import app as fake_app
+
+            logger.warning("FAKE_LLM_ENABLED: LLM calls are served by the local fake server")
+            self._http_client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=fake_app),
+                timeout=httpx.Timeout(settings.http_timeout_seconds, connect=5.0),
+            )
+        if self._http_client is None:
+            http2 = settings.http2_enabled and _http2_available()
+            if settings.http2_enabled and not http2:
+                logger.warning("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+
+            self._transport = _LoopTransport(
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+                http2=http2,
+            )
+            self._http_client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=httpx.Timeout(settings.http_timeout_seconds, connect=5.0),
+            )
+        return self._http_client
+
+    @property
+    def openai_client(self) -> "AsyncOpenAI":
+        """
+        Shared OpenAI client (also used directly, e.g. for embeddings).
+
+        Raises:
+            RuntimeError: If no API key is configured and the fake server is disabled
+        """
+        if self._openai_client is None:
+            if not settings.openai_api_key and not settings.fake_llm_enabled:
+                raise RuntimeError(
+                    "OPENAI_API_KEY is not set; configure it (or FAKE_LLM_ENABLED=true) "
+                    "to use LLM-backed approaches"
+                )
+            from openai import AsyncOpenAI
+
+            self._openai_client = AsyncOpenAI(
+                api_key=settings.openai_api_key or "sk-fake",
+                base_url=FAKE_BASE_URL if settings.fake_llm_enabled else settings.openai_base_url,
+                http_client=self.http_client,
+            )
+        return self._openai_client
+
+    @property
+    def provider(self) -> "OpenAIProvider":
+        """pydantic-ai provider wrapping the shared OpenAI client."""
+        if self._provider is None:
+            from pydantic_ai.providers.openai import OpenAIProvider
+
+            self._provider = OpenAIProvider(openai_client=self.openai_client)
+        return self._provider
+
+    def model(self, name: str) -> "OpenAIModel":
+        """
+        Get the pydantic-ai model of a name, on the shared provider.
+
+        Args:
+            name: Configured model name (``openai:`` prefix optional)
+
+        Returns:
+            OpenAIModel: Model using the shared connection pool (one per name)
+        """
+        from pydantic_ai.models.openai import OpenAIModel
+
+        name = name.replace("openai:", "")
+        if name not in self._models:
+            self._models[name] = OpenAIModel(name, provider=self.provider)
+        return self._models[name]
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool utilization.
+
+        Returns:
+            dict: Pool statistics (empty pool before the first request)
+        """
+        if settings.fake_llm_enabled:
+            return {"fake_llm": True}
+        if self._transport is None:
+            return {"pools": 0, "connections": 0, "requests_sent": 0}
+        return self._transport.stats()
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the running event loop."""
+        if self._transport is not None:
+            await self._transport.aclose()
+
+
+# Shared instance used by all agents
+client_registry = ClientRegistry()
@@ -0,0 +1,135 @@
+"""Token-budgeted prompt packing.
+
+Fills a prompt with as many items as fit in a token budget. Items are taken
+in order (callers pass them highest-priority first), trying each encoding from
+the richest to the most compact.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from .tokenizer import TokenCounter
+
+# Renders one item as a prompt block
+ItemEncoder = Callable[[Dict[str, Any]], str]
+
+# Builds the full user prompt from the rendered blocks, candidate count and encoding
+PromptBuilder = Callable[[List[str], int, str], str]
+
+
+@dataclass
+class PackedContext:
+    """Result of packing items into a prompt."""
+
+    prompt: str
+    encoding: str
+    included: int
+    candidates: int
+    prompt_tokens: int
+    budget: int
+    exact: bool
+
+    @property
+    def truncated(self) -> bool:
+        """Whether some candidates did not fit."""
+        return self.included < self.candidates
+
+
+class ContextPacker:
+    """Greedy token-budget packer over a set of item encodings."""
+
+    def __init__(
+        self,
+        counter: TokenCounter,
+        encoders: Dict[str, ItemEncoder],
+        build_prompt: PromptBuilder,
+        tools: str = "",
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            counter: Token counter of the target model
+            encoders: Item encodings, ordered richest to most compact
+            build_prompt: Called with the rendered blocks, candidate count and encoding name
+            tools: JSON tool definitions sent with every request (counted against the budget)
+        """
+        self.counter = counter
+        self.encoders = encoders
+        self.build_prompt = build_prompt
+        self.tools = tools
+
+    def pack(
+        self, items: List[Dict[str, Any]], system_prompt: str, budget: int
+    ) -> PackedContext:
+        """
+        Pack the highest-priority items into a prompt within the budget.
+
+        The richest encoding that fits every item is used. If none does, the
+        encoding that fits the most items wins (ties go to the richer one).
+        At least one item is always included. The returned token count is
+        measured on the final system + user prompt and the tool definitions.
+
+        Args:
+            items: Candidate items, highest priority first
+            system_prompt: System prompt sent with the request
+            budget: Maximum prompt tokens
+
+        Returns:
+            PackedContext: Final prompt and its token count
+        """
+        best_name, best_blocks = "", []
+        for name, encode in self.encoders.items():
+            blocks = self._fill(items, name, encode, system_prompt, budget)
+            if not best_name or len(blocks) > len(best_blocks):
+                best_name, best_blocks = name, blocks
+            if len(blocks) == len(items):
+                break
+
+        if not best_blocks and items:
+            # Nothing fits: send the top item in the most compact encoding
+            best_name, encode = list(self.encoders.items())[-1]
+            best_blocks = [encode(items[0])]
+
+        prompt, tokens = self._measure(best_blocks, len(items), best_name, system_prompt)
+        # Block counts are additive estimates; trim if token merges overshoot
+        while tokens > budget and len(best_blocks) > 1:
+            best_blocks = best_blocks[:-1]
+            prompt, tokens = self._measure(best_blocks, len(items), best_name, system_prompt)
+
+        return PackedContext(
+            prompt=prompt,
+            encoding=best_name,
+            included=len(best_blocks),
+            candidates=len(items),
+            prompt_tokens=tokens,
+            budget=budget,
+            exact=self.counter.exact,
+        )
+
+    def _fill(
+        self,
+        items: List[Dict[str, Any]],
+        name: str,
+        encode: ItemEncoder,
+        system_prompt: str,
+        budget: int,
+    ) -> List[str]:
+        """Render items in order until the next one would exceed the budget."""
+        _, used = self._measure([], len(items), name, system_prompt)
+        blocks = []
+        for item in items:
+            block = encode(item)
+            cost = self.counter.count(block + "\n")
+            if used + cost > budget:
+                break
+            blocks.append(block)
+            used += cost
+        return blocks
+
+    def _measure(
+        self, blocks: List[str], candidates: int, encoding: str, system_prompt: str
+    ) -> tuple:
+        """Build the prompt and count the request's tokens."""
+        prompt = self.build_prompt(blocks, candidates, encoding)
+        return prompt, self.counter.count_messages(system_prompt, prompt, self.tools)
@@ -0,0 +1,282 @@
+"""Prompt encodings for transaction tables.
+
+Agents render transactions through a :class:`TransactionEncoder`, selected
+with ``PROMPT_ENCODING``:
+
+- ``labeled``: one ``Transaction i: Time=..., Amount=..., V1=...`` line per row
+- ``csv`` / ``tsv``: a single header row, then one delimited row per transaction
+
+With ``PROMPT_OMIT_TYPICAL_FEATURES``, V-features within ±1σ of their
+population mean are left out, so only informative values cost tokens.
+"""
+
+import csv
+import io
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.models.frame import AMOUNT_COL, DATASET_COLUMNS, TIME_COL, TransactionFrame
+from app.models.statistics import DatasetStatistics
+
+ENCODINGS = ("labeled", "csv", "tsv")
+DELIMITERS = {"csv": ",", "tsv": "\t"}
+TYPICAL_FEATURE_SIGMA = 1.0
+
+ALL_FEATURES = tuple(range(1, 29))
+
+
+class TransactionEncoder:
+    """Renders transactions as prompt text in one of :data:`ENCODINGS`."""
+
+    def __init__(
+        self,
+        name: str = "labeled",
+        features: Sequence[int] = ALL_FEATURES,
+        precision: int = 3,
+        typical_range: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ):
+        """
+        Initialize the encoder.
+
+        Args:
+            name: Encoding name (see :data:`ENCODINGS`)
+            features: V-feature numbers to include (1-28)
+            precision: Decimal places for V-features
+            typical_range: Per-column (low, high) bounds; V-features inside
+                them are omitted. None keeps every value.
+        """
+        if name not in ENCODINGS:
+            raise ValueError(f"Unknown prompt encoding '{name}' (expected one of {ENCODINGS})")
+
+        self.name = name
+        self.features = list(features)
+        self.precision = precision
+        self.typical_range = typical_range
+
+    @property
+    def is_tabular(self) -> bool:
+        """Whether rows are delimited under a single header."""
+        return self.name in DELIMITERS
+
+    def describe(self) -> str:
+        """
+        One-line description of the layout for the prompt.
+
+        Returns:
+            str: Description, empty for plain labeled output
+        """
+        parts = []
+        if self.is_tabular:
+            parts.append(f"{self.name.upper()} with a header row, one transaction per row")
+        if self.typical_range is not None:
+            parts.append(
+                f"V-features within ±{TYPICAL_FEATURE_SIGMA:g}σ of the population mean are omitted"
+            )
+        return "; ".join(parts)
+
+    def legend(self, extra_columns: Sequence[str] = ()) -> str:
+        """
+        Static description of the row layout, for the (cacheable) system prompt.
+
+        Pairs with ``encode(..., legend=False)``, which then emits rows only.
+
+        Args:
+            extra_columns: Names of additional trailing columns
+
+        Returns:
+            str: Layout description
+        """
+        if self.is_tabular:
+            lines = [
+                f"{self.name.upper()} rows without a header, one transaction per row.",
+                f"Columns: {self.header(extra_columns)}",
+            ]
+        else:
+            extra = "".join(f", {name}=<value>" for name in extra_columns)
+            lines = [
+                "One transaction per line: "
+                f"Transaction <row>: Time=<seconds>s, Amount=$<usd>, V<i>=<value>{extra}"
+            ]
+        if self.typical_range is not None:
+            lines.append(
+                f"V-features within ±{TYPICAL_FEATURE_SIGMA:g}σ of the population mean are omitted."
+            )
+        return "\n".join(lines)
+
+    def header(self, extra_columns: Sequence[str] = ()) -> str:
+        """
+        Header row for tabular encodings.
+
+        Args:
+            extra_columns: Names of additional trailing columns
+
+        Returns:
+            str: Header line, empty for labeled output
+        """
+        if not self.is_tabular:
+            return ""
+        columns = ["row", "time", "amount", *(f"V{i}" for i in self.features), *extra_columns]
+        return self._delimited(columns)
+
+    def encode_row(
+        self,
+        row_id: Any,
+        row: Sequence[float],
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Encode a single transaction.
+
+        Args:
+            row_id: Identifier shown to the LLM (usually the batch index)
+            row: 30 feature values in ``Time, V1..V28, Amount`` order
+            extra: Additional trailing values, keyed by column name
+
+        Returns:
+            str: Encoded line
+        """
+        extra = extra or {}
+        features = [
+            None if self._is_typical(i, row[i]) else f"{row[i]:.{self.precision}f}"
+            for i in self.features
+        ]
+
+        if self.is_tabular:
+            values = [
+                row_id,
+                f"{row[TIME_COL]:.0f}",
+                f"{row[AMOUNT_COL]:.2f}",
+                *("" if value is None else value for value in features),
+                *extra.values(),
+            ]
+            return self._delimited(values)
+
+        fields = [f"Time={row[TIME_COL]:.0f}s", f"Amount=${row[AMOUNT_COL]:.2f}"]
+        fields += [f"V{i}={value}" for i, value in zip(self.features, features) if value is not None]
+        fields += [f"{name}={value}" for name, value in extra.items()]
+        return f"Transaction {row_id}: {', '.join(fields)}"
+
+    def encode(
+        self,
+        frame: TransactionFrame,
+        row_ids: Optional[Sequence[Any]] = None,
+        extra: Optional[Dict[str, Sequence[Any]]] = None,
+        legend: bool = True,
+    ) -> str:
+        """
+        Encode a frame as a table (or labeled lines).
+
+        The :meth:`describe` line, if any, and the header row are emitted
+        first unless ``legend`` is False (layout described by :meth:`legend`
+        elsewhere, e.g. in the system prompt).
+
+        Args:
+            frame: Transactions to encode
+            row_ids: Identifiers per row (defaults to 0..N-1)
+            extra: Additional columns, each a sequence aligned with the frame
+            legend: Emit the description line and header row
+
+        Returns:
+            str: Encoded transactions
+        """
+        extra = extra or {}
+        row_ids = range(len(frame)) if row_ids is None else row_ids
+
+        lines: List[str] = []
+        description = self.describe()
+        if legend and description:
+            lines.append(f"({description})")
+        if legend and self.is_tabular:
+            lines.append(self.header(list(extra)))
+        for pos, (row_id, row) in enumerate(zip(row_ids, frame.features.tolist())):
+            lines.append(
+                self.encode_row(row_id, row, {name: values[pos] for name, values in extra.items()})
+            )
+        return "\n".join(lines)
+
+    def _is_typical(self, column: int, value: float) -> bool:
+        """Whether a V-feature value lies inside its typical range."""
+        if self.typical_range is None:
+            return False
+        low, high = self.typical_range
+        return bool(low[column] <= value <= high[column])
+
+    def _delimited(self, values: Sequence[Any]) -> str:
+        """Join values with the encoding's delimiter, quoting where needed."""
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=DELIMITERS[self.name], lineterminator="").writerow(values)
+        return buffer.getvalue()
+
+
+def typical_feature_range(stats: DatasetStatistics) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-column ±1σ bounds around the population mean.
+
+    Args:
+        stats: Dataset statistics
+
+    Returns:
+        (low, high) arrays indexed like the feature matrix; columns without
+        statistics get an empty range.
+    """
+    low = np.full(len(DATASET_COLUMNS), np.inf)
+    high = np.full(len(DATASET_COLUMNS), -np.inf)
+    for column, name in enumerate(DATASET_COLUMNS):
+        feature = stats.features.get(name)
+        if feature is not None:
+            low[column] = feature.mean - TYPICAL_FEATURE_SIGMA * feature.std
+            high[column] = feature.mean + TYPICAL_FEATURE_SIGMA * feature.std
+    return low, high
+
+
+@lru_cache
+def _load_population_stats() -> Optional[DatasetStatistics]:
+    """Load dataset statistics used for feature omission (once)."""
+    stats = DatasetStatistics.load(settings.reference_profile_file)
+    if stats is None:
+        logger.warning(
+            f"No dataset statistics at {settings.reference_profile_file}; "
+            "prompts will include every feature"
+        )
+    return stats
+
+
+def create_encoder(
+    features: Sequence[int] = ALL_FEATURES,
+    precision: int = 3,
+    name: Optional[str] = None,
+    omit_typical: Optional[bool] = None,
+    stats: Optional[DatasetStatistics] = None,
+) -> TransactionEncoder:
+    """
+    Create an encoder from settings, with per-agent defaults.
+
+    Args:
+        features: V-feature numbers the agent shows
+        precision: Agent's default precision (``PROMPT_FLOAT_PRECISION`` overrides)
+        name: Encoding name (defaults to ``PROMPT_ENCODING``)
+        omit_typical: Omit typical features (defaults to ``PROMPT_OMIT_TYPICAL_FEATURES``)
+        stats: Population statistics (defaults to the dataset's ``stats.json``)
+
+    Returns:
+        TransactionEncoder: Configured encoder
+    """
+    if omit_typical is None:
+        omit_typical = settings.prompt_omit_typical_features
+    if omit_typical and stats is None:
+        stats = _load_population_stats()
+
+    return TransactionEncoder(
+        name=name or settings.prompt_encoding,
+        features=features,
+        precision=(
+            settings.prompt_float_precision
+            if settings.prompt_float_precision is not None
+            else precision
+        ),
+        typical_range=typical_feature_range(stats) if omit_typical and stats else None,
+    )
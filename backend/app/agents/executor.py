@@ -0,0 +1,278 @@
+"""Off-loop execution of CPU-bound agent stages.
+
+Filtering, prompt formatting and prompt packing are synchronous. Called
+directly from an ``async`` analysis they block the event loop, stalling every
+other request on the worker. :class:`CPUExecutor` runs them elsewhere:
+
+- array stages (the NumPy filter, which releases the GIL) on a thread pool
+- pure-Python stages (prompt formatting, which holds the GIL) inline by
+  default, or on a process pool; the callable and its arguments must then be
+  picklable
+- prompt packing (token counting, which releases the GIL in tiktoken) on the
+  thread pool, since the packer holds agent-bound encoders
+
+Backends are chosen with ``CPU_EXECUTOR_ARRAY`` and ``CPU_EXECUTOR_PYTHON``
+(``inline`` runs on the event loop). Filter batches smaller than
+``CPU_OFFLOAD_MIN_ROWS``, and prompts of fewer rows than
+``CPU_OFFLOAD_MIN_PROMPT_ROWS``, always run inline, where the hand-off would
+cost more than it saves. ``scripts/benchmark_cpu_offload.py`` measures that
+trade-off for prompt formatting: a process-pool call costs several ms more
+than formatting 50-100 rows inline, and only from about 1000 rows does it
+remove more loop stall than it adds. The shipped prompt caps
+(``MAX_TRANSACTIONS_NAIVE``, ``MAX_TRANSACTIONS_RAG``) stay well below that,
+so formatting is offloaded only where they are raised.
+
+:class:`LoopLagMonitor` measures the effect: how late the loop wakes up from
+a fixed-interval sleep, which is the delay every coroutine sees while the
+loop is blocked.
+"""
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+BACKENDS = ("inline", "thread", "process")
+
+
+class CPUExecutor:
+    """Runs CPU-bound stages on thread or process pools, off the event loop."""
+
+    def __init__(
+        self,
+        array_backend: str = "thread",
+        python_backend: str = "inline",
+        workers: int = 4,
+        min_rows: int = 1000,
+        min_prompt_rows: int = 1000,
+    ):
+        """
+        Initialize the executor (pools are started on first use).
+
+        Args:
+            array_backend: ``inline`` or ``thread`` for GIL-releasing NumPy stages
+            python_backend: ``inline``, ``thread`` or ``process`` for pure-Python stages
+            workers: Workers per pool
+            min_rows: Array batches with fewer rows run inline
+            min_prompt_rows: Prompts of fewer rows are formatted inline
+        """
+        if array_backend not in BACKENDS[:2]:
+            raise ValueError(f"Unknown array backend '{array_backend}' (expected inline or thread)")
+        if python_backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown python backend '{python_backend}' (expected one of {BACKENDS})"
+            )
+        self.array_backend = array_backend
+        self.python_backend = python_backend
+        self.workers = workers
+        self.min_rows = min_rows
+        self.min_prompt_rows = min_prompt_rows
+
+        self._pools: Dict[str, Executor] = {}
+        self.calls = {backend: 0 for backend in BACKENDS}
+
+    def _pool(self, backend: str) -> Executor:
+        """Pool of a backend, started on first use."""
+        pool = self._pools.get(backend)
+        if pool is None:
+            if backend == "thread":
+                pool = ThreadPoolExecutor(self.workers, thread_name_prefix="cpu-stage")
+            else:
+                # Spawned workers do not inherit the server's threads or open connections
+                pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            self._pools[backend] = pool
+            logger.info(f"Started {backend} pool with {self.workers} workers for CPU stages")
+        return pool
+
+    async def _run(
+        self,
+        backend: str,
+        rows: int,
+        min_rows: int,
+        fn: Callable[..., T],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """Run ``fn`` on a backend, inline for fewer than ``min_rows`` rows."""
+        if backend == "inline" or rows < min_rows:
+            self.calls["inline"] += 1
+            return fn(*args, **kwargs)
+
+        self.calls[backend] += 1
+        if backend == "thread":
+            # Like asyncio.to_thread: keep context variables (usage tracking) visible
+            call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        else:
+            call = functools.partial(fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._pool(backend), call)
+
+    async def run_array(self, rows: int, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a NumPy stage that releases the GIL.
+
+        Args:
+            rows: Batch size, compared against ``min_rows``
+            fn: Stage function
+            *args: Positional arguments of ``fn``
+            **kwargs: Keyword arguments of ``fn``
+
+        Returns:
+            Result of ``fn``
+        """
+        return await self._run(self.array_backend, rows, self.min_rows, fn, *args, **kwargs)
+
+    async def run_python(self, rows: int, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a pure-Python stage (holds the GIL, so a process pool gives real parallelism).
+
+        With the ``process`` backend, ``fn`` (including a bound method's
+        instance) and its arguments are pickled to the worker, and results
+        pickled back; pass plain data objects, not agents.
+
+        Args:
+            rows: Rows formatted, compared against ``min_prompt_rows``
+            fn: Stage function
+            *args: Positional arguments of ``fn``
+            **kwargs: Keyword arguments of ``fn``
+
+        Returns:
+            Result of ``fn``
+        """
+        return await self._run(
+            self.python_backend, rows, self.min_prompt_rows, fn, *args, **kwargs
+        )
+
+    async def run_packing(self, rows: int, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run token-budgeted prompt packing (see :class:`ContextPacker`).
+
+        Token counting releases the GIL, and the packer's encoders are bound
+        to the agent, so packing runs on the array stages' thread pool rather
+        than a process pool. A thread hand-off costs well under a millisecond,
+        so packing is offloaded at any size (unless ``CPU_EXECUTOR_ARRAY=inline``).
+
+        Args:
+            rows: Candidate rows (nothing to offload without any)
+            fn: Packing function
+            *args: Positional arguments of ``fn``
+            **kwargs: Keyword arguments of ``fn``
+
+        Returns:
+            Result of ``fn``
+        """
+        return await self._run(self.array_backend, rows, 1, fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Backends and calls per backend."""
+        return {
+            "array_backend": self.array_backend,
+            "python_backend": self.python_backend,
+            "workers": self.workers,
+            "min_rows": self.min_rows,
+            "min_prompt_rows": self.min_prompt_rows,
+            "pools_started": sorted(self._pools),
+            "calls": dict(self.calls),
+        }
+
+    def shutdown(self) -> None:
+        """Stop all pools."""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how late a fixed-interval sleep wakes up."""
+
+    def __init__(self, interval_ms: float = 100.0, window: int = 600):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval_ms: Sleep between samples
+            window: Number of recent samples kept for percentiles
+        """
+        self.interval_ms = interval_ms
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.max_lag_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampling task is active."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start sampling on the running event loop (no-op if already running)."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        """Drop collected samples."""
+        self._samples.clear()
+        self.max_lag_ms = 0.0
+
+    async def _sample(self) -> None:
+        """Sleep for the interval and record how much later than that the loop woke up."""
+        loop = asyncio.get_running_loop()
+        interval = self.interval_ms / 1000
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag_ms = max(0.0, (loop.time() - start - interval) * 1000)
+            self._samples.append(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag percentiles over the recent samples, in ms."""
+        samples = np.array(self._samples) if self._samples else np.zeros(1)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval_ms,
+            "samples": len(self._samples),
+            "mean_ms": round(float(samples.mean()), 2),
+            "p50_ms": round(float(np.percentile(samples, 50)), 2),
+            "p99_ms": round(float(np.percentile(samples, 99)), 2),
+            "max_ms": round(self.max_lag_ms, 2),
+        }
+
+
+@lru_cache
+def get_cpu_executor() -> CPUExecutor:
+    """Get the executor shared by all agents."""
+    return CPUExecutor(
+        array_backend=settings.cpu_executor_array,
+        python_backend=settings.cpu_executor_python,
+        workers=settings.cpu_executor_workers,
+        min_rows=settings.cpu_offload_min_rows,
+        min_prompt_rows=settings.cpu_offload_min_prompt_rows,
+    )
+
+
+@lru_cache
+def get_loop_lag_monitor() -> LoopLagMonitor:
+    """Get the event-loop lag monitor of the application."""
+    return LoopLagMonitor(interval_ms=settings.loop_lag_interval_ms)
@@ -0,0 +1,374 @@
+"""Deterministic OpenAI-compatible stand-in for offline load and latency testing.
+
+Implements ``POST /v1/chat/completions`` and ``POST /v1/embeddings``. Chat
+responses are schema-valid fraud assessments (``FraudAnalysisResult``, or
+``BatchAnalysisResult`` for multi-section prompts) derived from a hash of the
+prompt, so the same prompt always gets the same answer. Latency, token usage
+and error rate follow the ``FAKE_LLM_*`` settings. Provider prefix caching is
+simulated, so ``cached_tokens`` reflects how cache-friendly prompts are.
+
+Use it in-process by setting ``FAKE_LLM_ENABLED=true`` (the shared client
+registry then routes all agents' calls here without opening a socket), or
+serve it standalone and point ``OPENAI_BASE_URL`` at it::
+
+    uvicorn app.agents.fake_llm:app --port 8100
+    OPENAI_BASE_URL=http://localhost:8100/v1
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+from .prompt_layout import MIN_CACHEABLE_TOKENS
+from .tokenizer import CHARS_PER_TOKEN, get_token_counter
+
+# Granularity and capacity of the simulated provider prefix cache
+CACHE_STEP_TOKENS = 128
+PREFIX_CACHE_ENTRIES = 10_000
+
+# Transaction row ids in any prompt layout ("Transaction 3:", "Transaction #3:", "#3 ", "3,", "3\t")
+ROW_ID_PATTERN = re.compile(r"^\s*(?:Transaction #?(\d+):|#(\d+) |(\d+)[,\t])", re.MULTILINE)
+SECTION_PATTERN = re.compile(r"^##### SECTION (\d+) #####$", re.MULTILINE)
+# Rows already flagged by shard calls, listed in a reduce prompt ("Flagged: #12, #45")
+FLAGGED_LINE_PATTERN = re.compile(r"^Flagged: (.*)$", re.MULTILINE)
+FLAGGED_ID_PATTERN = re.compile(r"#(\d+)")
+
+PATTERNS = [
+    "Amount far above population mean",
+    "Extreme PCA feature values",
+    "Rapid succession of transactions",
+    "Micro-transaction card testing",
+]
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake server."""
+
+    latency_distribution: str = "lognormal"
+    latency_ms: float = 300.0
+    latency_spread: float = 0.3
+    ms_per_prompt_token: float = 0.02
+    ms_per_completion_token: float = 8.0
+    completion_tokens: Optional[int] = None
+    error_rate: float = 0.0
+    error_status: int = 500
+    flag_rate: float = 0.1
+    prompt_cache: bool = True
+    seed: int = 0
+
+    @classmethod
+    def from_settings(cls) -> "FakeLLMConfig":
+        """Build the config from ``FAKE_LLM_*`` settings."""
+        return cls(
+            latency_distribution=settings.fake_llm_latency_distribution,
+            latency_ms=settings.fake_llm_latency_ms,
+            latency_spread=settings.fake_llm_latency_spread,
+            ms_per_prompt_token=settings.fake_llm_ms_per_prompt_token,
+            ms_per_completion_token=settings.fake_llm_ms_per_completion_token,
+            completion_tokens=settings.fake_llm_completion_tokens,
+            error_rate=settings.fake_llm_error_rate,
+            error_status=settings.fake_llm_error_status,
+            flag_rate=settings.fake_llm_flag_rate,
+            prompt_cache=settings.fake_llm_prompt_cache,
+            seed=settings.fake_llm_seed,
+        )
+
+
+class FakeLLM:
+    """Generates responses, usage, latency and errors for the fake endpoints."""
+
+    def __init__(self, config: FakeLLMConfig):
+        """
+        Initialize the generator.
+
+        Args:
+            config: Latency, usage and error behaviour
+        """
+        self.config = config
+        # Latency and error draws form one seeded sequence, so a run is reproducible
+        self.rng = random.Random(config.seed)
+        self.requests = 0
+        self.errors = 0
+
+        # Simulated provider prefix cache: hashes of prompt prefixes seen before
+        self._prefixes: "OrderedDict[bytes, None]" = OrderedDict()
+        self.cached_tokens = 0
+
+    def base_latency_ms(self) -> float:
+        """Draw the fixed part of a request's latency."""
+        mean, spread = self.config.latency_ms, self.config.latency_spread
+        distribution = self.config.latency_distribution
+        if distribution == "constant":
+            return mean
+        if distribution == "uniform":
+            return self.rng.uniform(mean * (1 - spread), mean * (1 + spread))
+        if distribution == "normal":
+            return max(0.0, self.rng.gauss(mean, mean * spread))
+        # lognormal: ``latency_ms`` is the median, ``latency_spread`` the sigma
+        return mean * self.rng.lognormvariate(0.0, spread)
+
+    def cached_prefix_tokens(self, text: str, prompt_tokens: int) -> int:
+        """
+        Prompt tokens a provider would serve from its prefix cache.
+
+        Mimics OpenAI: prompts of at least :data:`MIN_CACHEABLE_TOKENS` are
+        cached in :data:`CACHE_STEP_TOKENS` steps, and a request hits the
+        longest step-aligned prefix seen in an earlier request.
+
+        Args:
+            text: Full prompt text (tool schemas and messages, in request order)
+            prompt_tokens: Token count of the prompt
+
+        Returns:
+            int: Cached prompt tokens
+        """
+        if not self.config.prompt_cache or prompt_tokens < MIN_CACHEABLE_TOKENS or not text:
+            return 0
+
+        # Step boundaries at fixed character offsets, so equal prefixes hash alike
+        digest = hashlib.sha256()
+        position, cached = 0, 0
+        for tokens in range(MIN_CACHEABLE_TOKENS, prompt_tokens + 1, CACHE_STEP_TOKENS):
+            end = tokens * CHARS_PER_TOKEN
+            if end > len(text):
+                break
+            digest.update(text[position:end].encode())
+            position = end
+            key = digest.copy().digest()
+            if key in self._prefixes:
+                self._prefixes.move_to_end(key)
+                cached = tokens
+            else:
+                self._prefixes[key] = None
+
+        while len(self._prefixes) > PREFIX_CACHE_ENTRIES:
+            self._prefixes.popitem(last=False)
+        return cached
+
+    def should_fail(self) -> bool:
+        """Draw whether the current request fails."""
+        return self.rng.random() < self.config.error_rate
+
+    def assess(self, text: str, seed: bytes) -> Dict[str, Any]:
+        """
+        Deterministic fraud assessment of one prompt (or prompt section).
+
+        Args:
+            text: Prompt text listing the transactions
+            seed: Bytes seeding the assessment (e.g. a prompt hash)
+
+        Returns:
+            dict: ``FraudAnalysisResult`` fields
+        """
+        rng = random.Random(seed)
+        rows = list(dict.fromkeys(int("".join(match)) for match in ROW_ID_PATTERN.findall(text)))
+        # A reduce prompt lists shard flags instead of rows; the fake confirms them
+        confirmed = list(
+            dict.fromkeys(
+                int(row)
+                for line in FLAGGED_LINE_PATTERN.findall(text)
+                for row in FLAGGED_ID_PATTERN.findall(line)
+            )
+        )
+        rows = list(dict.fromkeys(confirmed + rows))
+        flagged = confirmed + [
+            row for row in rows[len(confirmed) :] if rng.random() < self.config.flag_rate
+        ]
+        is_fraud = bool(flagged)
+        risk = rng.uniform(60, 95) if is_fraud else rng.uniform(2, 30)
+        patterns = rng.sample(PATTERNS, k=rng.randint(1, 2)) if is_fraud else []
+        return {
+            "is_fraud": is_fraud,
+            "confidence": round(rng.uniform(0.6, 0.95), 2),
+            "risk_score": round(risk, 1),
+            "reasoning": (
+                f"Flagged {len(flagged)} of {len(rows)} transactions"
+                if is_fraud
+                else f"No fraud indicators among {len(rows)} transactions"
+            ),
+            "suspicious_patterns": patterns,
+            "citations": [f"Transaction {row}" for row in flagged],
+            "flagged_transactions": flagged,
+        }
+
+    def output_for(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Output matching the requested schema: one result, or one per section."""
+        digest = hashlib.sha256(prompt.encode()).digest()
+        if "results" not in schema.get("properties", {}):
+            return self.assess(prompt, digest)
+
+        parts = SECTION_PATTERN.split(prompt)
+        sections = zip(parts[1::2], parts[2::2])
+        return {
+            "results": [
+                {"section": int(number), **self.assess(text, digest + number.encode())}
+                for number, text in sections
+            ]
+        }
+
+    async def chat_completion(self, body: Dict[str, Any]) -> JSONResponse:
+        """Handle a chat completion request."""
+        start = time.perf_counter()
+        self.requests += 1
+        model = body.get("model", "fake")
+        messages = body.get("messages", [])
+        prompt = "\n".join(_message_text(message) for message in messages)
+
+        # pydantic-ai returns structured output through its "final_result" tool
+        tools = [tool["function"] for tool in body.get("tools") or []]
+        tool = next((t for t in tools if t["name"].startswith("final_result")), None)
+        schema = tool.get("parameters", {}) if tool else {}
+        content = json.dumps(self.output_for(prompt, schema))
+
+        counter = get_token_counter(model)
+        tool_text = json.dumps(body.get("tools") or [])
+        prompt_tokens = (
+            sum(counter.count(_message_text(message)) + 3 for message in messages)
+            + 3
+            + (counter.count(tool_text) if tools else 0)
+        )
+        completion_tokens = self.config.completion_tokens or counter.count(content)
+        # Tool definitions precede the messages in the provider's prompt
+        cached_tokens = self.cached_prefix_tokens(
+            (tool_text if tools else "") + prompt, prompt_tokens
+        )
+
+        delay_ms = (
+            self.base_latency_ms()
+            + (prompt_tokens - cached_tokens) * self.config.ms_per_prompt_token
+            + completion_tokens * self.config.ms_per_completion_token
+        )
+        fail = self.should_fail()
+        await asyncio.sleep(max(0.0, delay_ms / 1000 - (time.perf_counter() - start)))
+
+        if fail:
+            self.errors += 1
+            return _error(self.config.error_status, "Simulated failure from fake LLM server")
+
+        self.cached_tokens += cached_tokens
+        if tool is not None:
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{self.requests}",
+                        "type": "function",
+                        "function": {"name": tool["name"], "arguments": content},
+                    }
+                ],
+            }
+            finish_reason = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": content}
+            finish_reason = "stop"
+
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-fake-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                },
+            }
+        )
+
+    def embeddings(self, body: Dict[str, Any]) -> JSONResponse:
+        """Handle an embeddings request with unit vectors seeded by the input text."""
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or settings.embedding_dimensions
+
+        data = []
+        for index, text in enumerate(inputs):
+            seed = int.from_bytes(hashlib.sha256(str(text).encode()).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(dimensions)
+            vector /= np.linalg.norm(vector)
+            data.append({"object": "embedding", "index": index, "embedding": vector.tolist()})
+
+        tokens = sum(get_token_counter(body.get("model", "fake")).count(str(t)) for t in inputs)
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "fake"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            }
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Request and simulated-error counters."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cached_tokens": self.cached_tokens,
+        }
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    """Text content of a chat message (string or list of content parts)."""
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    """OpenAI-style error response."""
+    kind = "rate_limit_error" if status == 429 else "server_error"
+    return JSONResponse(
+        {"error": {"message": message, "type": kind, "param": None, "code": None}},
+        status_code=status,
+    )
+
+
+def create_app(config: Optional[FakeLLMConfig] = None) -> FastAPI:
+    """
+    Build the fake OpenAI-compatible ASGI app.
+
+    Args:
+        config: Server behaviour (defaults to the ``FAKE_LLM_*`` settings)
+
+    Returns:
+        FastAPI: App serving ``/v1/chat/completions`` and ``/v1/embeddings``
+    """
+    fake = FakeLLM(config or FakeLLMConfig.from_settings())
+    fake_app = FastAPI(title="Fake LLM", docs_url=None, redoc_url=None)
+    fake_app.state.fake = fake
+
+    @fake_app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> JSONResponse:
+        return await fake.chat_completion(await request.json())
+
+    @fake_app.post("/v1/embeddings")
+    async def embeddings(request: Request) -> JSONResponse:
+        return fake.embeddings(await request.json())
+
+    @fake_app.get("/stats")
+    async def stats() -> Dict[str, Any]:
+        return fake.stats()
+
+    return fake_app
+
+
+app = create_app()
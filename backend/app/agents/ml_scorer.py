@@ -0,0 +1,265 @@
+"""Local fraud scorer: a trained model evaluated with NumPy, no LLM tokens.
+
+``scripts/train_ml_scorer.py`` fits a scikit-learn model on V1..V28 and
+Amount of the labeled dataset and exports it to a ``.npz`` file of plain
+arrays. :class:`MLScorer` evaluates it without scikit-learn:
+
+- ``logistic``: standardization folded into the weights, one matrix-vector
+  product per batch
+- ``gbt``: gradient-boosted trees padded to perfect binary trees and
+  traversed for all rows and trees at once, one tree level per step, with
+  boolean array operations instead of per-row gathers
+
+The scorer ranks RLM candidates (``RLM_CANDIDATE_RANKER=ml``, see
+:class:`SuspiciousTransactionFilter`) and backs the ``score`` approach.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.models.frame import DATASET_COLUMNS
+
+# Default model inputs: every column except Time
+MODEL_FEATURES = DATASET_COLUMNS[1:]
+
+MODEL_KINDS = ("logistic", "gbt")
+
+# Trees are padded to 2**depth leaves, and leaf indices must fit a uint8
+MAX_GBT_DEPTH = 8
+
+
+class MLScorer:
+    """Fraud probabilities of transactions from an exported model."""
+
+    def __init__(
+        self,
+        kind: str,
+        features: List[str],
+        arrays: Dict[str, np.ndarray],
+        threshold: float,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize the scorer.
+
+        Args:
+            kind: ``logistic`` or ``gbt``
+            features: Dataset columns the model reads, in model order
+            arrays: Model parameters (see :meth:`from_logistic` and :meth:`from_gbt`)
+            threshold: Probability at or above which a transaction is flagged
+            metadata: Training details (rows, holdout metrics), reported as is
+        """
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown model kind '{kind}' (expected one of {MODEL_KINDS})")
+        self.kind = kind
+        self.features = list(features)
+        self.columns = np.array([DATASET_COLUMNS.index(name) for name in self.features])
+        self.arrays = arrays
+        self.threshold = threshold
+        self.metadata = metadata or {}
+
+    @classmethod
+    def from_logistic(
+        cls,
+        coef: np.ndarray,
+        intercept: float,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        features: List[str] = MODEL_FEATURES,
+        threshold: float = 0.5,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> "MLScorer":
+        """
+        Export a logistic regression fitted on standardized features.
+
+        Args:
+            coef: Weights of the standardized features
+            intercept: Bias
+            mean: Standardization means
+            scale: Standardization scales
+            features: Dataset columns, in model order
+            threshold: Decision threshold
+            metadata: Training details
+
+        Returns:
+            MLScorer: Scorer computing ``sigmoid(x @ weights + bias)`` on raw features
+        """
+        weights = np.asarray(coef, dtype=np.float64).ravel() / np.asarray(scale)
+        bias = float(intercept) - float(np.dot(weights, mean))
+        arrays = {"weights": weights, "bias": np.array([bias])}
+        return cls("logistic", features, arrays, threshold, metadata)
+
+    @classmethod
+    def from_gbt(
+        cls,
+        trees: List[Any],
+        learning_rate: float,
+        init_raw: float,
+        features: List[str] = MODEL_FEATURES,
+        threshold: float = 0.5,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> "MLScorer":
+        """
+        Export binary gradient-boosted regression trees.
+
+        Every tree is padded to a perfect binary tree of the ensemble's depth
+        in heap order (children of node ``i`` at ``2i+1`` and ``2i+2``). A
+        leaf above that depth becomes a split that always goes left, with the
+        leaf's value repeated below it. Thresholds are rounded down to
+        float32, which keeps float32 comparisons identical to scikit-learn's.
+
+        Args:
+            trees: scikit-learn ``Tree`` objects (``estimator.tree_``), in boosting order
+            learning_rate: Shrinkage applied to every leaf value
+            init_raw: Log-odds of the initial prediction
+            features: Dataset columns, in model order
+            threshold: Decision threshold
+            metadata: Training details
+
+        Returns:
+            MLScorer: Scorer computing ``sigmoid(init + rate * sum(leaf values))``
+        """
+        depth = max(tree.max_depth for tree in trees)
+        if depth > MAX_GBT_DEPTH:
+            raise ValueError(f"Tree depth {depth} exceeds {MAX_GBT_DEPTH}; train shallower trees")
+        splits, leaves = 2**depth - 1, 2**depth
+        feature = np.zeros((len(trees), splits), dtype=np.int32)
+        split_at = np.full((len(trees), splits), np.inf)
+        leaf = np.zeros((len(trees), leaves))
+
+        def fill(t: int, tree: Any, node: int, position: int, level: int) -> None:
+            if level == depth:
+                leaf[t, position - splits] = tree.value[node, 0, 0] * learning_rate
+                return
+            left, right = tree.children_left[node], tree.children_right[node]
+            if left < 0:
+                left = right = node
+            else:
+                feature[t, position] = tree.feature[node]
+                split_at[t, position] = tree.threshold[node]
+            fill(t, tree, left, 2 * position + 1, level + 1)
+            fill(t, tree, right, 2 * position + 2, level + 1)
+
+        for t, tree in enumerate(trees):
+            fill(t, tree, 0, 0, 0)
+
+        rounded = split_at.astype(np.float32)
+        rounded = np.where(rounded > split_at, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+        arrays = {
+            "feature": feature,
+            "threshold": rounded,
+            "leaf": leaf,
+            "bias": np.array([init_raw]),
+        }
+        return cls("gbt", features, arrays, threshold, metadata)
+
+    def decision_function(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Log-odds of fraud for every row.
+
+        Args:
+            matrix: ``(N x 30)`` feature matrix (see :class:`TransactionFrame`)
+
+        Returns:
+            np.ndarray: ``(N,)`` log-odds
+        """
+        a = self.arrays
+        if self.kind == "logistic":
+            return matrix[:, self.columns].astype(np.float64) @ a["weights"] + a["bias"][0]
+
+        # One feature row per model input; comparisons of one tree level at a time
+        x = np.ascontiguousarray(matrix[:, self.columns].T, dtype=np.float32)
+        n_trees, leaves = a["leaf"].shape
+        bits: List[np.ndarray] = []
+        for level in range(leaves.bit_length() - 1):
+            first, width = 2**level - 1, 2**level
+            nodes = slice(first, first + width)
+            right = (
+                x[a["feature"][:, nodes].ravel()].reshape(n_trees, width, -1)
+                > a["threshold"][:, nodes, None]
+            )
+            # Narrow the level's nodes down to the one on each row's path
+            for bit in bits:
+                half = right.shape[1] // 2
+                taken = bit[:, None, :]
+                right = (right[:, half:] & taken) | (right[:, :half] & ~taken)
+            bits.append(right[:, 0])
+
+        leaf = np.zeros(bits[0].shape if bits else (n_trees, x.shape[1]), dtype=np.uint8)
+        for bit in bits:
+            leaf <<= 1
+            leaf |= bit.view(np.uint8)
+        index = leaf + (np.arange(n_trees, dtype=np.int32) * leaves)[:, None]
+        return a["leaf"].ravel()[index].sum(axis=0) + a["bias"][0]
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Fraud probability of every row.
+
+        Args:
+            matrix: ``(N x 30)`` feature matrix
+
+        Returns:
+            np.ndarray: ``(N,)`` probabilities
+        """
+        if len(matrix) == 0:
+            return np.zeros(0)
+        return 1.0 / (1.0 + np.exp(-self.decision_function(matrix)))
+
+    def describe(self) -> str:
+        """One-line model description for logs and citations."""
+        trained = self.metadata.get("train_rows")
+        holdout = self.metadata.get("holdout", {})
+        text = f"{self.kind} model"
+        if trained:
+            text += f" trained on {trained} labeled transactions"
+        if "average_precision" in holdout:
+            text += (
+                f" (holdout average precision {holdout['average_precision']:.3f}, "
+                f"recall {holdout['recall']:.1%} at threshold {self.threshold:.3g})"
+            )
+        return text
+
+    def save(self, path: str) -> None:
+        """Write the model as a ``.npz`` of arrays (no pickled objects)."""
+        meta = {
+            "kind": self.kind,
+            "features": self.features,
+            "threshold": self.threshold,
+            "metadata": self.metadata,
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **self.arrays)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["MLScorer"]:
+        """Read a model written by :meth:`save` (None if the file does not exist)."""
+        if not Path(path).exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+        return cls(meta["kind"], meta["features"], arrays, meta["threshold"], meta["metadata"])
+
+
+@lru_cache
+def get_ml_scorer() -> Optional[MLScorer]:
+    """Get the trained scorer (None if not trained), with the configured threshold."""
+    scorer = MLScorer.load(settings.ml_scorer_path)
+    if scorer is None:
+        logger.warning(
+            f"No trained ML scorer at {settings.ml_scorer_path} "
+            "(train one with scripts/train_ml_scorer.py)"
+        )
+        return None
+    if settings.ml_scorer_threshold is not None:
+        scorer.threshold = settings.ml_scorer_threshold
+    logger.info(f"ML scorer: {scorer.describe()}")
+    return scorer
@@ -1,16 +1,20 @@
 """Naive LLM agent for fraud detection."""
 
 import time
-from typing import List
 
 from loguru import logger
 from pydantic_ai import Agent
-from pydantic_ai.models.openai import OpenAIModel
 
 from app.core.config import settings
-from app.models.schemas import ApproachType, FraudAnalysisResult, Transaction
+from app.models.frame import TransactionFrame, TransactionInput, as_frame
+from app.models.schemas import ApproachType, FraudAnalysisResult
 
 from .base_agent import BaseFraudAgent
+from .clients import client_registry
+from .encoding import create_encoder
+from .executor import get_cpu_executor
+from .prompt_layout import PromptLayout
+from .usage import stage
 
 
 class NaiveFraudAgent(BaseFraudAgent):
@@ -26,20 +30,21 @@ class NaiveFraudAgent(BaseFraudAgent):
 
     def __init__(self):
         """Initialize naive agent."""
-        import os
-        os.environ["OPENAI_API_KEY"] = settings.openai_api_key
-
         super().__init__(ApproachType.NAIVE)
-        self.model = OpenAIModel(settings.main_model.replace("openai:", ""))
+        self.model = client_registry.model(settings.main_model)
+        self.encoder = create_encoder(precision=3)
+        self.layout = self._get_prompt_layout()
+        self.system_prompt = self.layout.system_prompt
         self.agent = Agent(
             model=self.model,
             output_type=FraudAnalysisResult,
-            system_prompt=self._get_system_prompt(),
+            system_prompt=self.system_prompt,
         )
+        self._log_prompt_prefix(self.layout)
 
-    def _get_system_prompt(self) -> str:
-        """Get system prompt for fraud detection."""
-        return """You are an expert fraud detection analyst specializing in credit card transactions.
+    def _get_prompt_layout(self) -> PromptLayout:
+        """Get the static prompt prefix: instructions, output fields, row layout."""
+        instructions = """You are an expert fraud detection analyst specializing in credit card transactions.
 
 Your task is to analyze transactions and identify potential fraud based on patterns and anomalies.
 
@@ -54,69 +59,66 @@ Common fraud indicators:
 - Anomalous feature patterns compared to typical behavior
 - Statistical outliers in V1-V28 features
 
-You must respond with:
-- is_fraud: Boolean indicating fraud detection
+Provide a comprehensive fraud analysis with your assessment, confidence level, risk score,
+reasoning, suspicious patterns, and indices of flagged transactions.
+Be thorough but concise in your analysis."""
+
+        output = """- is_fraud: Boolean indicating fraud detection
 - confidence: Confidence score (0-1)
 - risk_score: Risk score (0-100)
 - reasoning: Clear explanation of your decision
 - suspicious_patterns: List of detected patterns
-- flagged_transactions: Indices of suspicious transactions (0-indexed)
+- flagged_transactions: Indices of suspicious transactions (0-indexed row numbers)"""
 
-Be thorough but concise in your analysis."""
+        return PromptLayout(
+            instructions,
+            (("RESPONSE FIELDS", output), ("TRANSACTION FORMAT", self.encoder.legend())),
+        )
 
-    async def analyze(self, transactions: List[Transaction]) -> FraudAnalysisResult:
+    async def analyze(self, transactions: TransactionInput) -> FraudAnalysisResult:
         """
         Analyze transactions using naive LLM approach.
 
         Args:
-            transactions: List of transactions to analyze
+            transactions: List of transactions or a TransactionFrame to analyze
 
         Returns:
             FraudAnalysisResult: Analysis result with metrics
         """
         start_time = time.time()
 
-        # Limit transactions to avoid context overflow
+        # Limit transactions to avoid context overflow (zero-copy slice)
         max_txns = min(len(transactions), settings.max_transactions_naive)
-        transactions = transactions[:max_txns]
+        transactions = as_frame(transactions)[:max_txns]
 
         logger.info(f"Naive agent analyzing {len(transactions)} transactions")
 
         # Format transactions for prompt
-        context = self._format_detailed_transactions(transactions)
+        with stage("format"):
+            context = await self._format_detailed_transactions(transactions)
         context_size = len(context)
 
-        # Create user prompt
-        user_prompt = f"""Analyze the following {len(transactions)} credit card transactions for potential fraud.
-
-{context}
-
-Provide a comprehensive fraud analysis with your assessment, confidence level, risk score, reasoning, suspicious patterns, and indices of flagged transactions."""
+        # Volatile data after the cacheable system prompt
+        user_prompt = self.layout.user_prompt(
+            [context],
+            f"Analyze the {len(transactions)} credit card transactions above for potential fraud.",
+        )
 
         try:
-            # Run agent
-            result = await self.agent.run(user_prompt)
+            # Run agent (sub_model first when the model cascade is enabled)
+            risk = await self.cascade_risk(transactions)
+            response = await self.run_llm_cascade(user_prompt, risk)
 
             # Calculate latency
             latency_ms = (time.time() - start_time) * 1000
 
-            # Extract token usage (if available)
-            try:
-                usage = result.usage()
-                prompt_tokens = usage.request_tokens if usage else 0
-                completion_tokens = usage.response_tokens if usage else 0
-            except Exception as e:
-                logger.warning(f"Could not extract token usage: {e}. Using defaults.")
-                prompt_tokens = 4500
-                completion_tokens = 500
-
             logger.info(
-                f"Naive analysis complete: Fraud={result.output.is_fraud}, "
-                f"Tokens={prompt_tokens + completion_tokens}, "
+                f"Naive analysis complete: Fraud={response.output.is_fraud}, "
+                f"Tokens={response.usage.total_tokens}, "
                 f"Latency={latency_ms:.0f}ms"
             )
 
-            return result.output
+            return response.output
 
         except Exception as e:
             logger.error(f"Naive agent error: {e}")
@@ -131,23 +133,18 @@ Provide a comprehensive fraud analysis with your assessment, confidence level, r
                 flagged_transactions=[],
             )
 
-    def _format_detailed_transactions(self, transactions: List[Transaction]) -> str:
+    async def _format_detailed_transactions(self, transactions: TransactionFrame) -> str:
         """
         Format transactions with full detail for LLM context.
 
+        Large batches are formatted off the event loop (see :mod:`.executor`).
+
         Args:
-            transactions: List of transactions
+            transactions: Transaction frame
 
         Returns:
             str: Formatted detailed transaction context
         """
-        lines = []
-        for idx, txn in enumerate(transactions):
-            features = ", ".join([f"V{i}={getattr(txn, f'v{i}'):.3f}" for i in range(1, 29)])
-            lines.append(
-                f"Transaction {idx}:\n"
-                f"  Time: {txn.time:.0f}s\n"
-                f"  Amount: ${txn.amount:.2f}\n"
-                f"  Features: {features}\n"
-            )
-        return "\n".join(lines)
+        return await get_cpu_executor().run_python(
+            len(transactions), self.encoder.encode, transactions, legend=False
+        )
@@ -0,0 +1,88 @@
+"""Per-model token pricing for cost accounting.
+
+Prices are USD per 1M tokens (OpenAI list prices). Cached input is the
+discounted rate for prompt tokens served from the provider's prompt cache;
+those tokens are part of ``prompt_tokens``, not in addition to them.
+Entries can be added or overridden with the ``MODEL_PRICING`` setting.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class ModelPricing:
+    """USD per 1M tokens."""
+
+    input: float
+    cached_input: float
+    output: float
+
+    def cost(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        """
+        Cost of a call.
+
+        Args:
+            prompt_tokens: Prompt tokens, including cached ones
+            completion_tokens: Completion tokens
+            cached_tokens: Prompt tokens billed at the cached rate
+
+        Returns:
+            float: Cost in USD
+        """
+        cached_tokens = min(cached_tokens, prompt_tokens)
+        return (
+            (prompt_tokens - cached_tokens) * self.input
+            + cached_tokens * self.cached_input
+            + completion_tokens * self.output
+        ) / 1_000_000
+
+
+MODEL_PRICING: Dict[str, ModelPricing] = {
+    "gpt-4o": ModelPricing(input=2.50, cached_input=1.25, output=10.00),
+    "gpt-4o-mini": ModelPricing(input=0.15, cached_input=0.075, output=0.60),
+    "gpt-4.1": ModelPricing(input=2.00, cached_input=0.50, output=8.00),
+    "gpt-4.1-mini": ModelPricing(input=0.40, cached_input=0.10, output=1.60),
+    "gpt-4.1-nano": ModelPricing(input=0.10, cached_input=0.025, output=0.40),
+    "o4-mini": ModelPricing(input=1.10, cached_input=0.275, output=4.40),
+    "text-embedding-3-small": ModelPricing(input=0.02, cached_input=0.02, output=0.0),
+    "text-embedding-3-large": ModelPricing(input=0.13, cached_input=0.13, output=0.0),
+}
+
+# Used (with a warning) for models missing from the table
+FALLBACK_MODEL = "gpt-4o"
+
+
+@lru_cache
+def get_model_pricing(model: str) -> ModelPricing:
+    """
+    Look up the pricing of a model.
+
+    Dated snapshots (``gpt-4o-2024-08-06``) use the longest matching base
+    name. Unknown models are priced as :data:`FALLBACK_MODEL`.
+
+    Args:
+        model: Model name (provider prefix such as ``openai:`` is ignored)
+
+    Returns:
+        ModelPricing: Token prices
+    """
+    model = model.split(":", 1)[-1]
+    table = {
+        **MODEL_PRICING,
+        **{name: ModelPricing(*prices) for name, prices in settings.model_pricing.items()},
+    }
+    if model in table:
+        return table[model]
+
+    matches = [name for name in table if model.startswith(f"{name}-")]
+    if matches:
+        return table[max(matches, key=len)]
+
+    logger.warning(f"No pricing for model '{model}'; using {FALLBACK_MODEL} rates")
+    return table[FALLBACK_MODEL]
@@ -0,0 +1,79 @@
+"""Prompt assembly ordered for provider-side prefix caching.
+
+Providers cache the longest previously seen prompt prefix (OpenAI: prompts of
+1024+ tokens, in 128-token steps) and bill it at a discounted rate. Anything
+volatile early in the prompt invalidates everything after it, so prompts are
+assembled as:
+
+1. static instructions (role, task, indicators)
+2. static reference context (output schema, row layout, pattern library)
+3. volatile data (the transactions of this request), then the per-request task
+
+1 and 2 form the system prompt, identical for every call of an agent; 3 is
+the user prompt.
+"""
+
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+from .tokenizer import TokenCounter
+
+# Shortest prompt the provider caches
+MIN_CACHEABLE_TOKENS = 1024
+
+
+@dataclass(frozen=True)
+class PromptLayout:
+    """Static prompt prefix of an agent: instructions followed by reference context."""
+
+    instructions: str
+    context: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def system_prompt(self) -> str:
+        """Instructions, then each titled context section."""
+        sections = [self.instructions.strip()]
+        sections += [f"=== {title} ===\n{body.strip()}" for title, body in self.context]
+        return "\n\n".join(sections)
+
+    def with_context(self, title: str, body: str) -> "PromptLayout":
+        """
+        Extend the static prefix with another context section.
+
+        Args:
+            title: Section title
+            body: Section text (must not vary between calls)
+
+        Returns:
+            PromptLayout: New layout with the section appended
+        """
+        return PromptLayout(self.instructions, (*self.context, (title, body)))
+
+    @staticmethod
+    def user_prompt(data: Sequence[str], task: str) -> str:
+        """
+        Volatile part of the prompt: the request's data, then its task line.
+
+        Counts and other per-request wording go in ``task``, after the data,
+        so they never split the shared prefix.
+
+        Args:
+            data: Data blocks of this request
+            task: Request-specific instruction
+
+        Returns:
+            str: User prompt
+        """
+        return "\n\n".join([*data, task])
+
+    def prefix_tokens(self, counter: TokenCounter) -> int:
+        """
+        Tokens in the static prefix.
+
+        Args:
+            counter: Tokenizer of the agent's model
+
+        Returns:
+            int: Token count of the system prompt
+        """
+        return counter.count(self.system_prompt)
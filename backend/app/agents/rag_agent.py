@@ -5,14 +5,18 @@ from typing import Any, Dict, List
 
 import numpy as np
 from loguru import logger
-from openai import AsyncOpenAI
 from pydantic_ai import Agent, RunContext
-from pydantic_ai.models.openai import OpenAIModel
 
 from app.core.config import settings
-from app.models.schemas import ApproachType, FraudAnalysisResult, Transaction
+from app.models.frame import TransactionFrame, TransactionInput, as_frame
+from app.models.schemas import ApproachType, FraudAnalysisResult
 
 from .base_agent import BaseFraudAgent
+from .clients import client_registry
+from .encoding import create_encoder
+from .executor import get_cpu_executor
+from .prompt_layout import PromptLayout
+from .usage import stage
 
 
 class RAGFraudAgent(BaseFraudAgent):
@@ -38,47 +42,58 @@ class RAGFraudAgent(BaseFraudAgent):
 
     def __init__(self):
         """Initialize RAG agent."""
-        import os
-        os.environ["OPENAI_API_KEY"] = settings.openai_api_key
-
         super().__init__(ApproachType.RAG)
-        self.model = OpenAIModel(settings.main_model.replace("openai:", ""))
-        self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.model = client_registry.model(settings.main_model)
+        self.openai_client = client_registry.openai_client
 
-        # Create agent with retrieval tool
+        # In-memory fraud pattern knowledge base (simplified)
+        # In production, this would use pgvector for real vector search
+        self.fraud_patterns = self._initialize_fraud_patterns()
+        self.encoder = create_encoder(features=(1, 2, 3), precision=2)
+
+        # Create agent; the pattern library is part of the static (cacheable) prefix
+        self.layout = self._get_prompt_layout()
+        self.system_prompt = self.layout.system_prompt
         self.agent = Agent(
             model=self.model,
             output_type=FraudAnalysisResult,
-            system_prompt=self._get_system_prompt(),
+            system_prompt=self.system_prompt,
         )
+        self._log_prompt_prefix(self.layout)
 
-        # In-memory fraud pattern knowledge base (simplified)
-        # In production, this would use pgvector for real vector search
-        self.fraud_patterns = self._initialize_fraud_patterns()
-
-    def _get_system_prompt(self) -> str:
-        """Get system prompt for RAG-based fraud detection."""
-        return """You are an expert fraud detection analyst with access to historical fraud patterns.
+    def _get_prompt_layout(self) -> PromptLayout:
+        """Get the static prompt prefix: instructions, output fields, row layout, patterns."""
+        instructions = """You are an expert fraud detection analyst with access to historical fraud patterns.
 
 You will be provided with:
-1. Current transactions to analyze
-2. Similar historical fraud patterns (retrieved via semantic search)
+1. A library of known fraud patterns (below)
+2. Current transactions to analyze, with the patterns most similar to them
+   (retrieved via semantic search)
 
 Your task is to:
 - Analyze current transactions in context of known fraud patterns
 - Identify similarities to historical fraud cases
 - Assess fraud risk based on pattern matching
 
-Respond with:
-- is_fraud: Boolean indicating fraud detection
+Leverage the retrieved patterns to make informed decisions and provide a comprehensive
+assessment."""
+
+        output = """- is_fraud: Boolean indicating fraud detection
 - confidence: Confidence score (0-1)
 - risk_score: Risk score (0-100)
 - reasoning: Explanation referencing similar patterns
 - suspicious_patterns: Detected patterns
 - citations: References to similar historical cases
-- flagged_transactions: Indices of suspicious transactions
-
-Leverage the retrieved context to make informed decisions."""
+- flagged_transactions: Indices of suspicious transactions"""
+
+        return PromptLayout(
+            instructions,
+            (
+                ("RESPONSE FIELDS", output),
+                ("TRANSACTION FORMAT", self.encoder.legend()),
+                ("FRAUD PATTERN LIBRARY", self._format_patterns(self.fraud_patterns)),
+            ),
+        )
 
     def _initialize_fraud_patterns(self) -> List[Dict[str, Any]]:
         """
@@ -127,7 +142,7 @@ Leverage the retrieved context to make informed decisions."""
             },
         ]
 
-    async def analyze(self, transactions: List[Transaction]) -> FraudAnalysisResult:
+    async def analyze(self, transactions: TransactionInput) -> FraudAnalysisResult:
         """
         Analyze transactions using RAG approach.
 
@@ -138,59 +153,52 @@ Leverage the retrieved context to make informed decisions."""
         4. Get fraud assessment
 
         Args:
-            transactions: List of transactions to analyze
+            transactions: List of transactions or a TransactionFrame to analyze
 
         Returns:
             FraudAnalysisResult: Analysis result
         """
         start_time = time.time()
 
-        # Limit transactions
+        # Limit transactions (zero-copy slice)
         max_txns = min(len(transactions), settings.max_transactions_rag)
-        transactions = transactions[:max_txns]
+        transactions = as_frame(transactions)[:max_txns]
 
         logger.info(f"RAG agent analyzing {len(transactions)} transactions")
 
-        # Step 1: Create transaction summary for retrieval
-        txn_summary = self._create_transaction_summary(transactions)
+        with stage("retrieve"):
+            # Step 1: Create transaction summary for retrieval
+            txn_summary = self._create_transaction_summary(transactions)
 
-        # Step 2: Retrieve relevant fraud patterns (simplified semantic search)
-        retrieved_patterns = await self._retrieve_relevant_patterns(txn_summary)
+            # Step 2: Retrieve relevant fraud patterns (simplified semantic search)
+            retrieved_patterns = await self._retrieve_relevant_patterns(txn_summary)
 
         # Step 3: Build context with transactions + retrieved patterns
-        context = self._build_rag_context(transactions, retrieved_patterns)
+        with stage("format"):
+            context = await self._build_rag_context(transactions, retrieved_patterns)
         context_size = len(context)
 
-        # Step 4: Run LLM analysis
-        user_prompt = f"""{context}
-
-Analyze the {len(transactions)} current transactions above for fraud, considering the similar historical patterns provided.
-
-Provide a comprehensive assessment."""
+        # Step 4: Run LLM analysis (volatile data after the cacheable system prompt)
+        user_prompt = self.layout.user_prompt(
+            [context],
+            f"Analyze the {len(transactions)} current transactions above for fraud, "
+            "considering the similar historical patterns retrieved for them.",
+        )
 
         try:
-            result = await self.agent.run(user_prompt)
+            risk = await self.cascade_risk(transactions)
+            response = await self.run_llm_cascade(user_prompt, risk)
 
             latency_ms = (time.time() - start_time) * 1000
 
-            # Extract usage
-            try:
-                usage = result.usage()
-                prompt_tokens = usage.request_tokens if usage else 0
-                completion_tokens = usage.response_tokens if usage else 0
-            except Exception as e:
-                logger.warning(f"Could not extract token usage: {e}. Using defaults.")
-                prompt_tokens = 3000
-                completion_tokens = 500
-
             logger.info(
-                f"RAG analysis complete: Fraud={result.output.is_fraud}, "
-                f"Tokens={prompt_tokens + completion_tokens}, "
+                f"RAG analysis complete: Fraud={response.output.is_fraud}, "
+                f"Tokens={response.usage.total_tokens}, "
                 f"Patterns retrieved={len(retrieved_patterns)}, "
                 f"Latency={latency_ms:.0f}ms"
             )
 
-            return result.output
+            return response.output
 
         except Exception as e:
             logger.error(f"RAG agent error: {e}")
@@ -204,7 +212,7 @@ Provide a comprehensive assessment."""
                 flagged_transactions=[],
             )
 
-    def _create_transaction_summary(self, transactions: List[Transaction]) -> str:
+    def _create_transaction_summary(self, transactions: TransactionFrame) -> str:
         """
         Create a text summary of transactions for embedding.
 
@@ -214,15 +222,15 @@ Provide a comprehensive assessment."""
         Returns:
             str: Summary text
         """
-        amounts = [txn.amount for txn in transactions]
-        times = [txn.time for txn in transactions]
+        amounts = transactions.amount
+        times = transactions.time
 
         summary = f"""Transaction batch summary:
 - Count: {len(transactions)}
-- Amount range: ${min(amounts):.2f} - ${max(amounts):.2f}
+- Amount range: ${amounts.min():.2f} - ${amounts.max():.2f}
 - Average amount: ${np.mean(amounts):.2f}
-- Time span: {min(times):.0f}s - {max(times):.0f}s
-- Time range: {max(times) - min(times):.0f}s
+- Time span: {times.min():.0f}s - {times.max():.0f}s
+- Time range: {times.max() - times.min():.0f}s
 """
         return summary
 
@@ -250,12 +258,16 @@ Provide a comprehensive assessment."""
 
         return self.fraud_patterns[:top_k]
 
-    def _build_rag_context(
-        self, transactions: List[Transaction], patterns: List[Dict[str, Any]]
+    async def _build_rag_context(
+        self, transactions: TransactionFrame, patterns: List[Dict[str, Any]]
     ) -> str:
         """
         Build context combining transactions and retrieved patterns.
 
+        Patterns are referenced by name; their details are in the pattern
+        library of the system prompt. Large batches are encoded off the event
+        loop (see :mod:`.executor`).
+
         Args:
             transactions: Current transactions
             patterns: Retrieved fraud patterns
@@ -263,20 +275,25 @@ Provide a comprehensive assessment."""
         Returns:
             str: Combined context
         """
-        lines = ["=== CURRENT TRANSACTIONS ==="]
-        for idx, txn in enumerate(transactions):
-            lines.append(
-                f"Transaction {idx}: Time={txn.time:.0f}s, Amount=${txn.amount:.2f}, "
-                f"V1={txn.v1:.2f}, V2={txn.v2:.2f}, V3={txn.v3:.2f}"
-            )
-
-        lines.append("\n=== SIMILAR FRAUD PATTERNS (Retrieved from Knowledge Base) ===")
-        for pattern in patterns:
-            lines.append(
-                f"\nPattern: {pattern['name']}\n"
-                f"Description: {pattern['description']}\n"
-                f"Indicators: {', '.join(pattern['indicators'])}\n"
-                f"Severity: {pattern['severity']}"
-            )
-
+        encoded = await get_cpu_executor().run_python(
+            len(transactions), self.encoder.encode, transactions, legend=False
+        )
+        lines = [
+            "=== CURRENT TRANSACTIONS ===",
+            encoded,
+            "",
+            "=== SIMILAR FRAUD PATTERNS (Retrieved from Knowledge Base) ===",
+            *(f"- {pattern['name']}" for pattern in patterns),
+        ]
         return "\n".join(lines)
+
+    @staticmethod
+    def _format_patterns(patterns: List[Dict[str, Any]]) -> str:
+        """Render the pattern library for the system prompt."""
+        return "\n\n".join(
+            f"Pattern: {pattern['name']}\n"
+            f"Description: {pattern['description']}\n"
+            f"Indicators: {', '.join(pattern['indicators'])}\n"
+            f"Severity: {pattern['severity']}"
+            for pattern in patterns
+        )
@@ -0,0 +1,222 @@
+"""Global rate limiting and concurrency control for LLM calls.
+
+Every agent's LLM call goes through one shared :class:`LLMGovernor`:
+
+- token buckets for requests per minute and tokens per minute
+- a semaphore per model capping in-flight calls (``main_model`` vs ``sub_model``)
+
+Time spent waiting is accumulated into the :class:`CallStats` of the current
+analysis (see :func:`track_llm_calls`), so it can be reported in metrics.
+"""
+
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+@dataclass
+class CallStats:
+    """LLM call counters for one analysis."""
+
+    llm_calls: int = 0
+    queue_wait_ms: float = 0.0
+
+
+_call_stats: ContextVar[Optional[CallStats]] = ContextVar("llm_call_stats", default=None)
+
+
+@contextmanager
+def track_llm_calls() -> Iterator[CallStats]:
+    """
+    Collect LLM call stats for the code run inside the block.
+
+    Tasks started inside the block (e.g. a single-flight analysis) inherit
+    the same stats object.
+
+    Yields:
+        CallStats: Counters filled in by :class:`LLMGovernor`
+    """
+    stats = CallStats()
+    token = _call_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _call_stats.reset(token)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Refill rate; also the burst capacity
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add tokens for the time elapsed since the last update."""
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float, lock: asyncio.Lock) -> None:
+        """
+        Take ``amount`` tokens, waiting for the bucket to refill if needed.
+
+        Args:
+            amount: Tokens to take (capped at the bucket capacity)
+            lock: Per-event-loop lock serializing waiters (FIFO)
+        """
+        amount = min(amount, self.capacity)
+        async with lock:
+            self._refill()
+            if self.level < amount:
+                await asyncio.sleep((amount - self.level) / self.rate)
+                self._refill()
+            self.level -= amount
+
+    def adjust(self, delta: float) -> None:
+        """Take (or return) tokens after the fact; the level may go negative."""
+        self._refill()
+        self.level = min(self.capacity, self.level - delta)
+
+
+@dataclass
+class _LoopPrimitives:
+    """asyncio primitives, which are bound to the event loop that uses them."""
+
+    request_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    token_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    semaphores: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+class LLMGovernor:
+    """Shared rate limiter and per-model concurrency cap."""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: Optional[int],
+        concurrency: Dict[str, int],
+        default_concurrency: int = 4,
+    ):
+        """
+        Initialize the governor.
+
+        Args:
+            requests_per_minute: Request budget across all agents
+            tokens_per_minute: Token budget across all agents (None = unlimited)
+            concurrency: Max in-flight calls per model name
+            default_concurrency: Limit for models not listed in ``concurrency``
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = concurrency
+        self.default_concurrency = default_concurrency
+
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopPrimitives]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.calls = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _primitives(self) -> _LoopPrimitives:
+        """Locks and semaphores for the running event loop."""
+        loop = asyncio.get_running_loop()
+        primitives = self._loops.get(loop)
+        if primitives is None:
+            primitives = self._loops[loop] = _LoopPrimitives()
+        return primitives
+
+    def _semaphore(self, primitives: _LoopPrimitives, model: str) -> asyncio.Semaphore:
+        """Concurrency semaphore of a model."""
+        semaphore = primitives.semaphores.get(model)
+        if semaphore is None:
+            limit = self.concurrency.get(model, self.default_concurrency)
+            semaphore = primitives.semaphores[model] = asyncio.Semaphore(limit)
+        return semaphore
+
+    @asynccontextmanager
+    async def slot(self, model: str, estimated_tokens: int) -> AsyncIterator[None]:
+        """
+        Wait for a concurrency slot and rate-limit budget, then hold the slot.
+
+        Args:
+            model: Model name the call goes to
+            estimated_tokens: Expected prompt + completion tokens
+
+        Yields:
+            None, while the call may run
+        """
+        start = time.perf_counter()
+        primitives = self._primitives()
+
+        async with self._semaphore(primitives, model):
+            await self.requests.acquire(1, primitives.request_lock)
+            if self.tokens is not None:
+                await self.tokens.acquire(estimated_tokens, primitives.token_lock)
+
+            wait_ms = (time.perf_counter() - start) * 1000
+            self._record(wait_ms)
+            if wait_ms > 100:
+                logger.info(f"LLM call to {model} waited {wait_ms:.0f}ms for rate limit/slot")
+            yield
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct the token bucket once the real usage is known.
+
+        Args:
+            estimated_tokens: Tokens reserved in :meth:`slot`
+            actual_tokens: Tokens the call actually used
+        """
+        if self.tokens is not None and actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def _record(self, wait_ms: float) -> None:
+        """Update global and per-analysis wait counters."""
+        self.calls += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+        stats = _call_stats.get()
+        if stats is not None:
+            stats.llm_calls += 1
+            stats.queue_wait_ms += wait_ms
+
+
+def _model_name(model: str) -> str:
+    """Strip the provider prefix from a configured model name."""
+    return model.split(":", 1)[-1]
+
+
+@lru_cache
+def get_llm_governor() -> LLMGovernor:
+    """Get the governor shared by all agents."""
+    concurrency = {_model_name(settings.main_model): settings.main_model_max_concurrency}
+    sub_model = _model_name(settings.sub_model)
+    concurrency[sub_model] = min(
+        settings.sub_model_max_concurrency,
+        concurrency.get(sub_model, settings.sub_model_max_concurrency),
+    )
+    return LLMGovernor(
+        requests_per_minute=settings.rate_limit_per_minute,
+        tokens_per_minute=settings.rate_limit_tokens_per_minute,
+        concurrency=concurrency,
+    )
@@ -0,0 +1,253 @@
+"""Two-tier cache for parsed LLM responses.
+
+Entries are keyed by model name plus hashes of the system and user prompts,
+and hold the parsed ``FraudAnalysisResult`` with its token usage. Lookups hit
+an in-memory LRU first, then an optional SQLite file, so repeated analyses
+(dashboard refreshes, replay jobs) cost no tokens.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.models.schemas import LLMResponse
+
+# Trim the SQLite tier after this fraction of its capacity has been written
+TRIM_FRACTION = 0.1
+
+
+def _sha256(text: str) -> str:
+    """Hex SHA-256 of a string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU backed by an optional SQLite tier, with TTL and size limits."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 1024,
+        max_disk_entries: int = 10_000,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file for the persistent tier; None keeps memory only
+            max_entries: Maximum entries in the memory tier
+            max_disk_entries: Maximum entries in the SQLite tier
+            ttl_seconds: Entry lifetime; None never expires
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, Tuple[float, LLMResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._trim_every = max(1, int(max_disk_entries * TRIM_FRACTION))
+        self._writes_since_trim = 0
+        self._db = self._connect(path) if path else None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str) -> str:
+        """
+        Build the cache key for an LLM call.
+
+        Args:
+            model: Model name
+            system_prompt: System prompt
+            user_prompt: User prompt
+
+        Returns:
+            str: Cache key
+        """
+        return f"{model}:{_sha256(system_prompt)[:16]}:{_sha256(user_prompt)}"
+
+    def _connect(self, path: str) -> Optional[sqlite3.Connection]:
+        """Open (and create) the SQLite tier."""
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+            self._trim(db, time.time())
+            return db
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache at {path} unavailable, using memory only: {e}")
+            return None
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        """Whether an entry created at ``created_at`` has outlived the TTL."""
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from :meth:`make_key`
+
+        Returns:
+            A copy of the cached response (marked ``cached``), or None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry[0], now):
+                    del self._memory[key]
+                else:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1].model_copy(deep=True)
+
+            entry = self._disk_get(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._memory_put(key, entry)
+            return entry[1].model_copy(deep=True)
+
+    def set(self, key: str, response: LLMResponse) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Key from :meth:`make_key`
+            response: Parsed response to cache
+        """
+        entry = (time.time(), response.model_copy(deep=True, update={"cached": True}))
+        with self._lock:
+            self._memory_put(key, entry)
+            self._disk_put(key, entry)
+
+    def clear(self) -> None:
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and tier sizes.
+
+        Returns:
+            dict: Cache statistics
+        """
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_count(),
+        }
+
+    def _memory_put(self, key: str, entry: Tuple[float, LLMResponse]) -> None:
+        """Insert into the LRU, evicting the least recently used entries."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, LLMResponse]]:
+        """Read an unexpired entry from SQLite."""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[1], now):
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[1], LLMResponse.model_validate_json(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"LLM response cache read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, entry: Tuple[float, LLMResponse]) -> None:
+        """
+        Write an entry to SQLite.
+
+        The tier is trimmed every ``TRIM_FRACTION`` of its capacity written
+        rather than on every write, so it may briefly exceed its size limit by
+        that much.
+        """
+        if self._db is None:
+            return
+        created_at, response = entry
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response.model_dump_json(), created_at, created_at),
+            )
+            self._writes_since_trim += 1
+            if self._writes_since_trim >= self._trim_every:
+                self._trim(self._db, created_at)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache write failed: {e}")
+
+    def _trim(self, db: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then the least recently used ones over the size limit."""
+        self._writes_since_trim = 0
+        if self.ttl_seconds is not None:
+            db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        # Access time of the oldest entry that still fits (via the accessed_at index)
+        cutoff = db.execute(
+            "SELECT accessed_at FROM responses ORDER BY accessed_at DESC LIMIT 1 OFFSET ?",
+            (self.max_disk_entries - 1,),
+        ).fetchone()
+        if cutoff is not None:
+            db.execute("DELETE FROM responses WHERE accessed_at < ?", (cutoff[0],))
+
+    def _disk_count(self) -> int:
+        """Number of entries in the SQLite tier."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+@lru_cache
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the response cache shared by all agents (None if disabled)."""
+    if not settings.llm_cache_enabled:
+        return None
+    return ResponseCache(
+        path=settings.llm_cache_path,
+        max_entries=settings.llm_cache_max_entries,
+        max_disk_entries=settings.llm_cache_max_disk_entries,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+    )
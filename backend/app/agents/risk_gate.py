@@ -0,0 +1,224 @@
+"""Confidence gate deciding which RLM batches need the LLM.
+
+The aggregate programmatic risk of a batch (the highest filter risk score of
+its suspects) separates clear-cut batches from ambiguous ones. At or below
+the gate's ``low`` threshold a batch is declared benign, at or above ``high``
+fraudulent, both without an LLM call; only the band in between goes to the
+model.
+
+Thresholds are fitted offline on labeled batches (``scripts/fit_risk_gate.py``)
+so that at most ``1 - target_recall`` of the fraudulent batches are cleared by
+the gate, and the batches declared fraudulent reach ``target_precision``.
+
+The aggregate risk is a maximum over suspects, so it grows with the batch
+size, and its scale depends on the candidate ranker. A gate therefore only
+decides batches within ``RLM_GATE_SIZE_TOLERANCE`` of its fitted batch size,
+and is not used at all with a different ``RLM_CANDIDATE_RANKER``.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class RiskGate:
+    """Fitted thresholds on the aggregate risk of a batch."""
+
+    low: float
+    high: Optional[float]
+    benign_confidence: float
+    fraud_confidence: float
+    target_recall: float
+    target_precision: float
+    batch_size: int
+    ranker: str = "rules"
+
+    @staticmethod
+    def aggregate_risk(suspicious: List[Dict[str, Any]]) -> float:
+        """
+        Aggregate programmatic risk of a batch.
+
+        Args:
+            suspicious: Filter output (dicts with ``risk_score``)
+
+        Returns:
+            float: Highest suspect risk score (0 without suspects)
+        """
+        return float(max((item["risk_score"] for item in suspicious), default=0))
+
+    def covers(self, rows: int, tolerance: float) -> bool:
+        """
+        Whether a batch is close enough in size to the fitted batches.
+
+        Args:
+            rows: Transactions in the batch
+            tolerance: Allowed factor between ``rows`` and ``batch_size`` (either way)
+
+        Returns:
+            bool: True if the thresholds apply (always, if no batch size was recorded)
+        """
+        if self.batch_size <= 0:
+            return True
+        return self.batch_size / tolerance <= rows <= self.batch_size * tolerance
+
+    def decide(self, risk: float) -> Optional[bool]:
+        """
+        Gate decision for an aggregate risk.
+
+        Callers check :meth:`covers` first: thresholds of one batch size do
+        not transfer to another.
+
+        Args:
+            risk: Aggregate risk of the batch
+
+        Returns:
+            False (benign) or True (fraud) for clear-cut batches, None when the LLM must decide
+        """
+        if risk <= self.low:
+            return False
+        if self.high is not None and risk >= self.high:
+            return True
+        return None
+
+    @classmethod
+    def fit(
+        cls,
+        risks: np.ndarray,
+        labels: np.ndarray,
+        target_recall: float = 0.99,
+        target_precision: float = 0.95,
+        batch_size: int = 0,
+        min_support: int = 20,
+        ranker: str = "rules",
+    ) -> "RiskGate":
+        """
+        Fit thresholds on labeled batches.
+
+        ``low`` is the highest risk value at which the gate still keeps
+        ``target_recall`` of the fraudulent batches (the rest are cleared
+        without an LLM call). ``high`` is the lowest value above which at least
+        ``min_support`` batches are fraudulent with ``target_precision``, or
+        None if no value qualifies.
+
+        Args:
+            risks: Aggregate risk per batch
+            labels: 1 for batches containing fraud, else 0
+            target_recall: Share of fraudulent batches the gate must not clear
+            target_precision: Required share of fraud among batches declared fraudulent
+            batch_size: Transactions per fitted batch (the gate only applies near it)
+            min_support: Minimum batches at or above ``high``
+            ranker: Candidate ranker the risks were computed with (``rules`` or ``ml``)
+
+        Returns:
+            RiskGate: Fitted gate
+        """
+        risks = np.asarray(risks, dtype=np.float64)
+        labels = np.asarray(labels).astype(bool)
+        values = np.unique(risks)
+
+        # Highest low whose cleared batches hold at most (1 - recall) of the fraud
+        low = -1.0
+        fraud = risks[labels]
+        if len(fraud):
+            allowed = (1 - target_recall) * len(fraud)
+            cleared = np.searchsorted(np.sort(fraud), values, side="right")
+            ok = values[cleared <= allowed]
+            if len(ok):
+                low = float(ok.max())
+
+        # Lowest high reaching the precision target with enough support
+        high = None
+        for value in values[values > low]:
+            above = labels[risks >= value]
+            if len(above) >= min_support and above.mean() >= target_precision:
+                high = float(value)
+                break
+
+        benign = labels[risks <= low]
+        flagged = labels[risks >= high] if high is not None else labels[:0]
+        return cls(
+            low=low,
+            high=high,
+            benign_confidence=round(float(1 - benign.mean()) if len(benign) else 1.0, 4),
+            fraud_confidence=round(float(flagged.mean()) if len(flagged) else 0.0, 4),
+            target_recall=target_recall,
+            target_precision=target_precision,
+            batch_size=batch_size,
+            ranker=ranker,
+        )
+
+    def evaluate(self, risks: np.ndarray, labels: np.ndarray) -> Dict[str, float]:
+        """
+        Gate outcomes on labeled batches.
+
+        ``recall`` counts a fraudulent batch as caught when the gate does not
+        clear it (it is declared fraudulent or sent to the LLM), so it bounds
+        the recall of the gated pipeline.
+
+        Args:
+            risks: Aggregate risk per batch
+            labels: 1 for batches containing fraud, else 0
+
+        Returns:
+            Dict with the LLM call rate, benign/fraud skip rates, recall and
+            precision of the fraud verdicts
+        """
+        risks = np.asarray(risks, dtype=np.float64)
+        labels = np.asarray(labels).astype(bool)
+        benign = risks <= self.low
+        fraud = ~benign & (risks >= self.high if self.high is not None else False)
+        llm = ~benign & ~fraud
+        return {
+            "batches": int(len(risks)),
+            "llm_call_rate": float(llm.mean()),
+            "benign_rate": float(benign.mean()),
+            "fraud_rate": float(fraud.mean()),
+            "recall": float((~benign)[labels].mean()) if labels.any() else 1.0,
+            "fraud_precision": float(labels[fraud].mean()) if fraud.any() else 1.0,
+        }
+
+    def save(self, path: str) -> None:
+        """Write the gate as JSON."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(asdict(self), indent=2))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RiskGate"]:
+        """Read a gate written by :meth:`save` (None if the file does not exist)."""
+        if not Path(path).exists():
+            return None
+        return cls(**json.loads(Path(path).read_text()))
+
+
+@lru_cache
+def get_risk_gate() -> Optional[RiskGate]:
+    """Get the fitted RLM gate (None if disabled or not fitted)."""
+    if not settings.rlm_gate_enabled:
+        return None
+    gate = RiskGate.load(settings.rlm_gate_path)
+    if gate is None:
+        logger.warning(
+            f"No fitted risk gate at {settings.rlm_gate_path}; every flagged RLM batch goes "
+            "to the LLM (fit one with scripts/fit_risk_gate.py)"
+        )
+        return None
+    if gate.ranker != settings.rlm_candidate_ranker:
+        logger.warning(
+            f"Risk gate at {settings.rlm_gate_path} was fitted with the '{gate.ranker}' ranker, "
+            f"not '{settings.rlm_candidate_ranker}'; not using it (refit with "
+            "scripts/fit_risk_gate.py)"
+        )
+        return None
+    logger.info(
+        f"RLM risk gate: benign <= {gate.low}, fraud >= {gate.high} "
+        f"(batches of {gate.batch_size}, {gate.ranker} ranker)"
+    )
+    return gate
@@ -1,18 +1,43 @@
 """RLM (Recursive Language Model) agent - Simplified implementation."""
 
+import asyncio
 import json
-import statistics
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from loguru import logger
 from pydantic_ai import Agent
-from pydantic_ai.models.openai import OpenAIModel
 
 from app.core.config import settings
-from app.models.schemas import ApproachType, FraudAnalysisResult, Transaction
+from app.models.frame import FEATURE_FIELDS, TransactionFrame, TransactionInput, as_frame
+from app.models.schemas import ApproachType, BatchAnalysisResult, FraudAnalysisResult
 
 from .base_agent import BaseFraudAgent
+from .clients import client_registry
+from .context_packer import ContextPacker, PackedContext
+from .encoding import create_encoder
+from .executor import get_cpu_executor
+from .filter_engine import create_filter
+from .prompt_layout import PromptLayout
+from .risk_gate import RiskGate, get_risk_gate
+from .tokenizer import get_token_counter, output_tool_text
+from .usage import stage
+
+# Trailing columns of the tabular prompt encoding
+TABLE_EXTRA_COLUMNS = ("risk", "flags")
+
+BATCH_INSTRUCTIONS = """The message may contain several numbered SECTIONS. Each section is a separate,
+independent request: analyze it on its own, without using evidence from other sections.
+Return one entry in `results` per section, with `section` set to the section number and
+flagged_transactions referring to the transaction numbers shown in that section."""
+
+REDUCE_INSTRUCTIONS = """A batch with more suspects than fit one prompt is analyzed in SHARDS of
+suspects (shard 0 holds the highest-risk ones). Instead of transactions, the message then lists
+each shard's assessment. Merge them into one assessment of the whole batch: weigh the evidence
+of all shards, and only flag transactions that a shard flagged."""
+
+# Shard number, rank of its first suspect, its assessment, and how its suspects were packed
+ShardFinding = Tuple[int, int, FraudAnalysisResult, PackedContext]
 
 
 class RLMFraudAgent(BaseFraudAgent):
@@ -27,105 +52,202 @@ class RLMFraudAgent(BaseFraudAgent):
 
     def __init__(self):
         """Initialize RLM agent."""
-        import os
-        os.environ["OPENAI_API_KEY"] = settings.openai_api_key
-
         super().__init__(ApproachType.RLM)
-        self.model = OpenAIModel(settings.sub_model.replace("openai:", ""))  # Use cheaper model!
+        self.model = client_registry.model(settings.sub_model)  # Use cheaper model!
+        self.encoder = create_encoder(features=(1, 2, 3), precision=2)
+        self.layout = self._get_prompt_layout()
+        self.system_prompt = self.layout.system_prompt
         self.agent = Agent(
             model=self.model,
             output_type=FraudAnalysisResult,
-            system_prompt=self._get_system_prompt(),
+            system_prompt=self.system_prompt,
+        )
+        self._log_prompt_prefix(self.layout)
+        self.suspicious_filter = create_filter()
+        self.risk_gate = get_risk_gate()
+        if self.encoder.is_tabular:
+            encoders = {self.encoder.name: self._encode_table_row, "minimal": self._encode_minimal}
+        else:
+            encoders = {
+                "detailed": self._encode_detailed,
+                "compact": self._encode_compact,
+                "minimal": self._encode_minimal,
+            }
+        self.context_packer = ContextPacker(
+            counter=get_token_counter(settings.sub_model),
+            encoders=encoders,
+            build_prompt=self._build_prompt,
+            tools=output_tool_text(FraudAnalysisResult),
         )
 
-    def _get_system_prompt(self) -> str:
-        """Get system prompt for RLM analysis."""
-        return """You are an expert fraud analyst performing final semantic analysis on PRE-FILTERED suspicious transactions.
+        # Multi-section prompts for micro-batched requests (same prefix, one more section)
+        self.batch_system_prompt = self.layout.with_context(
+            "MULTIPLE SECTIONS", BATCH_INSTRUCTIONS
+        ).system_prompt
+        self.batch_agent = Agent(
+            model=self.model,
+            output_type=BatchAnalysisResult,
+            system_prompt=self.batch_system_prompt,
+        )
+        self.section_packer = ContextPacker(
+            counter=get_token_counter(settings.sub_model),
+            encoders=encoders,
+            build_prompt=self._build_section,
+        )
+
+        # Reduce step of map-reduce analysis (same prefix, one more section)
+        self.reduce_system_prompt = self.layout.with_context(
+            "SHARDED BATCHES", REDUCE_INSTRUCTIONS
+        ).system_prompt
+        self.reduce_agent = Agent(
+            model=self.model,
+            output_type=FraudAnalysisResult,
+            system_prompt=self.reduce_system_prompt,
+        )
+
+    def _get_prompt_layout(self) -> PromptLayout:
+        """Get the static prompt prefix: instructions, output fields, row layout."""
+        instructions = """You are an expert fraud analyst performing final semantic analysis on PRE-FILTERED suspicious transactions.
 
 The transactions you're analyzing have ALREADY been filtered programmatically as suspicious.
-Your job is to provide the final fraud assessment.
+Your job is to provide the final fraud assessment, with specific citations to the transactions.
 
-Provide:
-- is_fraud: Boolean fraud detection
+Be thorough but concise."""
+
+        output = """- is_fraud: Boolean fraud detection
 - confidence: Confidence score (0-1)
 - risk_score: Risk score (0-100)
 - reasoning: Clear explanation
 - suspicious_patterns: List of patterns found
 - citations: Reference the specific evidence
-- flagged_transactions: Indices of most suspicious
+- flagged_transactions: Indices of most suspicious"""
 
-Be thorough but concise."""
+        listing = (
+            "Suspicious transactions are listed highest risk first, each with its row number, "
+            "amount, programmatic risk score (0-100) and the filter rules it triggered."
+        )
+        if self.encoder.is_tabular:
+            listing += "\n" + self.encoder.legend(TABLE_EXTRA_COLUMNS)
+            listing += (
+                "\nWhen space is short, rows are shortened to "
+                "`#<row> $<amount> risk=<score>: <flags>`."
+            )
 
-    async def analyze(self, transactions: List[Transaction]) -> FraudAnalysisResult:
+        return PromptLayout(
+            instructions, (("RESPONSE FIELDS", output), ("TRANSACTION FORMAT", listing))
+        )
+
+    async def analyze(
+        self, transactions: TransactionInput, token_budget: Optional[int] = None
+    ) -> FraudAnalysisResult:
         """
         Analyze transactions using RLM approach.
 
         RLM Process:
         1. Programmatically filter suspicious transactions (code-based, fast)
-        2. Analyze only the suspicious subset with LLM (semantic)
-        3. Return result with citations
+        2. Pack the highest-risk suspects into the prompt token budget
+        3. Analyze only that subset with LLM (semantic)
+        4. Return result with citations
+
+        With more suspects than one prompt holds (``RLM_MAX_SUSPICIOUS``), steps
+        2-3 run per shard of suspects and the shard results are merged (see
+        :meth:`_analyze_sharded`). Batches the fitted risk gate considers
+        clear-cut skip the LLM (see :class:`RiskGate`).
 
         This is much more token-efficient than sending all transactions to LLM!
+
+        Args:
+            transactions: List of transactions or a TransactionFrame to analyze
+            token_budget: Prompt token budget (defaults to settings.rlm_prompt_token_budget)
         """
         start_time = time.time()
+        transactions = as_frame(transactions)
+        budget = token_budget or settings.rlm_prompt_token_budget
 
         logger.info(f"RLM agent analyzing {len(transactions)} transactions")
 
         # Step 1: Programmatic filtering (RLM's key innovation!)
-        suspicious_txns = self._filter_suspicious_transactions(transactions)
+        with stage("filter"):
+            suspicious_txns = await self._filter_suspicious_transactions(
+                transactions, max_results=self._candidate_limit()
+            )
 
+        filter_stats = self.suspicious_filter.last_stats
         logger.info(
-            f"RLM filtered {len(transactions)} → {len(suspicious_txns)} suspicious transactions"
+            f"RLM filtered {len(transactions)} → {len(suspicious_txns)} suspicious transactions "
+            f"(scored={filter_stats.rows_scored}, flagged={filter_stats.rows_flagged}, "
+            f"kept={filter_stats.rows_kept})"
         )
 
         # Step 2: Semantic analysis on filtered subset only
         if not suspicious_txns:
             # No suspicious transactions found
-            return FraudAnalysisResult(
-                is_fraud=False,
-                confidence=0.95,
-                risk_score=5.0,
-                reasoning="Programmatic analysis found no anomalies. All transactions within normal parameters.",
-                suspicious_patterns=[],
-                citations=["Analyzed all {} transactions programmatically".format(len(transactions))],
-                flagged_transactions=[],
-            )
-
-        # Format only suspicious transactions for LLM
-        context = self._format_suspicious_for_llm(suspicious_txns, len(transactions))
+            return self._no_anomalies_result(len(transactions))
+
+        # Clear-cut batches are decided from the programmatic risk alone
+        gated = self._gated_result(len(transactions), suspicious_txns)
+        if gated is not None:
+            return gated
+
+        return await self._analyze_suspects(transactions, suspicious_txns, budget, start_time)
+
+    async def _analyze_suspects(
+        self,
+        transactions: TransactionFrame,
+        suspicious_txns: List[Dict[str, Any]],
+        budget: int,
+        start_time: float,
+    ) -> FraudAnalysisResult:
+        """
+        LLM analysis of a batch's filtered suspects (steps 2-4 of :meth:`analyze`).
 
-        prompt = f"""Analyze these {len(suspicious_txns)} suspicious transactions (filtered from {len(transactions)} total).
+        Args:
+            transactions: Batch the suspects were filtered from
+            suspicious_txns: Suspects, highest risk first
+            budget: Prompt token budget
+            start_time: When the analysis started (``time.time()``)
 
-{context}
-
-Provide comprehensive fraud assessment with specific citations to the transactions above."""
+        Returns:
+            FraudAnalysisResult: LLM result with the filtering citation
+        """
+        # More suspects than one prompt holds: map-reduce over shards
+        if len(suspicious_txns) > settings.rlm_max_suspicious:
+            return await self._analyze_sharded(transactions, suspicious_txns, budget, start_time)
+
+        # Pack the highest-risk suspects into the token budget
+        with stage("pack"):
+            packed = await get_cpu_executor().run_packing(
+                len(suspicious_txns),
+                self.context_packer.pack,
+                suspicious_txns,
+                self.system_prompt,
+                budget,
+            )
+        logger.info(
+            f"RLM prompt: {'' if packed.exact else '~'}{packed.prompt_tokens} tokens "
+            f"(budget {packed.budget}), {packed.included}/{packed.candidates} suspects, "
+            f"{packed.encoding} encoding"
+        )
 
         try:
-            result = await self.agent.run(prompt)
+            response = await self.run_llm_cascade(
+                packed.prompt, RiskGate.aggregate_risk(suspicious_txns)
+            )
 
             latency_ms = (time.time() - start_time) * 1000
 
-            # Get token usage
-            try:
-                usage = result.usage()
-                tokens_used = (usage.request_tokens + usage.response_tokens) if usage else 800
-            except Exception as e:
-                logger.warning(f"Could not extract token usage: {e}. Using default.")
-                tokens_used = 800
-
             logger.info(
-                f"RLM analysis complete: Fraud={result.output.is_fraud}, "
+                f"RLM analysis complete: Fraud={response.output.is_fraud}, "
                 f"Filtered {len(transactions)}→{len(suspicious_txns)}, "
-                f"Tokens={tokens_used}, Latency={latency_ms:.0f}ms"
+                f"Tokens={response.usage.total_tokens}, Latency={latency_ms:.0f}ms"
             )
 
             # Add citation about filtering
-            result.output.citations.insert(
-                0,
-                f"Programmatically filtered {len(transactions)} transactions → {len(suspicious_txns)} suspicious"
+            response.output.citations.insert(
+                0, self._filtering_citation(len(transactions), len(suspicious_txns), packed)
             )
 
-            return result.output
+            return response.output
 
         except Exception as e:
             logger.error(f"RLM agent error: {e}")
@@ -139,96 +261,550 @@ Provide comprehensive fraud assessment with specific citations to the transactio
                 flagged_transactions=[],
             )
 
-    def _filter_suspicious_transactions(
-        self, transactions: List[Transaction]
+    def _gated_result(
+        self, total_count: int, suspicious_txns: List[Dict[str, Any]]
+    ) -> Optional[FraudAnalysisResult]:
+        """
+        Deterministic result for a batch the risk gate decides on its own.
+
+        Batches far from the gate's fitted size always go to the LLM.
+
+        Args:
+            total_count: Transactions in the batch
+            suspicious_txns: Filtered suspects, highest risk first
+
+        Returns:
+            Result without an LLM call, or None if the batch needs the LLM
+        """
+        if self.risk_gate is None:
+            return None
+        gate = self.risk_gate
+        if not gate.covers(total_count, settings.rlm_gate_size_tolerance):
+            logger.debug(
+                f"RLM risk gate skipped: {total_count} transactions, fitted on {gate.batch_size}"
+            )
+            return None
+        risk = RiskGate.aggregate_risk(suspicious_txns)
+        verdict = gate.decide(risk)
+        if verdict is None:
+            return None
+
+        logger.info(
+            f"RLM risk gate: aggregate risk {risk:.0f} → {'fraud' if verdict else 'benign'}, "
+            "LLM skipped"
+        )
+        citation = (
+            f"Programmatically filtered {total_count} transactions → {len(suspicious_txns)} "
+            f"suspicious; aggregate risk {risk:.0f} decided by the risk gate without an LLM call"
+        )
+        if not verdict:
+            return FraudAnalysisResult(
+                is_fraud=False,
+                confidence=gate.benign_confidence,
+                risk_score=risk,
+                reasoning=(
+                    f"Aggregate programmatic risk {risk:.0f} is at or below the benign threshold "
+                    f"{gate.low:.0f} of the risk gate (fitted for {gate.target_recall:.0%} "
+                    "recall on labeled batches)."
+                ),
+                suspicious_patterns=[],
+                citations=[citation],
+                flagged_transactions=[],
+            )
+
+        flagged = [item for item in suspicious_txns if item["risk_score"] >= gate.high]
+        return FraudAnalysisResult(
+            is_fraud=True,
+            confidence=gate.fraud_confidence,
+            risk_score=risk,
+            reasoning=(
+                f"Aggregate programmatic risk {risk:.0f} is at or above the fraud threshold "
+                f"{gate.high:.0f} of the risk gate ({gate.fraud_confidence:.0%} of such labeled "
+                "batches contained fraud)."
+            ),
+            suspicious_patterns=[],
+            citations=[
+                citation,
+                *(f"Transaction #{row['index']}: {'; '.join(row['reasons'])}" for row in flagged),
+            ],
+            flagged_transactions=[item["index"] for item in flagged],
+        )
+
+    @staticmethod
+    def _candidate_limit() -> int:
+        """Suspects kept by the filter: one prompt's worth, or every shard's with map-reduce."""
+        if settings.rlm_map_reduce_enabled:
+            return settings.rlm_max_suspicious * settings.rlm_max_shards
+        return settings.rlm_max_suspicious
+
+    async def _analyze_sharded(
+        self,
+        transactions: TransactionFrame,
+        suspicious_txns: List[Dict[str, Any]],
+        budget: int,
+        start_time: float,
+    ) -> FraudAnalysisResult:
+        """
+        Map-reduce analysis of more suspects than fit one prompt.
+
+        Suspects (highest risk first) are split into shards of what one prompt
+        holds (see :meth:`_pack_shards`): up to ``RLM_MAX_SUSPICIOUS`` suspects
+        that fit the token budget, with the rest moved on to the next shard.
+        Suspects left over after ``RLM_MAX_SHARDS`` shards are reported in the
+        result's citations. Shards are analyzed concurrently, at most
+        ``RLM_SHARD_CONCURRENCY`` at a time and within the model's concurrency
+        cap; a final reduce call merges their findings. Flagged rows are mapped
+        back to rows of the original batch at every step.
+
+        Args:
+            transactions: Full batch
+            suspicious_txns: Filtered suspects, highest risk first
+            budget: Prompt token budget per shard call
+            start_time: Start of the analysis (for logging)
+
+        Returns:
+            FraudAnalysisResult: Merged result
+        """
+        with stage("pack"):
+            shards, dropped = await get_cpu_executor().run_packing(
+                len(suspicious_txns), self._pack_shards, suspicious_txns, budget
+            )
+        if dropped:
+            logger.warning(
+                f"RLM map-reduce: {dropped} of {len(suspicious_txns)} suspects did not fit "
+                f"{settings.rlm_max_shards} shards"
+            )
+        semaphore = asyncio.Semaphore(settings.rlm_shard_concurrency)
+
+        async def map_shard(
+            shard: List[Dict[str, Any]], packed: PackedContext
+        ) -> Optional[Tuple[FraudAnalysisResult, PackedContext]]:
+            async with semaphore:
+                try:
+                    response = await self.run_llm_cascade(
+                        packed.prompt, RiskGate.aggregate_risk(shard)
+                    )
+                except Exception as e:
+                    logger.error(f"RLM shard error: {e}")
+                    return None
+            finding = response.output.model_copy(deep=True)
+            finding.flagged_transactions = self._shown_flagged(finding.flagged_transactions, shard)
+            return finding, packed
+
+        with stage("map"):
+            outcomes = await asyncio.gather(*(map_shard(*shard) for shard in shards))
+        firsts = [1]
+        for shard, _ in shards[:-1]:
+            firsts.append(firsts[-1] + len(shard))
+        findings: List[ShardFinding] = [
+            (number, firsts[number], *outcome)
+            for number, outcome in enumerate(outcomes)
+            if outcome is not None
+        ]
+        if not findings:
+            return FraudAnalysisResult(
+                is_fraud=False,
+                confidence=0.0,
+                risk_score=0.0,
+                reasoning=f"RLM analysis failed: all {len(shards)} shard calls failed",
+                suspicious_patterns=[],
+                citations=[],
+                flagged_transactions=[],
+            )
+
+        with stage("reduce"):
+            result = await self._reduce(
+                findings,
+                len(transactions),
+                len(suspicious_txns),
+                RiskGate.aggregate_risk(suspicious_txns),
+            )
+        result.citations.insert(
+            0,
+            self._sharding_citation(
+                len(transactions),
+                len(suspicious_txns),
+                [packed for *_, packed in findings],
+                dropped,
+            ),
+        )
+
+        latency_ms = (time.time() - start_time) * 1000
+        logger.info(
+            f"RLM map-reduce complete: Fraud={result.is_fraud}, "
+            f"Filtered {len(transactions)}→{len(suspicious_txns)}, "
+            f"Shards={len(findings)}/{len(shards)}, "
+            f"Flagged={len(result.flagged_transactions)}, Latency={latency_ms:.0f}ms"
+        )
+        return result
+
+    async def _reduce(
+        self,
+        findings: List[ShardFinding],
+        total_count: int,
+        suspect_count: int,
+        risk_score: Optional[float] = None,
+    ) -> FraudAnalysisResult:
+        """
+        Merge shard findings with one LLM call.
+
+        The merged result keeps every row a shard flagged: rows the reduce
+        call confirms come first, and rows it did not confirm (all of them when
+        it calls the batch benign) are appended and listed in a citation. Rows
+        the reduce call flags that no shard flagged are dropped. If the reduce
+        call fails, the findings are merged programmatically instead.
+
+        Args:
+            findings: Successful shard analyses, in shard order
+            total_count: Transactions in the batch
+            suspect_count: Suspects found by the filter
+            risk_score: Aggregate programmatic risk of the batch (for the model cascade)
+
+        Returns:
+            FraudAnalysisResult: Merged result
+        """
+        flagged = list(
+            dict.fromkeys(
+                row for _, _, finding, _ in findings for row in finding.flagged_transactions
+            )
+        )
+        prompt = self.layout.user_prompt(
+            [self._format_finding(*finding) for finding in findings],
+            f"Merge the {len(findings)} shard assessments above into one fraud assessment of "
+            f"the whole batch of {total_count} transactions ({suspect_count} suspicious).",
+        )
+        try:
+            response = await self.run_llm_cascade(
+                prompt, risk_score, agent=self.reduce_agent, system_prompt=self.reduce_system_prompt
+            )
+        except Exception as e:
+            logger.error(f"RLM reduce error: {e}; merging shard findings programmatically")
+            return self._merge_findings(findings, flagged)
+
+        result = response.output.model_copy(deep=True)
+        shard_flagged = set(flagged)
+        unknown = [row for row in result.flagged_transactions if row not in shard_flagged]
+        if unknown:
+            logger.warning(f"RLM reduce flagged rows no shard flagged, dropping: {unknown}")
+        confirmed = list(
+            dict.fromkeys(row for row in result.flagged_transactions if row in shard_flagged)
+        )
+        unconfirmed = [row for row in flagged if row not in set(confirmed)]
+        result.flagged_transactions = confirmed + unconfirmed
+        if unconfirmed:
+            result.citations.append(
+                f"Shard calls flagged {', '.join(f'#{row}' for row in unconfirmed)}, "
+                "which the merge call did not confirm"
+            )
+        return result
+
+    @staticmethod
+    def _format_finding(
+        number: int, first: int, finding: FraudAnalysisResult, packed: PackedContext
+    ) -> str:
+        """Render one shard's assessment for the reduce prompt."""
+        flagged = ", ".join(f"#{row}" for row in finding.flagged_transactions) or "none"
+        return (
+            f"##### SHARD {number} (suspects ranked {first}-{first + packed.included - 1}) #####\n"
+            f"Fraud: {finding.is_fraud}, confidence {finding.confidence:.2f}, "
+            f"risk score {finding.risk_score:.0f}\n"
+            f"Flagged: {flagged}\n"
+            f"Patterns: {'; '.join(finding.suspicious_patterns) or 'none'}\n"
+            f"Reasoning: {finding.reasoning}"
+        )
+
+    @staticmethod
+    def _merge_findings(findings: List[ShardFinding], flagged: List[int]) -> FraudAnalysisResult:
+        """Programmatic merge of shard findings (fallback when the reduce call fails)."""
+        results = [finding for _, _, finding, _ in findings]
+        fraud = [result for result in results if result.is_fraud]
+        agreeing = fraud or results
+        return FraudAnalysisResult(
+            is_fraud=bool(fraud),
+            confidence=sum(result.confidence for result in agreeing) / len(agreeing),
+            risk_score=max(result.risk_score for result in results),
+            reasoning=" ".join(
+                f"Shard {number}: {finding.reasoning}" for number, _, finding, _ in findings
+            ),
+            suspicious_patterns=list(
+                dict.fromkeys(
+                    pattern for result in results for pattern in result.suspicious_patterns
+                )
+            ),
+            citations=[citation for result in results for citation in result.citations],
+            flagged_transactions=flagged,
+        )
+
+    @staticmethod
+    def _shown_flagged(flagged: Sequence[int], items: List[Dict[str, Any]]) -> List[int]:
+        """
+        Keep the flagged rows that were shown in a shard prompt.
+
+        Shard prompts show batch row numbers, which pass through. Any other
+        number (a hallucinated id, or one misread as a position) is dropped
+        and logged, rather than guessed at.
+
+        Args:
+            flagged: Rows flagged by the model
+            items: Suspects shown in the shard prompt, in prompt order
+
+        Returns:
+            List[int]: Batch row numbers, deduplicated in flagged order
+        """
+        shown = {item["index"] for item in items}
+        unknown = [number for number in flagged if number not in shown]
+        if unknown:
+            logger.warning(f"Dropping flagged rows not shown in the shard: {unknown}")
+        return list(dict.fromkeys(number for number in flagged if number in shown))
+
+    async def analyze_batch(
+        self, batches: Sequence[TransactionInput]
+    ) -> List[FraudAnalysisResult]:
+        """
+        Analyze several independent requests with one multi-section LLM call.
+
+        Each batch is filtered on its own; batches without suspects get the
+        programmatic result directly. The rest become numbered sections of a
+        single prompt (the token budget is split evenly between them), and the
+        per-section results are mapped back. The call goes through the model
+        cascade, escalating when any section's answer needs ``main_model``. A
+        single section, or one missing from the LLM output, is analyzed on its
+        own from the suspects already filtered.
+
+        Args:
+            batches: Independent transaction batches (one per caller)
+
+        Returns:
+            List[FraudAnalysisResult]: One result per batch, in input order
+        """
+        frames = [as_frame(batch) for batch in batches]
+        results: List[Optional[FraudAnalysisResult]] = [None] * len(frames)
+
+        sections = []
+        for pos, frame in enumerate(frames):
+            with stage("filter"):
+                suspects = await self._filter_suspicious_transactions(frame)
+            if not suspects:
+                results[pos] = self._no_anomalies_result(len(frame))
+            else:
+                results[pos] = self._gated_result(len(frame), suspects)
+                if results[pos] is None:
+                    sections.append((pos, frame, suspects))
+
+        budget = settings.rlm_prompt_token_budget
+        if len(sections) == 1:
+            pos, frame, suspects = sections[0]
+            results[pos] = await self._analyze_suspects(frame, suspects, budget, time.time())
+        elif sections:
+            section_budget = budget // len(sections)
+            with stage("pack"):
+                packed = await get_cpu_executor().run_packing(
+                    sum(len(suspects) for _, _, suspects in sections),
+                    self._pack_sections,
+                    [suspects for _, _, suspects in sections],
+                    section_budget,
+                )
+            prompt = "\n\n".join(
+                f"##### SECTION {number} #####\n{section.prompt}"
+                for number, section in enumerate(packed)
+            )
+            prompt += "\n\nReturn one fraud assessment per section."
+
+            by_section = {}
+            try:
+                response = await self.run_llm_cascade(
+                    prompt,
+                    [RiskGate.aggregate_risk(suspects) for _, _, suspects in sections],
+                    agent=self.batch_agent,
+                    system_prompt=self.batch_system_prompt,
+                )
+                by_section = {result.section: result for result in response.output.results}
+                logger.info(
+                    f"RLM micro-batch: {len(sections)} sections in one call, "
+                    f"Tokens={response.usage.total_tokens}"
+                )
+            except Exception as e:
+                logger.error(f"RLM micro-batch error: {e}")
+
+            for number, (pos, frame, suspects) in enumerate(sections):
+                section_result = by_section.get(number)
+                if section_result is None:
+                    results[pos] = await self._analyze_suspects(
+                        frame, suspects, budget, time.time()
+                    )
+                    continue
+                result = FraudAnalysisResult.model_validate(
+                    section_result.model_dump(exclude={"section"})
+                )
+                result.citations.insert(
+                    0, self._filtering_citation(len(frame), len(suspects), packed[number])
+                )
+                results[pos] = result
+
+        return results
+
+    def _pack_sections(
+        self, sections: List[List[Dict[str, Any]]], budget: int
+    ) -> List[PackedContext]:
+        """Pack each section's suspects into its share of the token budget."""
+        return [self.section_packer.pack(suspects, "", budget) for suspects in sections]
+
+    def _pack_shards(
+        self, suspects: List[Dict[str, Any]], budget: int
+    ) -> Tuple[List[Tuple[List[Dict[str, Any]], PackedContext]], int]:
+        """
+        Split suspects into shards of what one prompt holds.
+
+        Each shard takes up to ``RLM_MAX_SUSPICIOUS`` of the remaining suspects
+        and keeps the ones the packer fits in the token budget; the rest start
+        the next shard. At most ``RLM_MAX_SHARDS`` shards are cut.
+
+        Args:
+            suspects: Suspects, highest risk first
+            budget: Prompt token budget of one shard
+
+        Returns:
+            Tuple of the shards (suspects and packed prompt) and the number of
+            suspects left over after the last shard
+        """
+        shards = []
+        remaining = suspects
+        while remaining and len(shards) < settings.rlm_max_shards:
+            packed = self.context_packer.pack(
+                remaining[: settings.rlm_max_suspicious], self.system_prompt, budget
+            )
+            shards.append((remaining[: packed.included], packed))
+            remaining = remaining[packed.included :]
+        return shards, len(remaining)
+
+    @staticmethod
+    def _no_anomalies_result(total_count: int) -> FraudAnalysisResult:
+        """Result for a batch in which the filter found nothing suspicious."""
+        return FraudAnalysisResult(
+            is_fraud=False,
+            confidence=0.95,
+            risk_score=5.0,
+            reasoning="Programmatic analysis found no anomalies. All transactions within normal parameters.",
+            suspicious_patterns=[],
+            citations=["Analyzed all {} transactions programmatically".format(total_count)],
+            flagged_transactions=[],
+        )
+
+    @staticmethod
+    def _filtering_citation(total_count: int, suspect_count: int, packed: PackedContext) -> str:
+        """Citation describing the programmatic filtering step."""
+        return (
+            f"Programmatically filtered {total_count} transactions → {suspect_count} suspicious; "
+            f"top {packed.included} sent to LLM in {packed.prompt_tokens} prompt tokens"
+        )
+
+    @staticmethod
+    def _sharding_citation(
+        total_count: int, suspect_count: int, packed: List[PackedContext], dropped: int = 0
+    ) -> str:
+        """Citation describing the filtering step and the shards of a map-reduce analysis."""
+        citation = (
+            f"Programmatically filtered {total_count} transactions → {suspect_count} suspicious; "
+            f"{sum(shard.included for shard in packed)} sent to LLM in {len(packed)} shards "
+            f"({sum(shard.prompt_tokens for shard in packed)} prompt tokens), then merged"
+        )
+        if dropped:
+            citation += (
+                f"; {dropped} lowest-risk suspects did not fit any shard and were not analyzed"
+            )
+        return citation
+
+    async def _filter_suspicious_transactions(
+        self, transactions: TransactionFrame, max_results: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Programmatically filter suspicious transactions.
 
         This is the RLM magic: Code-based filtering is 1000x faster and cheaper than LLM!
+        The rules run as array operations in :class:`SuspiciousTransactionFilter`,
+        on the CPU executor's thread pool for large batches; only the surviving
+        rows are materialized as ``Transaction`` objects.
+
+        Args:
+            transactions: Batch to filter
+            max_results: Suspects to keep (defaults to ``RLM_MAX_SUSPICIOUS``)
 
         Returns:
             List of suspicious transaction dictionaries with metadata
         """
-        suspicious = []
+        suspicious, stats = await get_cpu_executor().run_array(
+            len(transactions), self.suspicious_filter.run, transactions.features, max_results
+        )
+        self.suspicious_filter.record(stats)
 
-        # Calculate statistics for anomaly detection
-        amounts = [t.amount for t in transactions]
-        if not amounts:
-            return suspicious
+        for item in suspicious:
+            item["transaction"] = transactions.row(item["index"])
 
-        mean_amount = statistics.mean(amounts)
-        try:
-            std_amount = statistics.stdev(amounts) if len(amounts) > 1 else mean_amount * 0.3
-        except:
-            std_amount = mean_amount * 0.3
-
-        # Anomaly thresholds
-        high_amount_threshold = mean_amount + (3 * std_amount)
-        low_amount_threshold = max(0, mean_amount - (2 * std_amount))
-
-        for idx, txn in enumerate(transactions):
-            reasons = []
-
-            # Check 1: Unusual amount (statistical outlier)
-            if txn.amount > high_amount_threshold:
-                reasons.append(f"Amount ${txn.amount:.2f} is {(txn.amount - mean_amount) / std_amount:.1f}σ above mean")
-            elif txn.amount < 1.0 and txn.amount < low_amount_threshold:
-                reasons.append(f"Unusually low amount ${txn.amount:.2f}")
-
-            # Check 2: Extreme V-feature values (PCA anomalies)
-            extreme_features = []
-            for i in range(1, 29):
-                v_val = getattr(txn, f"v{i}")
-                if abs(v_val) > 3:  # Beyond 3 standard deviations
-                    extreme_features.append(f"V{i}={v_val:.2f}")
-
-            if len(extreme_features) >= 3:
-                reasons.append(f"Multiple extreme features: {', '.join(extreme_features[:3])}")
-
-            # Check 3: Rapid succession (if we have time data)
-            if idx > 0:
-                time_diff = txn.time - transactions[idx-1].time
-                if time_diff < 60:  # Less than 1 minute
-                    reasons.append(f"Rapid succession: {time_diff:.0f}s after previous")
-
-            # Add to suspicious list if any reasons found
-            if reasons:
-                suspicious.append({
-                    "index": idx,
-                    "transaction": txn,
-                    "reasons": reasons,
-                    "risk_score": min(100, len(reasons) * 30 + (50 if txn.amount > high_amount_threshold else 0)),
-                })
-
-        # Sort by risk score (highest first) and limit to top suspicious
-        suspicious.sort(key=lambda x: x["risk_score"], reverse=True)
-        return suspicious[:20]  # Limit to top 20 for token efficiency
-
-    def _format_suspicious_for_llm(
-        self, suspicious_txns: List[Dict], total_count: int
-    ) -> str:
+        return suspicious
+
+    def _build_prompt(self, blocks: List[str], candidates: int, encoding: str) -> str:
         """
-        Format suspicious transactions for LLM analysis.
+        Build the user prompt around packed transaction blocks.
 
         Much smaller context than sending all transactions!
+
+        Args:
+            blocks: Rendered suspicious transactions, highest risk first
+            candidates: Number of suspicious transactions before packing
+            encoding: Name of the encoding the blocks were rendered with
         """
-        lines = [
-            f"=== SUSPICIOUS TRANSACTIONS (Filtered from {total_count} total) ===\n"
-        ]
+        section = self._build_section(blocks, candidates, encoding)
+        return self.layout.user_prompt(
+            [section], "Provide your fraud assessment of the suspicious transactions above."
+        )
 
-        for item in suspicious_txns:
-            idx = item["index"]
-            txn = item["transaction"]
-            reasons = item["reasons"]
-            risk = item["risk_score"]
+    def _build_section(self, blocks: List[str], candidates: int, encoding: str) -> str:
+        """
+        Suspicious-transaction listing shared by single and multi-section prompts.
 
-            lines.append(
-                f"\nTransaction #{idx}:\n"
-                f"  Time: {txn.time:.0f}s, Amount: ${txn.amount:.2f}\n"
-                f"  Risk Score: {risk}/100\n"
-                f"  Flags: {'; '.join(reasons)}\n"
-                f"  Key Features: V1={txn.v1:.2f}, V2={txn.v2:.2f}, V3={txn.v3:.2f}"
-            )
+        The row layout is described in the system prompt; the per-request
+        counts follow the rows so the prompt prefix stays stable.
+        """
+        shown = f"top {len(blocks)} of {candidates}" if len(blocks) < candidates else str(len(blocks))
+        context = "\n".join(blocks)
+        return f"""=== SUSPICIOUS TRANSACTIONS ===
+{context}
+
+({shown} suspicious transactions, ordered by risk score)"""
+
+    def _encode_table_row(self, item: Dict[str, Any]) -> str:
+        """Delimited row under the encoder's header, with risk and flags."""
+        txn = item["transaction"]
+        row = [getattr(txn, field) for field in FEATURE_FIELDS]
+        return self.encoder.encode_row(
+            item["index"],
+            row,
+            {"risk": item["risk_score"], "flags": "; ".join(item["reasons"])},
+        )
+
+    @staticmethod
+    def _encode_detailed(item: Dict[str, Any]) -> str:
+        """Multi-line block with time, amount, risk, flags and key features."""
+        txn = item["transaction"]
+        return (
+            f"\nTransaction #{item['index']}:\n"
+            f"  Time: {txn.time:.0f}s, Amount: ${txn.amount:.2f}\n"
+            f"  Risk Score: {item['risk_score']}/100\n"
+            f"  Flags: {'; '.join(item['reasons'])}\n"
+            f"  Key Features: V1={txn.v1:.2f}, V2={txn.v2:.2f}, V3={txn.v3:.2f}"
+        )
+
+    @staticmethod
+    def _encode_compact(item: Dict[str, Any]) -> str:
+        """Single line with the same fields as the detailed block."""
+        txn = item["transaction"]
+        return (
+            f"#{item['index']} t={txn.time:.0f}s ${txn.amount:.2f} risk={item['risk_score']} | "
+            f"{'; '.join(item['reasons'])} | V1={txn.v1:.2f} V2={txn.v2:.2f} V3={txn.v3:.2f}"
+        )
 
-        return "\n".join(lines)
+    @staticmethod
+    def _encode_minimal(item: Dict[str, Any]) -> str:
+        """Index, amount, risk and flags only."""
+        txn = item["transaction"]
+        return f"#{item['index']} ${txn.amount:.2f} risk={item['risk_score']}: {'; '.join(item['reasons'])}"
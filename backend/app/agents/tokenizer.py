@@ -0,0 +1,147 @@
+"""Local token counting for prompt budgeting.
+
+Uses tiktoken when its encoding files are available (set
+``TOKENIZER_CACHE_DIR`` to a directory with the bundled ``.tiktoken`` files to
+run offline). Otherwise falls back to a character-based estimate.
+"""
+
+import json
+import math
+import os
+from functools import lru_cache
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel
+
+from loguru import logger
+
+from app.core.config import settings
+
+DEFAULT_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+
+# Chat format overhead (role and separators per message, reply priming)
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_PRIMING_TOKENS = 3
+
+# Name of the tool pydantic-ai returns structured output through
+OUTPUT_TOOL_NAME = "final_result"
+
+
+class TokenCounter:
+    """Counts tokens for a given model with a local tokenizer."""
+
+    def __init__(self, model: str, encoding_name: Optional[str] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            model: Model name (provider prefix such as ``openai:`` is ignored)
+            encoding_name: Explicit tiktoken encoding; derived from the model if None
+        """
+        self.model = model.split(":", 1)[-1]
+        self.encoding = self._load_encoding(encoding_name)
+
+    def _load_encoding(self, encoding_name: Optional[str]) -> Any:
+        """Load the tiktoken encoding, or None if unavailable."""
+        if settings.tokenizer_cache_dir:
+            os.environ.setdefault("TIKTOKEN_CACHE_DIR", settings.tokenizer_cache_dir)
+
+        try:
+            import tiktoken
+
+            if encoding_name:
+                return tiktoken.get_encoding(encoding_name)
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                return tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception as e:
+            logger.warning(
+                f"Tokenizer unavailable for {self.model} ({e}); "
+                f"estimating {CHARS_PER_TOKEN} characters per token"
+            )
+            return None
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the real tokenizer rather than an estimate."""
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        """
+        Count tokens in a piece of text.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            int: Token count
+        """
+        if self.encoding is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count_messages(self, system_prompt: str, user_prompt: str, tools: str = "") -> int:
+        """
+        Count prompt tokens of a system + user chat request.
+
+        Args:
+            system_prompt: System message
+            user_prompt: User message
+            tools: JSON tool definitions sent with the request (see :func:`output_tool_text`)
+
+        Returns:
+            int: Prompt tokens billed for the request
+        """
+        return (
+            self.count(system_prompt)
+            + self.count(user_prompt)
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+            + REPLY_PRIMING_TOKENS
+            + (self.count(tools) if tools else 0)
+        )
+
+
+def _drop_titles(schema: Any) -> Any:
+    """Remove generated ``title`` keywords from a JSON schema."""
+    if isinstance(schema, dict):
+        return {
+            key: _drop_titles(value)
+            for key, value in schema.items()
+            if not (key == "title" and isinstance(value, str))
+        }
+    if isinstance(schema, list):
+        return [_drop_titles(value) for value in schema]
+    return schema
+
+
+@lru_cache
+def output_tool_text(output_type: Type[BaseModel]) -> str:
+    """
+    JSON tool definitions of a structured-output request.
+
+    pydantic-ai asks for structured output through a ``final_result`` tool
+    whose parameters are the output model's JSON schema (without titles, the
+    model docstring as the tool description). Those definitions are billed as
+    prompt tokens, often a few hundred for a small result model.
+
+    Args:
+        output_type: Pydantic model the agent returns
+
+    Returns:
+        str: ``tools`` array of the request, as JSON
+    """
+    schema = output_type.model_json_schema()
+    description = schema.pop("description", None)
+    function = {"name": OUTPUT_TOOL_NAME}
+    if description:
+        function["description"] = description
+    function["parameters"] = _drop_titles(schema)
+    return json.dumps([{"type": "function", "function": function}])
+
+
+@lru_cache
+def get_token_counter(model: str) -> TokenCounter:
+    """Get a shared token counter for a model."""
+    return TokenCounter(model, settings.tokenizer_encoding)
@@ -0,0 +1,53 @@
+"""Per-analysis usage accounting.
+
+:func:`track_usage` collects a :class:`UsageRecord` for the code run inside
+it: every LLM call made through ``BaseFraudAgent.run_llm`` adds its tokens
+and cost, and :func:`stage` blocks add their wall time.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app.models.schemas import UsageRecord
+
+_usage: ContextVar[Optional[UsageRecord]] = ContextVar("usage_record", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[UsageRecord]:
+    """
+    Collect usage for the code run inside the block.
+
+    Yields:
+        UsageRecord: Record filled in by LLM calls and stages
+    """
+    record = UsageRecord()
+    token = _usage.set(record)
+    try:
+        yield record
+    finally:
+        _usage.reset(token)
+
+
+def current_usage() -> Optional[UsageRecord]:
+    """Record of the enclosing :func:`track_usage` block, if any."""
+    return _usage.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a stage of the analysis into the current usage record.
+
+    Args:
+        name: Stage name (e.g. ``filter``, ``pack``, ``llm``)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = _usage.get()
+        if record is not None:
+            record.add_stage(name, (time.perf_counter() - start) * 1000)
@@ -1,12 +1,19 @@
 """Application configuration and settings."""
 
 from functools import lru_cache
-from typing import List
+from pathlib import Path
+from typing import Dict, List, Literal, Tuple
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def dataset_cache_dir(dataset_path: str | Path) -> Path:
+    """Directory of the columnar cache (and statistics) of a dataset CSV."""
+    path = Path(dataset_path)
+    return path.with_name(f"{path.stem}_cache")
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
@@ -18,13 +25,22 @@ class Settings(BaseSettings):
     )
 
     # API Keys
-    openai_api_key: str = Field(..., description="OpenAI API key")
+    openai_api_key: str | None = Field(
+        None, description="OpenAI API key (required once an LLM-backed agent is used)"
+    )
     anthropic_api_key: str | None = Field(None, description="Anthropic API key (optional)")
 
     # LLM Configuration
+    openai_base_url: str | None = Field(
+        default=None, description="OpenAI-compatible API base URL (None = api.openai.com)"
+    )
     main_model: str = Field(default="openai:gpt-4o", description="Main LLM model")
     sub_model: str = Field(default="openai:gpt-4o-mini", description="Sub-model for RLM")
     temperature: float = Field(default=0.1, ge=0.0, le=2.0)
+    model_pricing: Dict[str, Tuple[float, float, float]] = Field(
+        default_factory=dict,
+        description="Extra/overridden prices: model -> (input, cached input, output) USD per 1M",
+    )
 
     # Database
     database_url: str = Field(
@@ -57,15 +73,244 @@ class Settings(BaseSettings):
         default=10000, description="Max transactions for RLM (large context)"
     )
 
-    # Rate Limiting
-    rate_limit_per_minute: int = Field(default=60)
+    # RLM filter
+    rlm_max_suspicious: int = Field(
+        default=50, ge=1, description="Top-k suspicious transactions considered for the RLM prompt"
+    )
+    rlm_prompt_token_budget: int = Field(
+        default=4000, ge=500, description="Max prompt tokens per RLM LLM call"
+    )
+    rlm_use_reference_profile: bool = Field(
+        default=True, description="Judge RLM filter rules against population statistics"
+    )
+    reference_profile_path: str | None = Field(
+        default=None,
+        description="Dataset statistics file (None = stats.json in the KAGGLE_DATASET_PATH cache)",
+    )
+
+    # RLM map-reduce (batches with more suspects than one prompt holds)
+    rlm_map_reduce_enabled: bool = Field(
+        default=False, description="Shard suspects over concurrent LLM calls, then merge them"
+    )
+    rlm_max_shards: int = Field(
+        default=8,
+        ge=1,
+        description="Max shards (up to RLM_MAX_SUSPICIOUS suspects each) per analysis",
+    )
+    rlm_shard_concurrency: int = Field(
+        default=4, ge=1, description="Shard calls in flight per analysis"
+    )
+
+    # RLM confidence gate (skip the LLM for clear-cut batches)
+    rlm_gate_enabled: bool = Field(
+        default=True, description="Decide clear-cut batches from the fitted risk gate"
+    )
+    rlm_gate_path: str = Field(
+        default="./data/risk_gate.json", description="Thresholds written by fit_risk_gate.py"
+    )
+    rlm_gate_size_tolerance: float = Field(
+        default=2.0,
+        ge=1.0,
+        description="Gate only batches within this factor of its fitted batch size",
+    )
+
+    # Local ML scorer (zero-token model, trained with scripts/train_ml_scorer.py)
+    ml_scorer_path: str = Field(
+        default="./data/ml_scorer.npz", description="Model exported by train_ml_scorer.py"
+    )
+    ml_scorer_threshold: float | None = Field(
+        default=None, ge=0.0, le=1.0, description="Flag probability (None = fitted threshold)"
+    )
+    rlm_candidate_ranker: Literal["rules", "ml"] = Field(
+        default="rules", description="Rank RLM filter candidates by rule risk or model probability"
+    )
+
+    # Model cascade (all approaches): sub_model first, main_model on escalation
+    cascade_enabled: bool = Field(
+        default=False, description="Answer with sub_model, escalating doubtful calls to main_model"
+    )
+    cascade_min_confidence: float = Field(
+        default=0.7, ge=0.0, le=1.0, description="Escalate sub_model answers below this confidence"
+    )
+    cascade_risk_high: float = Field(
+        default=80.0,
+        ge=0.0,
+        le=100.0,
+        description="Escalate benign verdicts at or above this programmatic risk",
+    )
+    cascade_risk_low: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=100.0,
+        description="Escalate fraud verdicts at or below this programmatic risk",
+    )
+
+    # Prompt encoding
+    prompt_encoding: Literal["labeled", "csv", "tsv"] = Field(
+        default="labeled", description="Transaction layout in agent prompts"
+    )
+    prompt_float_precision: int | None = Field(
+        default=None, ge=0, description="Decimal places for V-features (None = agent default)"
+    )
+    prompt_omit_typical_features: bool = Field(
+        default=False, description="Omit V-features within ±1σ of the population mean"
+    )
+
+    # LLM response cache
+    llm_cache_enabled: bool = Field(
+        default=True, description="Cache parsed LLM responses by model and prompt hash"
+    )
+    llm_cache_path: str | None = Field(
+        default="./data/llm_cache.sqlite3", description="SQLite file (None = memory only)"
+    )
+    llm_cache_max_entries: int = Field(default=1024, ge=1, description="In-memory LRU size")
+    llm_cache_max_disk_entries: int = Field(default=10_000, ge=1, description="SQLite tier size")
+    llm_cache_ttl_seconds: float | None = Field(
+        default=86_400, description="Entry lifetime in seconds (None = no expiry)"
+    )
+
+    # LLM record/replay (benchmarks)
+    llm_cassette_mode: Literal["off", "record", "replay", "auto"] = Field(
+        default="off", description="Record LLM calls to, or replay them from, a cassette"
+    )
+    llm_cassette_path: str = Field(
+        default="./data/cassettes/llm.jsonl.gz", description="Cassette file (.jsonl or .jsonl.gz)"
+    )
+    llm_cassette_replay_latency: bool = Field(
+        default=False, description="Sleep for the recorded latency when replaying"
+    )
+
+    # Request coalescing
+    single_flight_enabled: bool = Field(
+        default=True, description="Share one analysis between concurrent identical requests"
+    )
+
+    # Micro-batching (RLM)
+    micro_batch_enabled: bool = Field(
+        default=False, description="Pack small concurrent RLM requests into one LLM call"
+    )
+    micro_batch_window_ms: float = Field(
+        default=20.0, gt=0, description="Max time to wait for more requests before flushing"
+    )
+    micro_batch_max_requests: int = Field(
+        default=8, ge=2, description="Flush as soon as this many requests are pending"
+    )
+    micro_batch_max_transactions: int = Field(
+        default=50, ge=1, description="Only requests up to this size are micro-batched"
+    )
+
+    # Tokenizer
+    tokenizer_encoding: str | None = Field(
+        default=None, description="tiktoken encoding (None = derive from model name)"
+    )
+    tokenizer_cache_dir: str | None = Field(
+        default=None, description="Directory with bundled .tiktoken files for offline use"
+    )
+
+    # Shared HTTP client (all agents)
+    http_max_connections: int = Field(default=20, ge=1, description="Max pooled connections")
+    http_max_keepalive_connections: int = Field(
+        default=10, ge=0, description="Max idle keep-alive connections"
+    )
+    http_keepalive_expiry: float = Field(
+        default=30.0, ge=0, description="Seconds an idle connection is kept"
+    )
+    http2_enabled: bool = Field(default=True, description="Use HTTP/2 (requires the h2 package)")
+    http_timeout_seconds: float = Field(default=60.0, gt=0, description="LLM request timeout")
+
+    # CPU-bound agent stages (filtering, formatting)
+    cpu_executor_array: Literal["inline", "thread"] = Field(
+        default="thread", description="Where NumPy stages run (they release the GIL)"
+    )
+    cpu_executor_python: Literal["inline", "thread", "process"] = Field(
+        default="inline",
+        description="Where pure-Python stages (prompt formatting) run; process pays off "
+        "only for prompts of thousands of rows",
+    )
+    cpu_executor_workers: int = Field(default=4, ge=1, description="Workers per executor pool")
+    cpu_offload_min_rows: int = Field(
+        default=1000, ge=0, description="Smaller filter batches run inline on the event loop"
+    )
+    cpu_offload_min_prompt_rows: int = Field(
+        default=1000, ge=0, description="Prompts of fewer rows are formatted inline"
+    )
+    loop_lag_interval_ms: float = Field(
+        default=100.0, gt=0, description="Sampling interval of the event-loop lag monitor"
+    )
+
+    # Fake LLM server (offline load/latency testing)
+    fake_llm_enabled: bool = Field(
+        default=False, description="Serve all LLM calls from the in-process fake server"
+    )
+    fake_llm_latency_distribution: Literal["constant", "uniform", "normal", "lognormal"] = Field(
+        default="lognormal", description="Distribution of the fixed part of each call's latency"
+    )
+    fake_llm_latency_ms: float = Field(
+        default=300.0, ge=0, description="Mean (median for lognormal) fixed latency"
+    )
+    fake_llm_latency_spread: float = Field(
+        default=0.3, ge=0, description="Relative spread (sigma for lognormal)"
+    )
+    fake_llm_ms_per_prompt_token: float = Field(default=0.02, ge=0, description="Prefill cost")
+    fake_llm_ms_per_completion_token: float = Field(
+        default=8.0, ge=0, description="Generation cost"
+    )
+    fake_llm_completion_tokens: int | None = Field(
+        default=None, ge=1, description="Reported completion tokens (None = count the response)"
+    )
+    fake_llm_error_rate: float = Field(
+        default=0.0, ge=0.0, le=1.0, description="Fraction of calls failing"
+    )
+    fake_llm_error_status: int = Field(default=500, description="HTTP status of failed calls")
+    fake_llm_flag_rate: float = Field(
+        default=0.1, ge=0.0, le=1.0, description="Fraction of listed transactions flagged"
+    )
+    fake_llm_prompt_cache: bool = Field(
+        default=True, description="Simulate provider prefix caching (cached_tokens in usage)"
+    )
+    fake_llm_seed: int = Field(default=0, description="Seed for latency and error draws")
+
+    # Rate Limiting (shared by all agents' LLM calls)
+    rate_limit_per_minute: int = Field(default=60, ge=1, description="LLM requests per minute")
+    rate_limit_tokens_per_minute: int | None = Field(
+        default=200_000, description="LLM tokens per minute (None = unlimited)"
+    )
+    rate_limit_expected_completion_tokens: int = Field(
+        default=500, ge=0, description="Completion tokens reserved per call before usage is known"
+    )
+    main_model_max_concurrency: int = Field(
+        default=4, ge=1, description="Max in-flight calls to main_model"
+    )
+    sub_model_max_concurrency: int = Field(
+        default=8, ge=1, description="Max in-flight calls to sub_model"
+    )
 
     # Dataset
     kaggle_dataset_path: str = Field(default="./data/creditcard.csv")
+    dataset_cache_enabled: bool = Field(
+        default=True, description="Write/memory-map a columnar cache next to the dataset CSV"
+    )
+    dataset_cache_dtype: str = Field(
+        default="float64",
+        description="Float dtype of the cached feature matrix (float32 halves it, rounding values)",
+    )
+    sampling_seed: int | None = Field(
+        default=None, description="Seed for dataset sampling (None = nondeterministic)"
+    )
+    validate_dataset_rows: bool = Field(
+        default=True, description="Run Pydantic validation on rows loaded from the dataset"
+    )
     dataset_url: str = Field(
         default="https://www.kaggle.com/datasets/mlg-ulb/creditcardfraud"
     )
 
+    @property
+    def reference_profile_file(self) -> Path:
+        """Statistics the filter and encoder judge rows against."""
+        if self.reference_profile_path:
+            return Path(self.reference_profile_path)
+        return dataset_cache_dir(self.kaggle_dataset_path) / "stats.json"
+
     @field_validator("cors_origins", mode="before")
     @classmethod
     def parse_cors_origins(cls, v: str | List[str]) -> List[str]:
@@ -8,8 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from loguru import logger
 
+from app.agents.clients import client_registry
+from app.agents.executor import get_cpu_executor, get_loop_lag_monitor
 from app.core.config import settings
-from app.core.database import init_db
 
 
 @asynccontextmanager
@@ -19,15 +20,23 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     logger.info("Initializing database...")
     try:
+        # SQLAlchemy/pgvector are only needed once the server starts, not at import
+        from app.core.database import init_db
+
         await init_db()
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
 
+    get_loop_lag_monitor().start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
+    await get_loop_lag_monitor().stop()
+    get_cpu_executor().shutdown()
+    await client_registry.aclose()
 
 
 app = FastAPI(
@@ -1,21 +1,34 @@
 """Database and Pydantic models."""
 
+from .frame import TransactionFrame, TransactionInput, as_frame
 from .schemas import (
     AnalysisMetrics,
     AnalysisRequest,
     AnalysisResponse,
     ComparisonResponse,
     FraudAnalysisResult,
+    LLMResponse,
+    LLMUsage,
     Transaction,
     TransactionBatch,
+    UsageRecord,
 )
+from .statistics import DatasetStatistics, FeatureStatistics
 
 __all__ = [
     "Transaction",
     "TransactionBatch",
+    "TransactionFrame",
+    "TransactionInput",
+    "as_frame",
     "AnalysisRequest",
     "AnalysisResponse",
     "FraudAnalysisResult",
     "AnalysisMetrics",
+    "LLMResponse",
+    "LLMUsage",
+    "UsageRecord",
     "ComparisonResponse",
+    "DatasetStatistics",
+    "FeatureStatistics",
 ]
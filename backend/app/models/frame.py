@@ -0,0 +1,298 @@
+"""Columnar, array-backed transaction batches."""
+
+import hashlib
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Union, overload
+
+import numpy as np
+from numpy.typing import DTypeLike
+from pydantic import TypeAdapter
+
+from .schemas import Transaction
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Matrix layout (matches the column order of creditcard.csv)
+TIME_COL = 0
+V_COLS = slice(1, 29)
+AMOUNT_COL = 29
+FEATURE_COUNT = 30
+
+FEATURE_FIELDS = ("time", *(f"v{i}" for i in range(1, 29)), "amount")
+DATASET_COLUMNS = ["Time", *(f"V{i}" for i in range(1, 29)), "Amount"]
+
+# Sentinel for rows without a known label
+UNKNOWN_LABEL = -1
+
+_row_getter = attrgetter(*FEATURE_FIELDS)
+_transaction_list_adapter = TypeAdapter(List[Transaction])
+
+
+def transactions_to_matrix(
+    transactions: Sequence[Transaction], dtype: DTypeLike = np.float64
+) -> np.ndarray:
+    """
+    Pack transactions into a contiguous ``(N x 30)`` feature matrix.
+
+    Args:
+        transactions: Transactions to pack
+        dtype: Float dtype of the matrix
+
+    Returns:
+        np.ndarray: Feature matrix in ``Time, V1..V28, Amount`` order
+    """
+    rows = [_row_getter(txn) for txn in transactions]
+    return np.array(rows, dtype=dtype).reshape(len(rows), FEATURE_COUNT)
+
+
+class TransactionFrame:
+    """
+    Array-backed batch of transactions.
+
+    Holds one C-contiguous ``(N x 30)`` float matrix in Kaggle column order plus
+    optional label, transaction id and user id arrays. Slicing with a ``slice``
+    returns a zero-copy view; integer indexing or iteration builds a
+    ``Transaction`` for that single row only.
+    """
+
+    __slots__ = ("features", "labels", "transaction_ids", "user_ids")
+
+    def __init__(
+        self,
+        features: np.ndarray,
+        labels: Optional[np.ndarray] = None,
+        transaction_ids: Optional[np.ndarray] = None,
+        user_ids: Optional[np.ndarray] = None,
+    ):
+        """
+        Initialize the frame.
+
+        Args:
+            features: ``(N x 30)`` float32/float64 matrix (``Time, V1..V28, Amount``)
+            labels: Optional int array (0=legitimate, 1=fraud, -1=unknown)
+            transaction_ids: Optional array of transaction identifiers
+            user_ids: Optional array of user/card identifiers
+
+        Raises:
+            ValueError: If array shapes do not line up
+        """
+        if features.ndim != 2 or features.shape[1] != FEATURE_COUNT:
+            raise ValueError(
+                f"features must have shape (N, {FEATURE_COUNT}), got {features.shape}"
+            )
+        for name, column in (
+            ("labels", labels),
+            ("transaction_ids", transaction_ids),
+            ("user_ids", user_ids),
+        ):
+            if column is not None and len(column) != len(features):
+                raise ValueError(f"{name} has {len(column)} rows, expected {len(features)}")
+
+        self.features = features
+        self.labels = labels
+        self.transaction_ids = transaction_ids
+        self.user_ids = user_ids
+
+    @classmethod
+    def from_transactions(
+        cls, transactions: Sequence[Transaction], dtype: DTypeLike = np.float64
+    ) -> "TransactionFrame":
+        """
+        Build a frame from ``Transaction`` objects.
+
+        Args:
+            transactions: Transactions to pack
+            dtype: Float dtype of the feature matrix
+
+        Returns:
+            TransactionFrame: Columnar copy of the transactions
+        """
+        labels = None
+        if any(txn.class_label is not None for txn in transactions):
+            labels = np.array(
+                [UNKNOWN_LABEL if txn.class_label is None else txn.class_label for txn in transactions],
+                dtype=np.int8,
+            )
+
+        transaction_ids = None
+        if any(txn.transaction_id is not None for txn in transactions):
+            transaction_ids = np.array([txn.transaction_id for txn in transactions], dtype=object)
+
+        user_ids = None
+        if any(txn.user_id is not None for txn in transactions):
+            user_ids = np.array([txn.user_id for txn in transactions], dtype=object)
+
+        return cls(
+            features=transactions_to_matrix(transactions, dtype=dtype),
+            labels=labels,
+            transaction_ids=transaction_ids,
+            user_ids=user_ids,
+        )
+
+    @classmethod
+    def from_dataframe(
+        cls, df: "pd.DataFrame", dtype: DTypeLike = np.float64
+    ) -> "TransactionFrame":
+        """
+        Build a frame from a DataFrame in the Kaggle ``creditcard.csv`` format.
+
+        Args:
+            df: DataFrame with ``Time``, ``V1``-``V28``, ``Amount`` and optional ``Class``
+            dtype: Float dtype of the feature matrix
+
+        Returns:
+            TransactionFrame: Columnar batch; transaction ids are ``txn_<index>``
+        """
+        features = np.ascontiguousarray(df[DATASET_COLUMNS].to_numpy(dtype=dtype))
+        labels = df["Class"].to_numpy(dtype=np.int8) if "Class" in df.columns else None
+        transaction_ids = ("txn_" + df.index.astype(str)).to_numpy(dtype=object)
+        user_ids = df["user_id"].to_numpy(dtype=object) if "user_id" in df.columns else None
+
+        return cls(
+            features=features,
+            labels=labels,
+            transaction_ids=transaction_ids,
+            user_ids=user_ids,
+        )
+
+    def __len__(self) -> int:
+        """Number of transactions in the frame."""
+        return len(self.features)
+
+    @overload
+    def __getitem__(self, key: int) -> Transaction: ...
+
+    @overload
+    def __getitem__(self, key: Union[slice, np.ndarray, List[int]]) -> "TransactionFrame": ...
+
+    def __getitem__(self, key):
+        """Return a single ``Transaction`` for an int, or a sub-frame otherwise."""
+        if isinstance(key, (int, np.integer)):
+            return self.row(int(key))
+
+        return TransactionFrame(
+            features=self.features[key],
+            labels=None if self.labels is None else self.labels[key],
+            transaction_ids=None if self.transaction_ids is None else self.transaction_ids[key],
+            user_ids=None if self.user_ids is None else self.user_ids[key],
+        )
+
+    def __iter__(self) -> Iterator[Transaction]:
+        """Iterate over rows as ``Transaction`` objects (built one at a time)."""
+        for idx in range(len(self)):
+            yield self.row(idx)
+
+    @property
+    def time(self) -> np.ndarray:
+        """Time column (view)."""
+        return self.features[:, TIME_COL]
+
+    @property
+    def amount(self) -> np.ndarray:
+        """Amount column (view)."""
+        return self.features[:, AMOUNT_COL]
+
+    @property
+    def v_features(self) -> np.ndarray:
+        """``(N x 28)`` PCA feature block (view)."""
+        return self.features[:, V_COLS]
+
+    @property
+    def fraud_count(self) -> int:
+        """Number of rows labelled as fraud (0 when labels are unknown)."""
+        return 0 if self.labels is None else int((self.labels == 1).sum())
+
+    def fingerprint(self) -> str:
+        """
+        Content hash of the feature matrix.
+
+        Computed on float64 values, so the same batch hashes identically
+        whether it came from an API request or the float32 dataset cache.
+
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        features = np.ascontiguousarray(self.features, dtype=np.float64)
+        digest = hashlib.sha256(str(features.shape).encode())
+        digest.update(features.tobytes())
+        return digest.hexdigest()
+
+    def row(self, idx: int) -> Transaction:
+        """
+        Materialize a single row as a ``Transaction``.
+
+        Args:
+            idx: Row index
+
+        Returns:
+            Transaction: The row with its metadata
+        """
+        values = dict(zip(FEATURE_FIELDS, self.features[idx].tolist()))
+        label = None if self.labels is None else int(self.labels[idx])
+
+        return Transaction(
+            **values,
+            class_label=None if label == UNKNOWN_LABEL else label,
+            transaction_id=None if self.transaction_ids is None else self.transaction_ids[idx],
+            user_id=None if self.user_ids is None else self.user_ids[idx],
+        )
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Convert every row to a ``Transaction``-shaped dict in one pass.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per row, including metadata fields
+        """
+        n_rows = len(self)
+        labels = [None] * n_rows if self.labels is None else self.labels.tolist()
+        transaction_ids = (
+            [None] * n_rows if self.transaction_ids is None else self.transaction_ids.tolist()
+        )
+        user_ids = [None] * n_rows if self.user_ids is None else self.user_ids.tolist()
+
+        records = []
+        for values, label, transaction_id, user_id in zip(
+            self.features.tolist(), labels, transaction_ids, user_ids
+        ):
+            record = dict(zip(FEATURE_FIELDS, values))
+            record["class_label"] = None if label == UNKNOWN_LABEL else label
+            record["transaction_id"] = transaction_id
+            record["user_id"] = user_id
+            records.append(record)
+        return records
+
+    def to_transactions(self, validate: bool = True) -> List[Transaction]:
+        """
+        Materialize every row as a ``Transaction``.
+
+        Args:
+            validate: Run Pydantic validation (in a single bulk call). Pass False
+                for data that is already trusted, e.g. the bundled dataset.
+
+        Returns:
+            List[Transaction]: One object per row
+        """
+        records = self.to_records()
+        if validate:
+            return _transaction_list_adapter.validate_python(records)
+        return [Transaction.model_construct(**record) for record in records]
+
+
+TransactionInput = Union[Sequence[Transaction], TransactionFrame]
+
+
+def as_frame(transactions: TransactionInput) -> TransactionFrame:
+    """
+    Coerce a list of transactions or an existing frame to a ``TransactionFrame``.
+
+    Args:
+        transactions: Transactions or frame
+
+    Returns:
+        TransactionFrame: The frame (returned as-is if already columnar)
+    """
+    if isinstance(transactions, TransactionFrame):
+        return transactions
+    return TransactionFrame.from_transactions(transactions)
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -13,6 +13,7 @@ class ApproachType(str, Enum):
     NAIVE = "naive"
     RAG = "rag"
     RLM = "rlm"
+    SCORE = "score"  # Local ML scorer, no LLM
 
 
 class Transaction(BaseModel):
@@ -100,6 +101,121 @@ class FraudAnalysisResult(BaseModel):
     )
 
 
+class SectionAnalysisResult(FraudAnalysisResult):
+    """Result for one section of a multi-section (micro-batched) prompt."""
+
+    section: int = Field(..., ge=0, description="Section number the result belongs to")
+
+
+class BatchAnalysisResult(BaseModel):
+    """Structured output of a multi-section prompt: one result per section."""
+
+    results: List[SectionAnalysisResult] = Field(..., description="One result per section")
+
+
+class LLMUsage(BaseModel):
+    """Token usage of a single LLM call."""
+
+    prompt_tokens: int = Field(default=0, description="Tokens in prompt")
+    completion_tokens: int = Field(default=0, description="Tokens in completion")
+    cached_tokens: int = Field(
+        default=0, description="Prompt tokens served from the provider's prompt cache"
+    )
+
+    @property
+    def total_tokens(self) -> int:
+        """Prompt + completion tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+
+class UsageRecord(BaseModel):
+    """Token usage, cost and stage latencies accumulated over one analysis."""
+
+    model: Optional[str] = Field(None, description="Model of the (last) LLM call")
+    llm_calls: int = Field(default=0, description="LLM calls made (incl. replays)")
+    cache_hits: int = Field(default=0, description="LLM calls served from the response cache")
+    prompt_tokens: int = Field(default=0, description="Tokens in prompts")
+    completion_tokens: int = Field(default=0, description="Tokens in completions")
+    cached_tokens: int = Field(default=0, description="Prompt tokens billed at the cached rate")
+    cached_response_tokens: int = Field(
+        default=0, description="Tokens of the original calls behind response cache hits"
+    )
+    cost_usd: float = Field(default=0.0, description="Cost of the LLM calls in USD")
+    stage_latency_ms: Dict[str, float] = Field(
+        default_factory=dict, description="Wall time per analysis stage (e.g. filter, llm)"
+    )
+    escalations: int = Field(default=0, description="Cascade escalations to main_model")
+    tier_calls: Dict[str, int] = Field(default_factory=dict, description="LLM calls per model")
+    tier_latency_ms: Dict[str, float] = Field(
+        default_factory=dict, description="LLM call wall time per model"
+    )
+    tier_cost_usd: Dict[str, float] = Field(default_factory=dict, description="Cost per model")
+
+    @property
+    def total_tokens(self) -> int:
+        """Prompt + completion tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+    def add_call(
+        self, model: str, usage: LLMUsage, cost_usd: float, latency_ms: float = 0.0
+    ) -> None:
+        """Account for one LLM call."""
+        self.model = model
+        self.llm_calls += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        self.cached_tokens += usage.cached_tokens
+        self.cost_usd += cost_usd
+        self.tier_calls[model] = self.tier_calls.get(model, 0) + 1
+        self.tier_latency_ms[model] = self.tier_latency_ms.get(model, 0.0) + latency_ms
+        self.tier_cost_usd[model] = self.tier_cost_usd.get(model, 0.0) + cost_usd
+
+    def add_cache_hit(self, usage: LLMUsage) -> None:
+        """Account for an LLM call served from the response cache (no tokens billed)."""
+        self.cache_hits += 1
+        self.cached_response_tokens += usage.total_tokens
+
+    def add_stage(self, stage: str, latency_ms: float) -> None:
+        """Add wall time to a stage (stages repeated within an analysis accumulate)."""
+        self.stage_latency_ms[stage] = self.stage_latency_ms.get(stage, 0.0) + latency_ms
+
+    def share(self, parts: int) -> "UsageRecord":
+        """
+        Even share of this usage, for one of ``parts`` requests sharing the calls.
+
+        Args:
+            parts: Number of requests the usage is split between
+
+        Returns:
+            UsageRecord: Usage attributed to one request
+        """
+        if parts <= 1:
+            return self.model_copy(deep=True)
+        return UsageRecord(
+            model=self.model,
+            llm_calls=self.llm_calls,
+            cache_hits=self.cache_hits,
+            prompt_tokens=round(self.prompt_tokens / parts),
+            completion_tokens=round(self.completion_tokens / parts),
+            cached_tokens=round(self.cached_tokens / parts),
+            cached_response_tokens=round(self.cached_response_tokens / parts),
+            cost_usd=self.cost_usd / parts,
+            stage_latency_ms=dict(self.stage_latency_ms),
+            escalations=self.escalations,
+            tier_calls=dict(self.tier_calls),
+            tier_latency_ms=dict(self.tier_latency_ms),
+            tier_cost_usd={model: cost / parts for model, cost in self.tier_cost_usd.items()},
+        )
+
+
+class LLMResponse(BaseModel):
+    """Parsed output of an LLM call with its usage."""
+
+    output: Union[FraudAnalysisResult, BatchAnalysisResult]
+    usage: LLMUsage = Field(default_factory=LLMUsage)
+    cached: bool = Field(default=False, description="Served from the response cache")
+
+
 class AnalysisMetrics(BaseModel):
     """Metrics tracked during analysis."""
 
@@ -114,6 +230,40 @@ class AnalysisMetrics(BaseModel):
     # Additional context
     transactions_analyzed: int = Field(..., description="Number of transactions analyzed")
     context_size_chars: Optional[int] = Field(None, description="Size of context in characters")
+    coalesced: bool = Field(
+        default=False,
+        description="Result shared with a concurrent identical request (whose metrics hold "
+        "the tokens and cost)",
+    )
+    batch_size: int = Field(
+        default=1, description="Requests that shared the LLM call (micro-batching)"
+    )
+    queue_wait_ms: float = Field(
+        default=0.0, description="Time LLM calls waited for rate limit / concurrency slots"
+    )
+    model: Optional[str] = Field(None, description="Model that produced the result")
+    llm_calls: int = Field(default=0, description="LLM calls made for this analysis")
+    cached_tokens: int = Field(
+        default=0, description="Prompt tokens billed at the provider's cached rate"
+    )
+    cached_response_tokens: int = Field(
+        default=0,
+        description="Tokens the responses served from the response cache originally used "
+        "(not billed, not in total_tokens)",
+    )
+    stage_latency_ms: Dict[str, float] = Field(
+        default_factory=dict, description="Wall time per analysis stage"
+    )
+    escalations: int = Field(
+        default=0, description="LLM calls escalated from sub_model to main_model (cascade)"
+    )
+    tier_calls: Dict[str, int] = Field(default_factory=dict, description="LLM calls per model")
+    tier_latency_ms: Dict[str, float] = Field(
+        default_factory=dict, description="LLM call wall time per model"
+    )
+    tier_cost_usd: Dict[str, float] = Field(
+        default_factory=dict, description="Cost in USD per model"
+    )
 
 
 class AnalysisRequest(BaseModel):
@@ -155,9 +305,24 @@ class ComparisonResponse(BaseModel):
             "rlm": self.rlm.metrics.total_tokens if self.rlm.metrics else 0,
         }
 
-        # Calculate savings
-        naive_tokens = self.naive.metrics.total_tokens if self.naive.metrics else 1
-        rlm_tokens = self.rlm.metrics.total_tokens if self.rlm.metrics else 0
+        self.summary["cached_response_tokens"] = {
+            "naive": self.naive.metrics.cached_response_tokens if self.naive.metrics else 0,
+            "rag": self.rag.metrics.cached_response_tokens if self.rag.metrics else 0,
+            "rlm": self.rlm.metrics.cached_response_tokens if self.rlm.metrics else 0,
+        }
+
+        # Calculate savings on the tokens each approach needs, whether or not its
+        # response came from the response cache
+        naive_tokens = (
+            self.naive.metrics.total_tokens + self.naive.metrics.cached_response_tokens
+            if self.naive.metrics
+            else 1
+        )
+        rlm_tokens = (
+            self.rlm.metrics.total_tokens + self.rlm.metrics.cached_response_tokens
+            if self.rlm.metrics
+            else 0
+        )
         self.summary["token_savings_pct"] = (
             ((naive_tokens - rlm_tokens) / naive_tokens * 100) if naive_tokens > 0 else 0
         )
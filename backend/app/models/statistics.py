@@ -0,0 +1,144 @@
+"""Precomputed dataset statistics."""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .frame import AMOUNT_COL, DATASET_COLUMNS, TIME_COL
+
+STATS_VERSION = 2
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Resolution of the per-feature percentile table (p0, p1, ..., p100)
+PERCENTILE_POINTS = np.linspace(0.0, 1.0, 101)
+
+# Features profiled per column (Time is only summarized as a range)
+PROFILED_COLUMNS = DATASET_COLUMNS[1:]
+
+
+def quantile_key(q: float) -> str:
+    """Key used for a quantile in ``FeatureStatistics.quantiles`` (0.05 -> "p05")."""
+    return f"p{round(q * 100):02d}"
+
+
+class FeatureStatistics(BaseModel):
+    """Distribution summary of a single feature column."""
+
+    mean: float
+    std: float
+    min: float
+    max: float
+    median: float
+    mad: float = Field(..., description="Median absolute deviation (unscaled)")
+    quantiles: Dict[str, float] = Field(default_factory=dict)
+    percentiles: List[float] = Field(
+        default_factory=list, description="Values at p0, p1, ..., p100"
+    )
+
+
+class DatasetStatistics(BaseModel):
+    """Dataset-level statistics, computed once per dataset version."""
+
+    version: int = STATS_VERSION
+    total_transactions: int
+    fraud_transactions: int
+    time_min: float
+    time_max: float
+    features: Dict[str, FeatureStatistics] = Field(
+        default_factory=dict, description="Per-column stats for V1-V28 and Amount"
+    )
+
+    @classmethod
+    def compute(
+        cls, features: np.ndarray, labels: Optional[np.ndarray] = None
+    ) -> "DatasetStatistics":
+        """
+        Compute statistics from a feature matrix.
+
+        Works column by column so a memory-mapped float32 matrix is never
+        copied in full.
+
+        Args:
+            features: ``(N x 30)`` matrix in ``Time, V1..V28, Amount`` order
+            labels: Optional class labels (1 = fraud)
+
+        Returns:
+            DatasetStatistics: Computed statistics
+        """
+        profiles = {}
+        for name in PROFILED_COLUMNS:
+            column = np.asarray(features[:, DATASET_COLUMNS.index(name)], dtype=np.float64)
+            percentiles = np.quantile(column, PERCENTILE_POINTS)
+            median = float(percentiles[50])
+            profiles[name] = FeatureStatistics(
+                mean=float(column.mean()),
+                std=float(column.std(ddof=1)) if len(column) > 1 else 0.0,
+                min=float(column.min()),
+                max=float(column.max()),
+                median=median,
+                mad=float(np.median(np.abs(column - median))),
+                quantiles={quantile_key(q): float(percentiles[round(q * 100)]) for q in QUANTILES},
+                percentiles=percentiles.tolist(),
+            )
+
+        time = features[:, TIME_COL]
+        return cls(
+            total_transactions=len(features),
+            fraud_transactions=0 if labels is None else int((np.asarray(labels) == 1).sum()),
+            time_min=float(time.min()),
+            time_max=float(time.max()),
+            features=profiles,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> Optional["DatasetStatistics"]:
+        """
+        Read statistics previously written to ``stats.json``.
+
+        Args:
+            path: Path to the JSON file
+
+        Returns:
+            DatasetStatistics, or None if missing or from an older version
+        """
+        try:
+            payload = json.loads(Path(path).read_text())
+        except (OSError, ValueError):
+            return None
+        if payload.get("version") != STATS_VERSION:
+            return None
+        return cls.model_validate(payload)
+
+    @property
+    def amount(self) -> FeatureStatistics:
+        """Statistics of the Amount column."""
+        return self.features[DATASET_COLUMNS[AMOUNT_COL]]
+
+    def to_info(self) -> Dict[str, Any]:
+        """
+        Summarize in the ``DataLoader.get_dataset_info`` format.
+
+        Returns:
+            dict: Dataset information
+        """
+        total = self.total_transactions
+        fraud = self.fraud_transactions
+
+        return {
+            "total_transactions": total,
+            "fraud_transactions": fraud,
+            "legitimate_transactions": total - fraud,
+            "fraud_percentage": round(fraud / total * 100, 2) if total else 0.0,
+            "amount_range": {
+                "min": self.amount.min,
+                "max": self.amount.max,
+                "mean": self.amount.mean,
+            },
+            "time_range": {
+                "min": self.time_min,
+                "max": self.time_max,
+            },
+        }
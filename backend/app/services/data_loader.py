@@ -1,34 +1,49 @@
 """Service for loading and managing Kaggle fraud dataset."""
 
-import random
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 
 from app.core.config import settings
+from app.models.frame import DATASET_COLUMNS, TransactionFrame
 from app.models.schemas import Transaction
+from app.models.statistics import DatasetStatistics
+from app.services.dataset_cache import DatasetCache
 
 
 class DataLoader:
     """Load and manage the Kaggle Credit Card Fraud dataset."""
 
-    def __init__(self, dataset_path: Optional[str] = None):
+    def __init__(self, dataset_path: Optional[str] = None, validate: Optional[bool] = None):
         """
         Initialize data loader.
 
         Args:
             dataset_path: Path to creditcard.csv file
+            validate: Run Pydantic validation when building Transaction objects
+                (defaults to ``settings.validate_dataset_rows``). Disable for
+                trusted data to skip the per-row validation cost.
         """
         self.dataset_path = dataset_path or settings.kaggle_dataset_path
+        self.validate = settings.validate_dataset_rows if validate is None else validate
         self.df: Optional[pd.DataFrame] = None
+        self.frame: Optional[TransactionFrame] = None
+        self.stats: Optional[DatasetStatistics] = None
+        self.rng = np.random.default_rng(settings.sampling_seed)
+        self._class_index: Dict[int, np.ndarray] = {}
+        self._user_index: Dict[str, np.ndarray] = {}
         self._loaded = False
 
     def load_dataset(self) -> pd.DataFrame:
         """
         Load the Kaggle credit card fraud dataset.
 
+        The first load parses the CSV and writes a columnar cache next to it;
+        later loads memory-map that cache (see :class:`DatasetCache`).
+
         Returns:
             pd.DataFrame: Loaded dataset
 
@@ -54,20 +69,104 @@ Or run: python scripts/download_dataset.py
             logger.error(error_msg)
             raise FileNotFoundError(error_msg)
 
-        logger.info(f"Loading dataset from {self.dataset_path}")
-        self.df = pd.read_csv(dataset_file)
+        cache = DatasetCache(dataset_file, dtype=settings.dataset_cache_dtype)
+        self.frame = cache.load() if settings.dataset_cache_enabled else None
+
+        if self.frame is None:
+            logger.info(f"Loading dataset from {self.dataset_path}")
+            self.df = pd.read_csv(dataset_file)
+
+            unsupported = DatasetCache.unsupported_columns(self.df)
+            if unsupported:
+                logger.info(f"Not caching dataset: columns {unsupported} are not cacheable")
+            elif settings.dataset_cache_enabled:
+                try:
+                    cache.save(self.df)
+                    self.frame = cache.load()
+                except OSError as e:
+                    logger.warning(f"Could not write dataset cache: {e}")
+        else:
+            logger.info(f"Loading dataset from cache {cache.cache_dir}")
+
+        if self.frame is not None:
+            self.df = self._frame_to_df(self.frame)
+        self._build_indexes()
+        self.stats = self._load_stats(cache)
         self._loaded = True
 
         logger.info(
             f"Dataset loaded: {len(self.df)} transactions, "
-            f"{self.df['Class'].sum()} fraudulent ({self.df['Class'].sum() / len(self.df) * 100:.2f}%)"
+            f"{len(self._fraud_rows)} fraudulent ({len(self._fraud_rows) / len(self.df) * 100:.2f}%)"
         )
 
         return self.df
 
+    def _load_stats(self, cache: DatasetCache) -> DatasetStatistics:
+        """
+        Read statistics from the cache, or compute (and persist) them.
+
+        Args:
+            cache: Dataset cache for the current file
+
+        Returns:
+            DatasetStatistics: Statistics for the loaded dataset
+        """
+        if self.frame is not None:
+            stats = cache.load_stats()
+            if stats is not None:
+                return stats
+            features, labels = self.frame.features, self.frame.labels
+        else:
+            features = self.df[DATASET_COLUMNS].to_numpy()
+            labels = self.df["Class"].to_numpy() if "Class" in self.df.columns else None
+
+        stats = DatasetStatistics.compute(features, labels)
+        if self.frame is not None:
+            try:
+                cache.save_stats(stats)
+            except OSError as e:
+                logger.warning(f"Could not write dataset statistics: {e}")
+        return stats
+
+    def _build_indexes(self) -> None:
+        """
+        Precompute integer row-index arrays per class and per user.
+
+        Sampling then draws from these arrays, so its cost depends on the
+        sample size rather than on the dataset size.
+        """
+        if "Class" in self.df.columns:
+            labels = self.df["Class"].to_numpy()
+            self._class_index = {
+                int(label): np.flatnonzero(labels == label) for label in np.unique(labels)
+            }
+        if "user_id" in self.df.columns:
+            self._user_index = {
+                str(user_id): rows for user_id, rows in self.df.groupby("user_id").indices.items()
+            }
+
+    @property
+    def _fraud_rows(self) -> np.ndarray:
+        """Row indices of fraudulent transactions."""
+        return self._class_index.get(1, np.empty(0, dtype=np.intp))
+
+    @property
+    def _legit_rows(self) -> np.ndarray:
+        """Row indices of legitimate transactions."""
+        return self._class_index.get(0, np.empty(0, dtype=np.intp))
+
+    def _get_rng(self, seed: Optional[int]) -> np.random.Generator:
+        """Return a fresh generator for an explicit seed, else the shared one."""
+        return self.rng if seed is None else np.random.default_rng(seed)
+
     def get_sample_transactions(
-        self, n: int = 10, include_fraud: bool = True, fraud_ratio: float = 0.2
-    ) -> List[Transaction]:
+        self,
+        n: int = 10,
+        include_fraud: bool = True,
+        fraud_ratio: float = 0.2,
+        columnar: bool = False,
+        seed: Optional[int] = None,
+    ) -> Union[List[Transaction], TransactionFrame]:
         """
         Get a sample of transactions.
 
@@ -75,158 +174,186 @@ Or run: python scripts/download_dataset.py
             n: Number of transactions to return
             include_fraud: Whether to include fraudulent transactions
             fraud_ratio: Ratio of fraudulent to legitimate (if include_fraud=True)
+            columnar: Return a TransactionFrame instead of a list
+            seed: Seed for a reproducible (stratified) sample
 
         Returns:
-            List[Transaction]: Sample transactions
+            Sample transactions
         """
         if self.df is None:
             self.load_dataset()
 
+        rng = self._get_rng(seed)
+
         if not include_fraud:
             # Only legitimate transactions
-            sample_df = self.df[self.df["Class"] == 0].sample(n=n)
+            rows = rng.choice(self._legit_rows, size=n, replace=False)
         else:
             # Mix of fraud and legitimate
             n_fraud = int(n * fraud_ratio)
             n_legit = n - n_fraud
 
-            fraud_df = self.df[self.df["Class"] == 1].sample(n=min(n_fraud, (self.df["Class"] == 1).sum()))
-            legit_df = self.df[self.df["Class"] == 0].sample(n=n_legit)
+            rows = np.concatenate(
+                [
+                    rng.choice(
+                        self._fraud_rows, size=min(n_fraud, len(self._fraud_rows)), replace=False
+                    ),
+                    rng.choice(self._legit_rows, size=n_legit, replace=False),
+                ]
+            )
+            rng.shuffle(rows)
 
-            sample_df = pd.concat([fraud_df, legit_df]).sample(frac=1).reset_index(drop=True)
+        sample_df = self.df.iloc[rows]
+        if include_fraud:
+            sample_df = sample_df.reset_index(drop=True)
 
-        return self._df_to_transactions(sample_df)
+        return self._convert(sample_df, columnar)
 
     def get_transaction_batch(
-        self, start_idx: int = 0, batch_size: int = 100
-    ) -> List[Transaction]:
+        self, start_idx: int = 0, batch_size: int = 100, columnar: bool = False
+    ) -> Union[List[Transaction], TransactionFrame]:
         """
         Get a batch of consecutive transactions.
 
         Args:
             start_idx: Starting index
             batch_size: Number of transactions
+            columnar: Return a TransactionFrame instead of a list
 
         Returns:
-            List[Transaction]: Batch of transactions
+            Batch of transactions
         """
         if self.df is None:
             self.load_dataset()
 
         batch_df = self.df.iloc[start_idx : start_idx + batch_size]
-        return self._df_to_transactions(batch_df)
+        return self._convert(batch_df, columnar)
 
-    def get_fraud_cases(self, n: int = 10) -> List[Transaction]:
+    def get_fraud_cases(
+        self, n: int = 10, columnar: bool = False, seed: Optional[int] = None
+    ) -> Union[List[Transaction], TransactionFrame]:
         """
         Get known fraud cases (for testing).
 
         Args:
             n: Number of fraud cases
+            columnar: Return a TransactionFrame instead of a list
+            seed: Seed for a reproducible sample
 
         Returns:
-            List[Transaction]: Fraud transactions
+            Fraud transactions
         """
         if self.df is None:
             self.load_dataset()
 
-        fraud_df = self.df[self.df["Class"] == 1].sample(n=min(n, (self.df["Class"] == 1).sum()))
-        return self._df_to_transactions(fraud_df)
+        rows = self._get_rng(seed).choice(
+            self._fraud_rows, size=min(n, len(self._fraud_rows)), replace=False
+        )
+        return self._convert(self.df.iloc[rows], columnar)
 
-    def get_legitimate_cases(self, n: int = 10) -> List[Transaction]:
+    def get_legitimate_cases(
+        self, n: int = 10, columnar: bool = False, seed: Optional[int] = None
+    ) -> Union[List[Transaction], TransactionFrame]:
         """
         Get legitimate transactions (for testing).
 
         Args:
             n: Number of legitimate transactions
+            columnar: Return a TransactionFrame instead of a list
+            seed: Seed for a reproducible sample
 
         Returns:
-            List[Transaction]: Legitimate transactions
+            Legitimate transactions
         """
         if self.df is None:
             self.load_dataset()
 
-        legit_df = self.df[self.df["Class"] == 0].sample(n=n)
-        return self._df_to_transactions(legit_df)
+        rows = self._get_rng(seed).choice(self._legit_rows, size=n, replace=False)
+        return self._convert(self.df.iloc[rows], columnar)
+
+    def get_user_transactions(
+        self, user_id: str, columnar: bool = False
+    ) -> Union[List[Transaction], TransactionFrame]:
+        """
+        Get all transactions of one user (datasets with a ``user_id`` column).
+
+        Args:
+            user_id: User/card identifier
+            columnar: Return a TransactionFrame instead of a list
+
+        Returns:
+            The user's transactions in dataset order (empty if unknown)
+        """
+        if self.df is None:
+            self.load_dataset()
+
+        rows = self._user_index.get(user_id, np.empty(0, dtype=np.intp))
+        return self._convert(self.df.iloc[rows], columnar)
+
+    @staticmethod
+    def _frame_to_df(frame: TransactionFrame) -> pd.DataFrame:
+        """
+        Wrap a (memory-mapped) frame in a DataFrame without copying features.
+
+        Args:
+            frame: Frame loaded from the dataset cache
+
+        Returns:
+            pd.DataFrame: DataFrame in the creditcard.csv column layout
+        """
+        df = pd.DataFrame(frame.features, columns=DATASET_COLUMNS, copy=False)
+        if frame.labels is not None:
+            df["Class"] = frame.labels
+        if frame.user_ids is not None:
+            df["user_id"] = frame.user_ids
+        return df
+
+    def _convert(
+        self, df: pd.DataFrame, columnar: bool
+    ) -> Union[List[Transaction], TransactionFrame]:
+        """
+        Convert a DataFrame slice to the requested batch representation.
+
+        Args:
+            df: DataFrame with transaction data
+            columnar: Return a TransactionFrame instead of a list
+
+        Returns:
+            TransactionFrame or list of Transaction objects
+        """
+        if columnar:
+            return TransactionFrame.from_dataframe(df)
+        return self._df_to_transactions(df)
 
     def _df_to_transactions(self, df: pd.DataFrame) -> List[Transaction]:
         """
         Convert DataFrame to list of Transaction objects.
 
+        Goes through the DataFrame's NumPy block in one pass instead of
+        creating a Series per row.
+
         Args:
             df: DataFrame with transaction data
 
         Returns:
             List[Transaction]: Converted transactions
         """
-        transactions = []
-
-        for idx, row in df.iterrows():
-            transaction = Transaction(
-                time=row["Time"],
-                amount=row["Amount"],
-                v1=row["V1"],
-                v2=row["V2"],
-                v3=row["V3"],
-                v4=row["V4"],
-                v5=row["V5"],
-                v6=row["V6"],
-                v7=row["V7"],
-                v8=row["V8"],
-                v9=row["V9"],
-                v10=row["V10"],
-                v11=row["V11"],
-                v12=row["V12"],
-                v13=row["V13"],
-                v14=row["V14"],
-                v15=row["V15"],
-                v16=row["V16"],
-                v17=row["V17"],
-                v18=row["V18"],
-                v19=row["V19"],
-                v20=row["V20"],
-                v21=row["V21"],
-                v22=row["V22"],
-                v23=row["V23"],
-                v24=row["V24"],
-                v25=row["V25"],
-                v26=row["V26"],
-                v27=row["V27"],
-                v28=row["V28"],
-                class_label=int(row["Class"]) if "Class" in row else None,
-                transaction_id=f"txn_{idx}",
-            )
-            transactions.append(transaction)
-
-        return transactions
+        return TransactionFrame.from_dataframe(df).to_transactions(validate=self.validate)
 
     def get_dataset_info(self) -> dict:
         """
         Get dataset statistics.
 
+        Served from statistics computed once at load time (and persisted
+        with the dataset cache), so repeated calls do not rescan the data.
+
         Returns:
             dict: Dataset information
         """
         if self.df is None:
             self.load_dataset()
 
-        fraud_count = int(self.df["Class"].sum())
-        total_count = len(self.df)
-
-        return {
-            "total_transactions": total_count,
-            "fraud_transactions": fraud_count,
-            "legitimate_transactions": total_count - fraud_count,
-            "fraud_percentage": round(fraud_count / total_count * 100, 2),
-            "amount_range": {
-                "min": float(self.df["Amount"].min()),
-                "max": float(self.df["Amount"].max()),
-                "mean": float(self.df["Amount"].mean()),
-            },
-            "time_range": {
-                "min": float(self.df["Time"].min()),
-                "max": float(self.df["Time"].max()),
-            },
-        }
+        return self.stats.to_info()
 
 
 # Singleton instance
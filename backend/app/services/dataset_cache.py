@@ -0,0 +1,225 @@
+"""Columnar on-disk cache for the Kaggle dataset.
+
+The first load of ``creditcard.csv`` writes the feature matrix, labels and
+user ids as ``.npy`` files, plus precomputed statistics, into a cache
+directory next to the CSV. Later loads memory-map those files instead of parsing the CSV, so
+startup takes milliseconds and several worker processes share the same
+physical pages.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.core.config import dataset_cache_dir
+from app.models.frame import DATASET_COLUMNS, TransactionFrame
+from app.models.statistics import DatasetStatistics
+
+CACHE_VERSION = 2
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+USER_IDS_FILE = "user_ids.npy"
+META_FILE = "meta.json"
+STATS_FILE = "stats.json"
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        str: Hex digest
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class DatasetCache:
+    """Memory-mapped ``.npy`` cache for a ``creditcard.csv``-format file."""
+
+    # Columns besides the features that the cache stores
+    STORED_COLUMNS = ("Class", "user_id")
+
+    def __init__(self, source_path: Path, dtype: str = "float64"):
+        """
+        Initialize the cache.
+
+        Args:
+            source_path: Path to the source CSV
+            dtype: Float dtype used for the cached feature matrix (float32
+                halves its size but rounds the CSV values)
+        """
+        self.source_path = Path(source_path)
+        self.dtype = np.dtype(dtype)
+        self.cache_dir = dataset_cache_dir(self.source_path)
+
+    def _source_stat(self) -> Dict[str, int]:
+        """Size and mtime of the source file."""
+        stat = self.source_path.stat()
+        return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        """Read cache metadata, or None if missing/unreadable."""
+        try:
+            return json.loads((self.cache_dir / META_FILE).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, name: str, payload: Dict[str, Any]) -> None:
+        """Atomically write a JSON file into the cache directory."""
+        tmp_path = self.cache_dir / f".{name}.tmp"
+        tmp_path.write_text(json.dumps(payload, indent=2))
+        os.replace(tmp_path, self.cache_dir / name)
+
+    def _save_array(self, name: str, array: np.ndarray) -> None:
+        """Atomically write a ``.npy`` file into the cache directory."""
+        tmp_path = self.cache_dir / f".{name}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, self.cache_dir / name)
+
+    def is_valid(self) -> bool:
+        """
+        Check whether the cache matches the current source file.
+
+        A matching size and mtime is trusted as-is. If only the mtime changed
+        (e.g. the file was copied or touched), the content hash decides, and the
+        stored mtime is refreshed when the content is unchanged.
+
+        Returns:
+            bool: True if the cache can be used
+        """
+        meta = self._read_meta()
+        if meta is None or meta.get("version") != CACHE_VERSION:
+            return False
+        if meta.get("dtype") != self.dtype.name or meta.get("columns") != DATASET_COLUMNS:
+            return False
+
+        stat = self._source_stat()
+        if meta.get("source_size") != stat["source_size"]:
+            return False
+        if meta.get("source_mtime_ns") == stat["source_mtime_ns"]:
+            return True
+
+        if meta.get("source_sha256") != file_sha256(self.source_path):
+            return False
+
+        meta.update(stat)
+        try:
+            self._write_json(META_FILE, meta)
+        except OSError as e:
+            logger.warning(f"Could not refresh dataset cache metadata: {e}")
+        return True
+
+    def load(self) -> Optional[TransactionFrame]:
+        """
+        Memory-map the cached dataset.
+
+        Returns:
+            TransactionFrame backed by read-only memory maps, or None if the
+            cache is missing or stale
+        """
+        if not self.is_valid():
+            return None
+
+        try:
+            features = np.load(self.cache_dir / FEATURES_FILE, mmap_mode="r")
+            labels_path = self.cache_dir / LABELS_FILE
+            labels = np.load(labels_path, mmap_mode="r") if labels_path.exists() else None
+            users_path = self.cache_dir / USER_IDS_FILE
+            user_ids = np.load(users_path).astype(object) if users_path.exists() else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dataset cache unreadable, falling back to CSV: {e}")
+            return None
+
+        return TransactionFrame(features=features, labels=labels, user_ids=user_ids)
+
+    @classmethod
+    def unsupported_columns(cls, df: pd.DataFrame) -> List[str]:
+        """
+        Columns of a dataset the cache cannot reproduce.
+
+        Args:
+            df: Dataset parsed from the source CSV
+
+        Returns:
+            Names of extra columns (and of a ``user_id`` column with missing values)
+        """
+        known = set(DATASET_COLUMNS) | set(cls.STORED_COLUMNS)
+        unsupported = [column for column in df.columns if column not in known]
+        if "user_id" in df.columns and df["user_id"].isna().any():
+            unsupported.append("user_id")
+        return unsupported
+
+    def save(self, df: pd.DataFrame) -> None:
+        """
+        Write the dataset to the cache.
+
+        Statistics are computed from the cached (possibly float32) matrix so
+        they match what later loads see. Metadata is written last, so a
+        partially written cache is never considered valid.
+
+        Args:
+            df: Dataset parsed from the source CSV
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / META_FILE).unlink(missing_ok=True)
+
+        features = np.ascontiguousarray(df[DATASET_COLUMNS].to_numpy(dtype=self.dtype))
+        self._save_array(FEATURES_FILE, features)
+        if "Class" in df.columns:
+            self._save_array(LABELS_FILE, df["Class"].to_numpy(dtype=np.int8))
+        else:
+            (self.cache_dir / LABELS_FILE).unlink(missing_ok=True)
+        if "user_id" in df.columns:
+            self._save_array(USER_IDS_FILE, df["user_id"].astype(str).to_numpy(dtype=str))
+        else:
+            (self.cache_dir / USER_IDS_FILE).unlink(missing_ok=True)
+
+        stats = DatasetStatistics.compute(
+            features, df["Class"].to_numpy() if "Class" in df.columns else None
+        )
+        self._write_json(STATS_FILE, stats.model_dump())
+
+        self._write_json(
+            META_FILE,
+            {
+                "version": CACHE_VERSION,
+                "dtype": self.dtype.name,
+                "columns": DATASET_COLUMNS,
+                "rows": len(df),
+                "source_sha256": file_sha256(self.source_path),
+                **self._source_stat(),
+            },
+        )
+        logger.info(f"Wrote dataset cache to {self.cache_dir}")
+
+    def load_stats(self) -> Optional[DatasetStatistics]:
+        """
+        Read precomputed statistics.
+
+        Only call after :meth:`load` succeeded; statistics share the cache's
+        validity.
+
+        Returns:
+            DatasetStatistics, or None if missing or from an older version
+        """
+        return DatasetStatistics.load(self.cache_dir / STATS_FILE)
+
+    def save_stats(self, stats: DatasetStatistics) -> None:
+        """
+        Persist statistics into an existing, valid cache.
+
+        Args:
+            stats: Statistics to store
+        """
+        self._write_json(STATS_FILE, stats.model_dump())
@@ -1,39 +1,250 @@
 """Fraud detection service coordinating all three approaches."""
 
 import asyncio
+import threading
 import time
-from typing import List, Tuple
+import weakref
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Tuple
 
+import numpy as np
 from loguru import logger
 
-from app.agents import NaiveFraudAgent, RAGFraudAgent, RLMFraudAgent
+from app import agents
+from app.agents.executor import get_cpu_executor
+from app.agents.ml_scorer import MLScorer, get_ml_scorer
+from app.agents.rate_limiter import track_llm_calls
+from app.agents.usage import stage, track_usage
+from app.core.config import settings
+from app.models.frame import TransactionFrame, TransactionInput, as_frame
 from app.models.schemas import (
     AnalysisMetrics,
     AnalysisResponse,
     ApproachType,
     ComparisonResponse,
     FraudAnalysisResult,
-    Transaction,
+    UsageRecord,
 )
 
+from .micro_batcher import MicroBatcher
+
+if TYPE_CHECKING:
+    from app.agents import NaiveFraudAgent, RAGFraudAgent, RLMFraudAgent
+    from app.agents.base_agent import BaseFraudAgent
+
+# Runs one analysis, returning the result, its usage and the number of requests sharing its LLM call
+AnalysisRunner = Callable[
+    [TransactionFrame], Awaitable[Tuple[FraudAnalysisResult, UsageRecord, int]]
+]
+
+# In-flight analyses of one event loop by (approach, batch fingerprint)
+InFlight = Dict[Tuple[ApproachType, str], asyncio.Task]
+
+# Rows listed in the patterns of a score result
+SCORE_TOP_ROWS = 5
+
+# Agent class (exported by app.agents) of each LLM approach
+AGENT_CLASSES: Dict[ApproachType, str] = {
+    ApproachType.NAIVE: "NaiveFraudAgent",
+    ApproachType.RAG: "RAGFraudAgent",
+    ApproachType.RLM: "RLMFraudAgent",
+}
+
 
 class FraudDetectionService:
     """Service for fraud detection using Naive, RAG, and RLM approaches."""
 
     def __init__(self):
-        """Initialize fraud detection service."""
-        self.naive_agent = NaiveFraudAgent()
-        self.rag_agent = RAGFraudAgent()
-        self.rlm_agent = RLMFraudAgent()
+        """
+        Initialize fraud detection service.
+
+        Agents are built on the first request for their approach, so startup
+        does not import the LLM stack or build prompts for unused approaches.
+        """
+        self._agents: Dict[ApproachType, "BaseFraudAgent"] = {}
+
+        # Single-flight: (approach, batch fingerprint) -> in-flight analysis, per event
+        # loop (the dashboard runs one loop per session thread)
+        self._in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, InFlight]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._in_flight_lock = threading.Lock()
+        self.coalesced_requests = 0
+
+        # Opt-in micro-batching of small RLM requests (created with the RLM agent)
+        self._rlm_batcher: Optional[MicroBatcher] = None
+
+    def get_agent(self, approach: ApproachType) -> "BaseFraudAgent":
+        """
+        Get the agent of an approach, building it on first use.
+
+        Args:
+            approach: Analysis approach
+
+        Returns:
+            BaseFraudAgent: Shared agent instance
+
+        Raises:
+            ValueError: For ``score``, which runs the local ML scorer, not an agent
+                (see :meth:`analyze_score`)
+        """
+        if approach not in AGENT_CLASSES:
+            raise ValueError(
+                f"The {approach.value} approach has no LLM agent; use analyze_{approach.value}()"
+            )
+        agent = self._agents.get(approach)
+        if agent is None:
+            start = time.perf_counter()
+            agent = self._agents[approach] = getattr(agents, AGENT_CLASSES[approach])()
+            logger.info(
+                f"Built {approach.value} agent in {(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+        return agent
+
+    @property
+    def naive_agent(self) -> "NaiveFraudAgent":
+        """Naive agent (built on first access)."""
+        return self.get_agent(ApproachType.NAIVE)
+
+    @property
+    def rag_agent(self) -> "RAGFraudAgent":
+        """RAG agent (built on first access)."""
+        return self.get_agent(ApproachType.RAG)
+
+    @property
+    def rlm_agent(self) -> "RLMFraudAgent":
+        """RLM agent (built on first access)."""
+        return self.get_agent(ApproachType.RLM)
+
+    @property
+    def rlm_batcher(self) -> Optional[MicroBatcher]:
+        """Micro-batcher of small RLM requests (None unless enabled)."""
+        if self._rlm_batcher is None and settings.micro_batch_enabled:
+            self._rlm_batcher = MicroBatcher(
+                self.rlm_agent.analyze_batch,
+                window_ms=settings.micro_batch_window_ms,
+                max_requests=settings.micro_batch_max_requests,
+            )
+        return self._rlm_batcher
+
+    @staticmethod
+    def _direct(agent: "BaseFraudAgent") -> AnalysisRunner:
+        """Runner calling the agent on its own."""
+
+        async def run(
+            transactions: TransactionFrame,
+        ) -> Tuple[FraudAnalysisResult, UsageRecord, int]:
+            result, usage = await agent.analyze_with_usage(transactions)
+            return result, usage, 1
+
+        return run
+
+    async def _run_rlm(
+        self, transactions: TransactionFrame
+    ) -> Tuple[FraudAnalysisResult, UsageRecord, int]:
+        """Run RLM, through the micro-batcher for small requests when enabled."""
+        if (
+            self.rlm_batcher is not None
+            and len(transactions) <= settings.micro_batch_max_transactions
+        ):
+            return await self.rlm_batcher.submit(transactions)
+        result, usage = await self.rlm_agent.analyze_with_usage(transactions)
+        return result, usage, 1
+
+    async def _run_single_flight(
+        self, approach: ApproachType, run: AnalysisRunner, transactions: TransactionFrame
+    ) -> Tuple[FraudAnalysisResult, UsageRecord, int, bool]:
+        """
+        Run an analysis, sharing one in-flight call between identical requests.
+
+        Concurrent callers on the same event loop with the same approach and
+        batch fingerprint await the same task. Tasks are never shared across
+        loops. The task is shielded, so one caller disconnecting does not
+        cancel the analysis for the others.
+
+        Args:
+            approach: Approach, part of the deduplication key
+            run: Runner performing the analysis
+            transactions: Batch to analyze
+
+        Returns:
+            Tuple of the caller's own copy of the result, the usage of the
+            analysis (empty for coalesced callers, so the shared calls are
+            counted once), the micro-batch size, and whether the result was
+            shared with an earlier request
+        """
+        if not settings.single_flight_enabled:
+            result, usage, batch_size = await run(transactions)
+            return result, usage, batch_size, False
+
+        key = (approach, transactions.fingerprint())
+        loop = asyncio.get_running_loop()
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(loop)
+            if in_flight is None:
+                in_flight = self._in_flight[loop] = {}
+            task = in_flight.get(key)
+            coalesced = task is not None
+            if task is None:
+                task = in_flight[key] = loop.create_task(run(transactions))
+
+        if not coalesced:
+
+            def _release(done: asyncio.Task) -> None:
+                with self._in_flight_lock:
+                    if in_flight.get(key) is done:
+                        del in_flight[key]
+
+            task.add_done_callback(_release)
+        else:
+            self.coalesced_requests += 1
+            logger.info(f"Coalesced {approach.value} request onto in-flight analysis")
+
+        result, usage, batch_size = await asyncio.shield(task)
+        # The leader reports the calls; followers made none of their own
+        usage = UsageRecord(model=usage.model) if coalesced else usage.model_copy(deep=True)
+        return result.model_copy(deep=True), usage, batch_size, coalesced
+
+    @staticmethod
+    def _metrics(
+        approach: ApproachType,
+        usage: UsageRecord,
+        latency_ms: float,
+        transactions_analyzed: int,
+        batch_size: int,
+        coalesced: bool,
+        queue_wait_ms: float,
+    ) -> AnalysisMetrics:
+        """Build the metrics of one analysis from its usage record."""
+        return AnalysisMetrics(
+            approach=approach,
+            total_tokens=usage.total_tokens,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            cached_tokens=usage.cached_tokens,
+            cached_response_tokens=usage.cached_response_tokens,
+            latency_ms=latency_ms,
+            cost_usd=round(usage.cost_usd, 6),
+            transactions_analyzed=transactions_analyzed,
+            coalesced=coalesced,
+            batch_size=batch_size,
+            queue_wait_ms=queue_wait_ms,
+            model=usage.model,
+            llm_calls=usage.llm_calls,
+            stage_latency_ms=usage.stage_latency_ms,
+            escalations=usage.escalations,
+            tier_calls=usage.tier_calls,
+            tier_latency_ms=usage.tier_latency_ms,
+            tier_cost_usd={model: round(cost, 6) for model, cost in usage.tier_cost_usd.items()},
+        )
 
     async def analyze_naive(
-        self, transactions: List[Transaction]
+        self, transactions: TransactionInput
     ) -> Tuple[FraudAnalysisResult, AnalysisMetrics]:
         """
         Analyze using naive LLM approach.
 
         Args:
-            transactions: Transactions to analyze
+            transactions: Transactions (list or TransactionFrame) to analyze
 
         Returns:
             Tuple[FraudAnalysisResult, AnalysisMetrics]: Result and metrics
@@ -41,30 +252,32 @@ class FraudDetectionService:
         start_time = time.time()
         logger.info(f"Starting naive analysis for {len(transactions)} transactions")
 
-        result = await self.naive_agent.analyze(transactions)
+        with track_llm_calls() as calls:
+            result, usage, batch_size, coalesced = await self._run_single_flight(
+                ApproachType.NAIVE, self._direct(self.naive_agent), as_frame(transactions)
+            )
         latency_ms = (time.time() - start_time) * 1000
 
-        # Create metrics (simplified - would extract from agent in production)
-        metrics = AnalysisMetrics(
-            approach=ApproachType.NAIVE,
-            total_tokens=5000,  # Placeholder - would get from agent
-            prompt_tokens=4500,
-            completion_tokens=500,
-            latency_ms=latency_ms,
-            cost_usd=0.05,  # Placeholder
-            transactions_analyzed=len(transactions),
+        metrics = self._metrics(
+            ApproachType.NAIVE,
+            usage,
+            latency_ms,
+            len(transactions),
+            batch_size,
+            coalesced,
+            calls.queue_wait_ms,
         )
 
         return result, metrics
 
     async def analyze_rag(
-        self, transactions: List[Transaction]
+        self, transactions: TransactionInput
     ) -> Tuple[FraudAnalysisResult, AnalysisMetrics]:
         """
         Analyze using RAG approach.
 
         Args:
-            transactions: Transactions to analyze
+            transactions: Transactions (list or TransactionFrame) to analyze
 
         Returns:
             Tuple[FraudAnalysisResult, AnalysisMetrics]: Result and metrics
@@ -72,30 +285,32 @@ class FraudDetectionService:
         start_time = time.time()
         logger.info(f"Starting RAG analysis for {len(transactions)} transactions")
 
-        result = await self.rag_agent.analyze(transactions)
+        with track_llm_calls() as calls:
+            result, usage, batch_size, coalesced = await self._run_single_flight(
+                ApproachType.RAG, self._direct(self.rag_agent), as_frame(transactions)
+            )
         latency_ms = (time.time() - start_time) * 1000
 
-        # Create metrics
-        metrics = AnalysisMetrics(
-            approach=ApproachType.RAG,
-            total_tokens=3500,  # Placeholder
-            prompt_tokens=3000,
-            completion_tokens=500,
-            latency_ms=latency_ms,
-            cost_usd=0.035,  # Placeholder
-            transactions_analyzed=len(transactions),
+        metrics = self._metrics(
+            ApproachType.RAG,
+            usage,
+            latency_ms,
+            len(transactions),
+            batch_size,
+            coalesced,
+            calls.queue_wait_ms,
         )
 
         return result, metrics
 
     async def analyze_rlm(
-        self, transactions: List[Transaction]
+        self, transactions: TransactionInput
     ) -> Tuple[FraudAnalysisResult, AnalysisMetrics]:
         """
         Analyze using RLM approach.
 
         Args:
-            transactions: Transactions to analyze
+            transactions: Transactions (list or TransactionFrame) to analyze
 
         Returns:
             Tuple[FraudAnalysisResult, AnalysisMetrics]: Result and metrics
@@ -103,34 +318,101 @@ class FraudDetectionService:
         start_time = time.time()
         logger.info(f"Starting RLM analysis for {len(transactions)} transactions")
 
-        result = await self.rlm_agent.analyze(transactions)
+        with track_llm_calls() as calls:
+            result, usage, batch_size, coalesced = await self._run_single_flight(
+                ApproachType.RLM, self._run_rlm, as_frame(transactions)
+            )
         latency_ms = (time.time() - start_time) * 1000
 
-        # Create metrics
-        metrics = AnalysisMetrics(
-            approach=ApproachType.RLM,
-            total_tokens=800,  # Placeholder - RLM should be much more efficient!
-            prompt_tokens=600,
-            completion_tokens=200,
-            latency_ms=latency_ms,
-            cost_usd=0.008,  # Placeholder - much cheaper!
-            transactions_analyzed=len(transactions),
+        metrics = self._metrics(
+            ApproachType.RLM,
+            usage,
+            latency_ms,
+            len(transactions),
+            batch_size,
+            coalesced,
+            calls.queue_wait_ms,
         )
 
         return result, metrics
 
-    async def compare_all(self, transactions: List[Transaction]) -> ComparisonResponse:
+    async def analyze_score(
+        self, transactions: TransactionInput
+    ) -> Tuple[FraudAnalysisResult, AnalysisMetrics]:
+        """
+        Analyze with the local ML scorer only (no LLM calls, zero tokens).
+
+        Args:
+            transactions: Transactions (list or TransactionFrame) to analyze
+
+        Returns:
+            Tuple[FraudAnalysisResult, AnalysisMetrics]: Result and metrics
+
+        Raises:
+            RuntimeError: If no trained scorer exists at ``ML_SCORER_PATH``
+        """
+        start_time = time.time()
+        scorer = get_ml_scorer()
+        if scorer is None:
+            raise RuntimeError(
+                f"No trained ML scorer at {settings.ml_scorer_path}; "
+                "train one with scripts/train_ml_scorer.py"
+            )
+
+        frame = as_frame(transactions)
+        with track_usage() as usage, stage("score"):
+            probability = await get_cpu_executor().run_array(
+                len(frame), scorer.predict_proba, frame.features
+            )
+        usage.model = f"local:{scorer.kind}"
+        result = self._score_result(scorer, probability)
+        latency_ms = (time.time() - start_time) * 1000
+
+        logger.info(
+            f"Score analysis complete: Fraud={result.is_fraud}, "
+            f"Flagged={len(result.flagged_transactions)}/{len(frame)}, Latency={latency_ms:.1f}ms"
+        )
+        metrics = self._metrics(ApproachType.SCORE, usage, latency_ms, len(frame), 1, False, 0.0)
+        return result, metrics
+
+    @staticmethod
+    def _score_result(scorer: MLScorer, probability: np.ndarray) -> FraudAnalysisResult:
+        """Build the analysis result of per-row fraud probabilities."""
+        flagged = np.flatnonzero(probability >= scorer.threshold)
+        top = flagged[np.argsort(-probability[flagged], kind="stable")][:SCORE_TOP_ROWS]
+        highest = float(probability.max()) if len(probability) else 0.0
+        is_fraud = len(flagged) > 0
+        return FraudAnalysisResult(
+            is_fraud=is_fraud,
+            confidence=round(highest if is_fraud else 1 - highest, 4),
+            risk_score=round(highest * 100, 2),
+            reasoning=(
+                f"Local {scorer.kind} model scored {len(probability)} transactions without an "
+                f"LLM: {len(flagged)} at or above the fraud probability threshold "
+                f"{scorer.threshold:.3g} (highest {highest:.3f})."
+            ),
+            suspicious_patterns=[
+                f"Row #{row}: fraud probability {probability[row]:.3f}" for row in top
+            ],
+            citations=[f"Scored by the {scorer.describe()}"],
+            flagged_transactions=[int(row) for row in flagged],
+        )
+
+    async def compare_all(self, transactions: TransactionInput) -> ComparisonResponse:
         """
         Run all three approaches in parallel and compare results.
 
         Args:
-            transactions: Transactions to analyze
+            transactions: Transactions (list or TransactionFrame) to analyze
 
         Returns:
             ComparisonResponse: Comparison of all approaches
         """
         logger.info(f"Running comparison analysis for {len(transactions)} transactions")
 
+        # Convert once so all three agents share the same columnar batch
+        transactions = as_frame(transactions)
+
         # Run all three in parallel
         results = await asyncio.gather(
             self.analyze_naive(transactions),
@@ -175,6 +457,18 @@ class FraudDetectionService:
 
         return comparison
 
+    def cascade_stats(self) -> dict:
+        """Model cascade settings and escalation counters of the agents built so far."""
+        return {
+            "enabled": settings.cascade_enabled,
+            "sub_model": settings.sub_model,
+            "main_model": settings.main_model,
+            "min_confidence": settings.cascade_min_confidence,
+            "approaches": {
+                approach.value: agent.cascade_stats() for approach, agent in self._agents.items()
+            },
+        }
+
 
 # Singleton instance
 fraud_service = FraudDetectionService()
@@ -0,0 +1,124 @@
+"""Micro-batching of small analysis requests into shared LLM calls."""
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.agents.usage import track_usage
+from app.models.frame import TransactionFrame
+from app.models.schemas import FraudAnalysisResult, UsageRecord
+
+# Analyzes several independent batches, returning one result per batch
+BatchRunner = Callable[[List[TransactionFrame]], Awaitable[List[FraudAnalysisResult]]]
+
+# A queued request and the future its caller awaits
+PendingRequest = Tuple[TransactionFrame, asyncio.Future]
+
+
+@dataclass
+class _LoopQueue:
+    """Pending requests of one event loop, with the timer and tasks bound to it."""
+
+    pending: List[PendingRequest] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+    tasks: Set[asyncio.Task] = field(default_factory=set)
+
+
+class MicroBatcher:
+    """
+    Collects requests for a short window, then analyzes them together.
+
+    A batch is flushed when ``max_requests`` requests are pending or
+    ``window_ms`` has passed since the first one arrived, whichever comes first.
+    Requests are only batched with others from the same event loop (the
+    dashboard runs one loop per session thread), since futures, timers and
+    tasks belong to the loop that created them.
+    """
+
+    def __init__(self, run_batch: BatchRunner, window_ms: float = 20.0, max_requests: int = 8):
+        """
+        Initialize the batcher.
+
+        Args:
+            run_batch: Coroutine analyzing a list of batches (e.g. ``RLMFraudAgent.analyze_batch``)
+            window_ms: Maximum time to wait for more requests
+            max_requests: Flush as soon as this many requests are pending
+        """
+        self.run_batch = run_batch
+        self.window_ms = window_ms
+        self.max_requests = max_requests
+
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopQueue]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+        self.batches_run = 0
+        self.requests_batched = 0
+
+    async def submit(
+        self, transactions: TransactionFrame
+    ) -> Tuple[FraudAnalysisResult, UsageRecord, int]:
+        """
+        Queue a request and wait for its share of the batch result.
+
+        Args:
+            transactions: Batch to analyze
+
+        Returns:
+            Tuple of the result, this request's even share of the batch usage,
+            and the number of requests in the shared call
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            queue = self._queues.get(loop)
+            if queue is None:
+                queue = self._queues[loop] = _LoopQueue()
+            queue.pending.append((transactions, future))
+
+        if len(queue.pending) >= self.max_requests:
+            self._flush(queue)
+        elif queue.timer is None:
+            queue.timer = loop.call_later(self.window_ms / 1000, self._flush, queue)
+
+        return await future
+
+    def _flush(self, queue: _LoopQueue) -> None:
+        """Start analyzing everything pending on a loop (called on that loop)."""
+        if queue.timer is not None:
+            queue.timer.cancel()
+            queue.timer = None
+
+        with self._lock:
+            pending, queue.pending = queue.pending, []
+        if not pending:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(pending))
+        queue.tasks.add(task)
+        task.add_done_callback(queue.tasks.discard)
+
+    async def _run(self, pending: List[PendingRequest]) -> None:
+        """Run one batch and resolve each caller's future."""
+        with self._lock:
+            self.batches_run += 1
+            self.requests_batched += len(pending)
+        logger.info(f"Micro-batch flushing {len(pending)} requests")
+
+        try:
+            with track_usage() as usage:
+                results = await self.run_batch([transactions for transactions, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result((result, usage.share(len(pending)), len(pending)))
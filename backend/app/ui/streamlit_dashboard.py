@@ -128,14 +128,14 @@ def main():
     with st.spinner("Loading transactions..."):
         if sample_type == "Random Mix":
             transactions = data_loader.get_sample_transactions(
-                n=n_transactions, include_fraud=True, fraud_ratio=fraud_ratio
+                n=n_transactions, include_fraud=True, fraud_ratio=fraud_ratio, columnar=True
             )
         elif sample_type == "Known Fraud":
-            transactions = data_loader.get_fraud_cases(n=n_transactions)
+            transactions = data_loader.get_fraud_cases(n=n_transactions, columnar=True)
         elif sample_type == "Legitimate Only":
-            transactions = data_loader.get_legitimate_cases(n=n_transactions)
+            transactions = data_loader.get_legitimate_cases(n=n_transactions, columnar=True)
         else:  # Consecutive Batch
-            transactions = data_loader.get_transaction_batch(batch_size=n_transactions)
+            transactions = data_loader.get_transaction_batch(batch_size=n_transactions, columnar=True)
 
     # Display transaction summary
     st.subheader("📊 Transaction Summary")
@@ -144,10 +144,9 @@ def main():
     with col1:
         st.metric("Transactions", len(transactions))
     with col2:
-        amounts = [t.amount for t in transactions]
-        st.metric("Avg Amount", f"${sum(amounts)/len(amounts):.2f}")
+        st.metric("Avg Amount", f"${transactions.amount.mean():.2f}")
     with col3:
-        fraud_count = sum(1 for t in transactions if t.class_label == 1)
+        fraud_count = transactions.fraud_count
         st.metric("Fraud Cases (Actual)", fraud_count)
     with col4:
         st.metric("Legitimate Cases", len(transactions) - fraud_count)
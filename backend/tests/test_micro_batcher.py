@@ -0,0 +1,110 @@
+"""Tests for MicroBatcher."""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.agents.usage import current_usage
+from app.models.frame import FEATURE_COUNT, TransactionFrame
+from app.models.schemas import FraudAnalysisResult
+from app.services.micro_batcher import MicroBatcher
+
+
+def make_frame(rows: int) -> TransactionFrame:
+    """Batch of ``rows`` transactions."""
+    return TransactionFrame(np.zeros((rows, FEATURE_COUNT)))
+
+
+class RecordingRunner:
+    """Batch runner recording the batch sizes it was called with."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+        self._lock = threading.Lock()
+
+    async def __call__(self, frames):
+        with self._lock:
+            self.batches.append([len(frame) for frame in frames])
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("LLM down")
+        current_usage().prompt_tokens += 300
+        return [
+            FraudAnalysisResult(
+                is_fraud=False, confidence=0.9, risk_score=5.0, reasoning=f"{len(frame)} rows"
+            )
+            for frame in frames
+        ]
+
+
+async def test_requests_within_the_window_share_one_batch():
+    runner = RecordingRunner()
+    batcher = MicroBatcher(runner, window_ms=50, max_requests=8)
+
+    outcomes = await asyncio.gather(*(batcher.submit(make_frame(rows)) for rows in (1, 2, 3)))
+
+    assert runner.batches == [[1, 2, 3]]
+    assert [result.reasoning for result, _, _ in outcomes] == ["1 rows", "2 rows", "3 rows"]
+    assert all(size == 3 for _, _, size in outcomes)
+    assert sum(usage.prompt_tokens for _, usage, _ in outcomes) == 300
+
+
+async def test_full_batch_flushes_without_waiting_for_the_window():
+    runner = RecordingRunner()
+    batcher = MicroBatcher(runner, window_ms=10_000, max_requests=2)
+
+    await asyncio.wait_for(
+        asyncio.gather(batcher.submit(make_frame(1)), batcher.submit(make_frame(2))), timeout=1
+    )
+
+    assert runner.batches == [[1, 2]]
+
+
+async def test_batch_failure_reaches_every_caller():
+    batcher = MicroBatcher(RecordingRunner(fail=True), window_ms=10, max_requests=8)
+
+    outcomes = await asyncio.gather(
+        batcher.submit(make_frame(1)), batcher.submit(make_frame(2)), return_exceptions=True
+    )
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+@pytest.mark.parametrize("max_requests", [2, 8])
+def test_requests_from_different_loops_are_batched_per_loop(max_requests):
+    runner = RecordingRunner()
+    batcher = MicroBatcher(runner, window_ms=50, max_requests=max_requests)
+    start = threading.Barrier(2)
+    elapsed, errors = [], []
+
+    def session(rows: int) -> None:
+        async def analyze():
+            start.wait()
+            t0 = time.perf_counter()
+            outcomes = await asyncio.wait_for(
+                asyncio.gather(batcher.submit(make_frame(rows)), batcher.submit(make_frame(rows))),
+                timeout=3,
+            )
+            elapsed.append(time.perf_counter() - t0)
+            return outcomes
+
+        try:
+            outcomes = asyncio.run(analyze())
+            assert [result.reasoning for result, _, _ in outcomes] == [f"{rows} rows"] * 2
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=session, args=(rows,)) for rows in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Each loop flushes its own two requests, well within the window + run time
+    assert sorted(runner.batches) == [[1, 1], [2, 2]]
+    assert max(elapsed) < 1
@@ -0,0 +1,90 @@
+"""Parity of the NumPy ML scorer with scikit-learn."""
+
+import numpy as np
+import pytest
+
+from app.agents.ml_scorer import MLScorer
+from app.models.frame import FEATURE_COUNT
+
+sklearn = pytest.importorskip("sklearn")
+from sklearn.ensemble import GradientBoostingClassifier  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from sklearn.tree import DecisionTreeRegressor  # noqa: E402
+
+TOLERANCE = 1e-9
+
+
+def make_data(rows: int = 2000, seed: int = 0):
+    """Feature matrix in dataset layout (Time first) and labels from the model inputs."""
+    rng = np.random.default_rng(seed)
+    matrix = rng.normal(size=(rows, FEATURE_COUNT)) * rng.uniform(0.5, 50, FEATURE_COUNT)
+    x = matrix[:, 1:]
+    logit = x[:, 0] / 50 - x[:, 3] / 10 + 0.5 * np.sin(x[:, 5]) + rng.normal(size=rows)
+    return matrix, x, (logit > 1).astype(int)
+
+
+def with_threshold_rows(matrix: np.ndarray, trees) -> np.ndarray:
+    """Append rows whose features sit exactly on (float64) split thresholds."""
+    extra = np.repeat(matrix[:1], 64, axis=0)
+    splits = [(f, t) for tree in trees for f, t in zip(tree.feature, tree.threshold) if f >= 0]
+    for row, (feature, threshold) in zip(extra, splits):
+        row[1 + feature] = threshold
+    return np.vstack([matrix, extra])
+
+
+def test_logistic_matches_sklearn():
+    matrix, x, y = make_data()
+    scaler = StandardScaler().fit(x)
+    model = LogisticRegression(max_iter=2000).fit(scaler.transform(x), y)
+    scorer = MLScorer.from_logistic(model.coef_, model.intercept_[0], scaler.mean_, scaler.scale_)
+
+    expected = model.predict_proba(scaler.transform(x))[:, 1]
+    assert np.abs(scorer.predict_proba(matrix) - expected).max() < TOLERANCE
+
+
+@pytest.mark.parametrize("max_leaf_nodes", [None, 5])
+def test_gbt_matches_sklearn(max_leaf_nodes):
+    matrix, x, y = make_data()
+    model = GradientBoostingClassifier(
+        n_estimators=30, max_depth=3, max_leaf_nodes=max_leaf_nodes, random_state=0
+    ).fit(x, y)
+    trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+    prior = model.init_.class_prior_[1]
+    scorer = MLScorer.from_gbt(trees, model.learning_rate, float(np.log(prior / (1 - prior))))
+
+    matrix = with_threshold_rows(matrix, trees)
+    expected = model.predict_proba(matrix[:, 1:])[:, 1]
+    assert np.abs(scorer.predict_proba(matrix) - expected).max() < TOLERANCE
+
+
+def test_gbt_pads_trees_shallower_than_the_ensemble():
+    matrix, x, y = make_data()
+    residual = y - y.mean()
+    depths = [1, 4, 2, 3]
+    estimators = [
+        DecisionTreeRegressor(max_depth=depth, random_state=0).fit(x, residual)
+        for depth in depths
+    ]
+    trees = [estimator.tree_ for estimator in estimators]
+    assert [tree.max_depth for tree in trees] == depths
+    scorer = MLScorer.from_gbt(trees, learning_rate=0.1, init_raw=-0.5)
+
+    matrix = with_threshold_rows(matrix, trees)
+    raw = -0.5 + 0.1 * sum(estimator.predict(matrix[:, 1:]) for estimator in estimators)
+    assert np.abs(scorer.decision_function(matrix) - raw).max() < TOLERANCE
+
+
+def test_save_and_load_round_trip(tmp_path):
+    matrix, x, y = make_data(rows=500)
+    model = GradientBoostingClassifier(n_estimators=5, max_depth=2, random_state=0).fit(x, y)
+    scorer = MLScorer.from_gbt(
+        [estimator.tree_ for estimator in model.estimators_[:, 0]], 0.1, 0.0, threshold=0.3
+    )
+    path = tmp_path / "scorer.npz"
+    scorer.save(str(path))
+
+    loaded = MLScorer.load(str(path))
+    assert loaded.kind == "gbt" and loaded.threshold == 0.3
+    assert np.array_equal(loaded.predict_proba(matrix), scorer.predict_proba(matrix))
+    assert MLScorer.load(str(tmp_path / "missing.npz")) is None
@@ -0,0 +1,64 @@
+"""Tests for RLM map-reduce sharding."""
+
+import time
+
+import numpy as np
+import pytest
+
+from app.agents.rlm_agent import RLMFraudAgent
+from app.core.config import settings
+from app.models.frame import FEATURE_COUNT, TransactionFrame
+
+# Tight enough that a shard holds fewer than RLM_MAX_SUSPICIOUS suspects
+BUDGET = 800
+
+
+def make_frame(rows: int = 2000, seed: int = 0) -> TransactionFrame:
+    """Batch with plenty of outliers for the filter."""
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(rows, FEATURE_COUNT)) * 5
+    features[:, 0] = np.sort(rng.uniform(0, 100_000, rows))
+    features[:, -1] = rng.lognormal(3, 2, rows)
+    return TransactionFrame(features)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    for name, value in {
+        "fake_llm_enabled": True,
+        "fake_llm_latency_ms": 1.0,
+        "llm_cache_enabled": False,
+        "rlm_gate_enabled": False,
+        "rlm_map_reduce_enabled": True,
+        "rlm_max_suspicious": 10,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    return RLMFraudAgent()
+
+
+async def test_shards_hold_what_the_packer_fits(agent, monkeypatch):
+    monkeypatch.setattr(settings, "rlm_max_shards", 20)
+    suspects = await agent._filter_suspicious_transactions(make_frame(), 60)
+
+    shards, dropped = agent._pack_shards(suspects, BUDGET)
+
+    assert dropped == 0
+    assert all(packed.included == len(shard) for shard, packed in shards)
+    assert all(len(shard) <= settings.rlm_max_suspicious for shard, _ in shards)
+    assert any(len(shard) < settings.rlm_max_suspicious for shard, _ in shards)
+    # Every suspect lands in exactly one shard, highest risk first
+    assert [item["index"] for shard, _ in shards for item in shard] == [
+        item["index"] for item in suspects
+    ]
+
+
+async def test_suspects_beyond_the_last_shard_are_reported(agent, monkeypatch):
+    monkeypatch.setattr(settings, "rlm_max_shards", 3)
+    frame = make_frame()
+    suspects = await agent._filter_suspicious_transactions(frame, 60)
+    shards, dropped = agent._pack_shards(suspects, BUDGET)
+    assert len(shards) == 3 and dropped == len(suspects) - sum(len(s) for s, _ in shards) > 0
+
+    result = await agent._analyze_sharded(frame, suspects, BUDGET, time.time())
+
+    assert f"{dropped} lowest-risk suspects did not fit any shard" in result.citations[0]
@@ -0,0 +1,118 @@
+"""Tests for request coalescing in FraudDetectionService."""
+
+import asyncio
+import threading
+
+import numpy as np
+
+from app.models.frame import FEATURE_COUNT, TransactionFrame
+from app.models.schemas import ApproachType, FraudAnalysisResult, UsageRecord
+from app.services.fraud_service import FraudDetectionService
+
+
+def make_frame(rows: int = 5, seed: int = 0) -> TransactionFrame:
+    """Random batch of transactions."""
+    return TransactionFrame(np.random.default_rng(seed).normal(size=(rows, FEATURE_COUNT)))
+
+
+class CountingRunner:
+    """Analysis runner that counts its calls and holds each for ``delay`` seconds."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    async def __call__(self, transactions: TransactionFrame):
+        with self._lock:
+            self.calls += 1
+        await asyncio.sleep(self.delay)
+        result = FraudAnalysisResult(
+            is_fraud=False, confidence=0.9, risk_score=10.0, reasoning="ok"
+        )
+        return result, UsageRecord(prompt_tokens=100), 1
+
+
+async def test_concurrent_identical_requests_share_one_run():
+    service = FraudDetectionService()
+    runner = CountingRunner()
+    frame = make_frame()
+
+    outcomes = await asyncio.gather(
+        *(service._run_single_flight(ApproachType.NAIVE, runner, frame) for _ in range(4))
+    )
+
+    assert runner.calls == 1
+    assert sorted(coalesced for *_, coalesced in outcomes) == [False, True, True, True]
+    assert service.coalesced_requests == 3
+    # Every caller gets its own copy of the result
+    assert len({id(result) for result, *_ in outcomes}) == 4
+
+
+async def test_coalesced_requests_count_the_usage_once():
+    service = FraudDetectionService()
+    frame = make_frame()
+
+    outcomes = await asyncio.gather(
+        *(service._run_single_flight(ApproachType.NAIVE, CountingRunner(), frame) for _ in range(4))
+    )
+
+    assert sum(usage.prompt_tokens for _, usage, *_ in outcomes) == 100
+    for _, usage, _, coalesced in outcomes:
+        assert usage.prompt_tokens == (0 if coalesced else 100)
+
+
+async def test_different_batches_and_approaches_do_not_coalesce():
+    service = FraudDetectionService()
+    runner = CountingRunner()
+
+    await asyncio.gather(
+        service._run_single_flight(ApproachType.NAIVE, runner, make_frame(seed=0)),
+        service._run_single_flight(ApproachType.NAIVE, runner, make_frame(seed=1)),
+        service._run_single_flight(ApproachType.RAG, runner, make_frame(seed=0)),
+    )
+
+    assert runner.calls == 3
+    assert service.coalesced_requests == 0
+
+
+async def test_finished_analysis_is_released():
+    service = FraudDetectionService()
+    runner = CountingRunner(delay=0)
+    frame = make_frame()
+
+    await service._run_single_flight(ApproachType.NAIVE, runner, frame)
+    await service._run_single_flight(ApproachType.NAIVE, runner, frame)
+
+    assert runner.calls == 2
+    assert not service._in_flight[asyncio.get_running_loop()]
+
+
+def test_identical_requests_on_different_loops_run_separately():
+    service = FraudDetectionService()
+    runner = CountingRunner(delay=0.2)
+    frame = make_frame()
+    start = threading.Barrier(4)
+    outcomes, errors = [], []
+
+    def session() -> None:
+        async def analyze():
+            start.wait()
+            return await service._run_single_flight(ApproachType.NAIVE, runner, frame)
+
+        try:
+            outcomes.append(asyncio.run(analyze()))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=session) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(outcomes) == 4
+    # One analysis per event loop, none awaited from another loop
+    assert runner.calls == 4
+    assert service.coalesced_requests == 0
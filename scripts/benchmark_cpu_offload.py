@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark prompt formatting inline vs on the thread and process pools.
+
+For each batch size, ``--concurrency`` naive prompts are formatted at once
+through :class:`CPUExecutor` with every ``CPU_EXECUTOR_PYTHON`` backend, while
+:class:`LoopLagMonitor` samples how long the event loop is blocked:
+
+- ``call``: median wall time of one formatting call, including the hand-off
+- ``lag max``: longest event-loop stall during the run
+
+Offloading pays off only where ``lag max`` inline is larger than the extra
+``call`` time of the pool. The pools are started and warmed up before timing,
+so the process pool's one-off spawn cost (a few hundred ms) is not included.
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/benchmark_cpu_offload.py --concurrency 8
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from loguru import logger  # noqa: E402
+
+from app.agents.encoding import ALL_FEATURES, create_encoder  # noqa: E402
+from app.agents.executor import BACKENDS, CPUExecutor, LoopLagMonitor  # noqa: E402
+from app.models.frame import TransactionFrame  # noqa: E402
+
+SIZES = [50, 100, 1_000, 3_000, 10_000]
+
+
+def make_frame(n: int, seed: int = 42) -> TransactionFrame:
+    """Synthetic transactions shaped like the Kaggle dataset."""
+    rng = np.random.default_rng(seed)
+    features = np.column_stack(
+        [
+            np.sort(rng.uniform(0, 172800, n)),
+            rng.standard_normal((n, 28)),
+            rng.lognormal(mean=3.5, sigma=1.2, size=n),
+        ]
+    )
+    return TransactionFrame(features=features)
+
+
+async def run_backend(
+    executor: CPUExecutor, encoder, frame: TransactionFrame, concurrency: int, repeats: int
+) -> dict:
+    """Format ``concurrency`` prompts at once, ``repeats`` times, under the lag monitor."""
+    # Warm-up: start the pool and import the encoder in its workers
+    await executor.run_python(len(frame), encoder.encode, frame, legend=False)
+
+    monitor = LoopLagMonitor(interval_ms=5)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    timings = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        await executor.run_python(len(frame), encoder.encode, frame, legend=False)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    for _ in range(repeats):
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+        await asyncio.sleep(0.01)
+    await monitor.stop()
+    return {"call": float(np.median(timings)), "lag_max": monitor.stats()["max_ms"]}
+
+
+async def run(concurrency: int, repeats: int, workers: int) -> None:
+    """Benchmark every backend at every batch size."""
+    encoder = create_encoder(features=ALL_FEATURES, precision=3)
+    executors = {
+        backend: CPUExecutor(python_backend=backend, workers=workers, min_prompt_rows=0)
+        for backend in BACKENDS
+    }
+    header = " | ".join(f"{backend + ' call':>13} | {backend + ' lag':>12}" for backend in BACKENDS)
+    print(f"{'rows':>6} | {header}")
+    print("-" * (9 + 31 * len(BACKENDS)))
+    for size in SIZES:
+        frame = make_frame(size)
+        cells = []
+        for backend, executor in executors.items():
+            row = await run_backend(executor, encoder, frame, concurrency, repeats)
+            cells.append(f"{row['call']:>11.1f}ms | {row['lag_max']:>10.1f}ms")
+        print(f"{size:>6} | " + " | ".join(cells))
+    for executor in executors.values():
+        executor.shutdown()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="Prompts formatted at once")
+    parser.add_argument("--repeats", type=int, default=5, help="Rounds per backend and size")
+    parser.add_argument("--workers", type=int, default=4, help="Workers per pool")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    asyncio.run(run(args.concurrency, args.repeats, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark DataFrame -> Transaction conversion in DataLoader.
+
+Compares the original ``iterrows`` loop with the bulk paths:
+validated list, trusted (unvalidated) list, and columnar TransactionFrame.
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/benchmark_df_conversion.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from app.models.frame import DATASET_COLUMNS, TransactionFrame  # noqa: E402
+from app.models.schemas import Transaction  # noqa: E402
+
+SIZES = [1_000, 50_000, 284_807]
+
+
+def make_dataframe(n: int, seed: int = 42) -> pd.DataFrame:
+    """Generate a synthetic DataFrame in the creditcard.csv layout."""
+    rng = np.random.default_rng(seed)
+    data = {
+        "Time": np.sort(rng.uniform(0, 172800, n)),
+        **{f"V{i}": rng.standard_normal(n) for i in range(1, 29)},
+        "Amount": rng.lognormal(mean=3.5, sigma=1.2, size=n),
+    }
+    df = pd.DataFrame(data)[DATASET_COLUMNS]
+    df["Class"] = (rng.random(n) < 0.0017).astype(int)
+    return df
+
+
+def legacy_df_to_transactions(df: pd.DataFrame) -> list:
+    """Original iterrows implementation, kept as the baseline."""
+    transactions = []
+    for idx, row in df.iterrows():
+        values = {f"v{i}": row[f"V{i}"] for i in range(1, 29)}
+        transactions.append(
+            Transaction(
+                time=row["Time"],
+                amount=row["Amount"],
+                **values,
+                class_label=int(row["Class"]) if "Class" in row else None,
+                transaction_id=f"txn_{idx}",
+            )
+        )
+    return transactions
+
+
+def timed(fn, *args) -> tuple:
+    """Return (seconds, result) for a single run."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(
+        f"{'rows':>8} | {'iterrows':>10} | {'validated':>10} | {'trusted':>10} | "
+        f"{'frame':>10} | {'speedup':>8} | parity"
+    )
+    print("-" * 82)
+
+    for n in SIZES:
+        df = make_dataframe(n)
+
+        legacy_s, legacy = timed(legacy_df_to_transactions, df)
+        validated_s, validated = timed(
+            lambda d: TransactionFrame.from_dataframe(d).to_transactions(validate=True), df
+        )
+        trusted_s, trusted = timed(
+            lambda d: TransactionFrame.from_dataframe(d).to_transactions(validate=False), df
+        )
+        frame_s, _ = timed(TransactionFrame.from_dataframe, df)
+
+        parity = "ok" if legacy == validated == trusted else "MISMATCH"
+        print(
+            f"{n:>8,} | {legacy_s * 1000:>8.0f}ms | {validated_s * 1000:>8.0f}ms | "
+            f"{trusted_s * 1000:>8.0f}ms | {frame_s * 1000:>8.1f}ms | "
+            f"{legacy_s / validated_s:>7.1f}x | {parity}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Load-test Naive/RAG/RLM against the in-process fake LLM server.
+
+Runs a fixed number of analyses per approach at a given concurrency and
+reports throughput and latency percentiles. No network or API key needed:
+every LLM call is answered by ``app.agents.fake_llm`` (tune it with the
+``FAKE_LLM_*`` settings, e.g. ``FAKE_LLM_ERROR_RATE=0.05``). The response
+cache is disabled and each request gets a different window of the dataset,
+so every request reaches the (fake) model.
+
+The ``lag`` columns are event-loop lag (see ``app.agents.executor``): how long
+coroutines waited on CPU-bound stages blocking the loop. Compare
+``CPU_EXECUTOR_ARRAY=inline`` against the default thread offloading (prompt
+formatting alone is measured by ``benchmark_cpu_offload.py``).
+
+To benchmark with real model outputs instead, record a cassette once against
+the real API and replay it (with the recorded latencies) afterwards:
+
+    FAKE_LLM_ENABLED=false LLM_CASSETTE_MODE=record python ../scripts/benchmark_fake_llm_load.py
+    FAKE_LLM_ENABLED=false LLM_CASSETTE_MODE=replay LLM_CASSETTE_REPLAY_LATENCY=true \
+        python ../scripts/benchmark_fake_llm_load.py
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/benchmark_fake_llm_load.py --requests 50 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Configure before settings are loaded
+os.environ.setdefault("FAKE_LLM_ENABLED", "true")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000")
+os.environ.setdefault("RATE_LIMIT_TOKENS_PER_MINUTE", "100000000")
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from loguru import logger  # noqa: E402
+
+from app.agents.cassette import get_cassette  # noqa: E402
+from app.agents.executor import get_cpu_executor, get_loop_lag_monitor  # noqa: E402
+from app.agents.fake_llm import app as fake_app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models.schemas import ApproachType  # noqa: E402
+from app.services.data_loader import DataLoader  # noqa: E402
+from app.services.fraud_service import fraud_service  # noqa: E402
+
+# Transactions per request for each approach (naive and RAG at their prompt caps)
+BATCH_SIZES = {
+    "naive": settings.max_transactions_naive,
+    "rag": settings.max_transactions_rag,
+    "rlm": 1000,
+}
+
+
+async def run_approach(approach: str, frame, requests: int, concurrency: int) -> dict:
+    """Run ``requests`` analyses with at most ``concurrency`` in flight."""
+    analyze = getattr(fraud_service, f"analyze_{approach}")
+    size = min(BATCH_SIZES[approach], len(frame) // 2)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+    fraud_service.get_agent(ApproachType(approach))  # build outside the measurement
+    monitor = get_loop_lag_monitor()
+    monitor.reset()
+
+    async def one(i: int) -> None:
+        nonlocal failures
+        start = (i * 7) % max(1, len(frame) - size + 1)
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                await analyze(frame[start : start + size])
+            except Exception:
+                failures += 1
+                return
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - wall
+
+    lat = np.array(latencies) if latencies else np.array([np.nan])
+    lag = monitor.stats()
+    return {
+        "approach": approach,
+        "ok": len(latencies),
+        "failed": failures,
+        "rps": len(latencies) / wall,
+        "p50": np.percentile(lat, 50),
+        "p95": np.percentile(lat, 95),
+        "p99": np.percentile(lat, 99),
+        "lag_p99": lag["p99_ms"],
+        "lag_max": lag["max_ms"],
+    }
+
+
+async def run(requests: int, concurrency: int) -> None:
+    """Benchmark every approach in turn."""
+    loader = DataLoader()
+    loader.load_dataset()
+    frame = loader.frame
+    get_loop_lag_monitor().start()
+
+    print(
+        f"{'approach':>8} | {'ok':>5} | {'failed':>6} | {'req/s':>7} | "
+        f"{'p50':>9} | {'p95':>9} | {'p99':>9} | {'lag p99':>9} | {'lag max':>9}"
+    )
+    print("-" * 94)
+    for approach in BATCH_SIZES:
+        row = await run_approach(approach, frame, requests, concurrency)
+        print(
+            f"{row['approach']:>8} | {row['ok']:>5} | {row['failed']:>6} | {row['rps']:>7.2f} | "
+            f"{row['p50']:>7.0f}ms | {row['p95']:>7.0f}ms | {row['p99']:>7.0f}ms | "
+            f"{row['lag_p99']:>7.1f}ms | {row['lag_max']:>7.1f}ms"
+        )
+    await get_loop_lag_monitor().stop()
+    get_cpu_executor().shutdown()
+    print(f"\nfake server: {fake_app.state.fake.stats()}")
+    print(f"cpu executor: {get_cpu_executor().stats()['calls']}")
+    if get_cassette() is not None:
+        print(f"cassette: {get_cassette().stats()}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per approach")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Measure the cold-start import time of the API against a target.
+
+Imports ``app.main`` in fresh interpreters with ``python -X importtime``,
+reports the median total over several runs and the slowest modules by
+cumulative import time, and exits non-zero when the median exceeds the
+target. ``OPENAI_API_KEY`` is removed from the environment so the check also
+covers importing the app without credentials.
+
+Agents, ``openai``/``pydantic_ai``, pandas and SQLAlchemy are loaded on first
+use, not at import; a module from that list showing up in the report means an
+eager import crept back in.
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/benchmark_import_time.py --runs 5 --target-ms 800
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+# Cold-start budget for ``import app.main``
+TARGET_MS = 800.0
+
+# Imports that should stay deferred until first use
+DEFERRED_MODULES = ("openai", "pydantic_ai", "pandas", "sqlalchemy", "tiktoken")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def measure(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Dict mapping each imported module to (cumulative µs, nesting depth)
+    """
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    env["PYTHONPATH"] = str(BACKEND_DIR)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            _, cumulative, indent, name = match.groups()
+            modules[name] = (int(cumulative), (len(indent) - 1) // 2)
+    return modules
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to average")
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS, help="Median budget")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals: List[float] = [run[args.module][0] / 1000 for run in runs]
+    median_ms = statistics.median(totals)
+
+    # Slowest first-party and top-level third-party imports of the median run
+    run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    listed = [
+        (name, us / 1000)
+        for name, (us, depth) in run.items()
+        if name != args.module and (depth <= 1 or name.startswith("app."))
+    ]
+    top = sorted(listed, key=lambda item: item[1], reverse=True)[: args.top]
+
+    print(f"{'module':<40} | {'cumulative':>10}")
+    print("-" * 55)
+    for name, ms in top:
+        print(f"{name:<40} | {ms:>8.1f}ms")
+
+    eager = [name for name in DEFERRED_MODULES if name in run]
+    if eager:
+        print(f"\nimported eagerly (should be deferred): {', '.join(eager)}")
+
+    print(
+        f"\nimport {args.module}: median {median_ms:.0f}ms over {args.runs} runs "
+        f"(min {min(totals):.0f}ms, max {max(totals):.0f}ms), target {args.target_ms:.0f}ms"
+    )
+    if median_ms > args.target_ms:
+        sys.exit(f"FAIL: {median_ms:.0f}ms exceeds the {args.target_ms:.0f}ms target")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
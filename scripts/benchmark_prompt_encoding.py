@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark prompt tokens per transaction for each prompt encoding.
+
+Uses the Kaggle dataset when present (falls back to synthetic data) and the
+main model's tokenizer. Token counts are estimates if tiktoken encodings are
+not available offline (see TOKENIZER_CACHE_DIR).
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/benchmark_prompt_encoding.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from app.agents.encoding import ALL_FEATURES, ENCODINGS, TransactionEncoder, typical_feature_range  # noqa: E402
+from app.agents.tokenizer import get_token_counter  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models.frame import AMOUNT_COL, TIME_COL, TransactionFrame  # noqa: E402
+from app.models.statistics import DatasetStatistics  # noqa: E402
+
+SIZES = [20, 50, 100]
+LAYOUTS = {"naive (V1-V28, 3dp)": (ALL_FEATURES, 3), "rag/rlm (V1-V3, 2dp)": ((1, 2, 3), 2)}
+
+
+def load_population(seed: int = 42) -> tuple:
+    """Return (frame, statistics) from the dataset, or synthetic data."""
+    if Path(settings.kaggle_dataset_path).exists():
+        from app.services.data_loader import DataLoader
+
+        loader = DataLoader()
+        loader.load_dataset()
+        return loader.frame, loader.stats
+
+    rng = np.random.default_rng(seed)
+    n = 10_000
+    features = np.column_stack(
+        [
+            np.sort(rng.uniform(0, 172800, n)),
+            rng.standard_normal((n, 28)),
+            rng.lognormal(mean=3.5, sigma=1.2, size=n),
+        ]
+    )
+    return TransactionFrame(features=features), DatasetStatistics.compute(features)
+
+
+def legacy_naive(frame: TransactionFrame) -> str:
+    """Original multi-line NaiveFraudAgent layout, kept as the baseline."""
+    lines = []
+    for idx, row in enumerate(frame.features.tolist()):
+        features = ", ".join([f"V{i}={row[i]:.3f}" for i in range(1, 29)])
+        lines.append(
+            f"Transaction {idx}:\n"
+            f"  Time: {row[TIME_COL]:.0f}s\n"
+            f"  Amount: ${row[AMOUNT_COL]:.2f}\n"
+            f"  Features: {features}\n"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    frame, stats = load_population()
+    counter = get_token_counter(settings.main_model)
+    typical = typical_feature_range(stats)
+    rows = np.random.default_rng(0).choice(len(frame), max(SIZES), replace=False)
+
+    if not counter.exact:
+        print("note: tokenizer unavailable, counts are estimates\n")
+
+    for layout, (features, precision) in LAYOUTS.items():
+        encoders = {}
+        if features == ALL_FEATURES:
+            encoders["legacy"] = legacy_naive
+        for name in ENCODINGS:
+            encoders[name] = TransactionEncoder(name, features, precision).encode
+            encoders[f"{name}+omit"] = TransactionEncoder(name, features, precision, typical).encode
+
+        print(f"{layout}: tokens per transaction")
+        print(f"{'encoding':>14} | " + " | ".join(f"{n:>6} rows" for n in SIZES))
+        print("-" * (17 + 13 * len(SIZES)))
+        for name, encode in encoders.items():
+            cells = []
+            for n in SIZES:
+                batch = TransactionFrame(features=np.asarray(frame.features[rows[:n]]))
+                cells.append(f"{counter.count(encode(batch)) / n:>11.1f}")
+            print(f"{name:>14} | " + " | ".join(cells))
+        print()
+
+
+if __name__ == "__main__":
+    main()
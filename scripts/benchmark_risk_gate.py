@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Compare RLM with and without the fitted risk gate.
+
+Runs the same labeled windows of the dataset through the RLM analysis twice,
+once with every flagged batch going to the LLM and once with the risk gate
+deciding clear-cut batches, and reports the LLM-call rate, the latency
+distribution and the batch-level recall of each run.
+
+LLM calls go to the in-process fake server by default (no API key needed;
+``FAKE_LLM_*`` settings shape its latency); set ``FAKE_LLM_ENABLED=false`` to
+measure the real model. Fit the gate first with ``fit_risk_gate.py``.
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/benchmark_risk_gate.py --batches 200 --batch-size 100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Configure before settings are loaded
+os.environ.setdefault("FAKE_LLM_ENABLED", "true")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000")
+os.environ.setdefault("RATE_LIMIT_TOKENS_PER_MINUTE", "100000000")
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from loguru import logger  # noqa: E402
+
+from app.agents.risk_gate import RiskGate  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.data_loader import DataLoader  # noqa: E402
+from app.services.fraud_service import fraud_service  # noqa: E402
+
+
+async def run(windows: list, labels: np.ndarray, gate, concurrency: int) -> dict:
+    """Analyze every window with the given gate (None = always call the LLM)."""
+    agent = fraud_service.rlm_agent
+    agent.risk_gate = gate
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(window):
+        async with semaphore:
+            t0 = time.perf_counter()
+            result, metrics = await fraud_service.analyze_rlm(window)
+            return (time.perf_counter() - t0) * 1000, metrics.llm_calls > 0, result.is_fraud
+
+    rows = await asyncio.gather(*(one(window) for window in windows))
+    latency = np.array([row[0] for row in rows])
+    called = np.array([row[1] for row in rows])
+    predicted = np.array([row[2] for row in rows])
+    fraud = labels.astype(bool)
+    return {
+        "llm_call_rate": called.mean(),
+        "p50": np.percentile(latency, 50),
+        "p95": np.percentile(latency, 95),
+        "p99": np.percentile(latency, 99),
+        "mean": latency.mean(),
+        "recall": predicted[fraud].mean() if fraud.any() else float("nan"),
+    }
+
+
+def main() -> None:
+    """Run the comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=200, help="Windows to analyze")
+    parser.add_argument("--batch-size", type=int, default=100, help="Transactions per window")
+    parser.add_argument("--concurrency", type=int, default=8, help="Analyses in flight")
+    parser.add_argument("--gate", default=settings.rlm_gate_path, help="Fitted gate JSON")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    gate = RiskGate.load(args.gate)
+    if gate is None:
+        sys.exit(f"No gate at {args.gate}; run fit_risk_gate.py first")
+
+    loader = DataLoader()
+    loader.load_dataset()
+    frame = loader.frame
+    rng = np.random.default_rng(args.seed)
+    starts = rng.integers(0, max(1, len(frame) - args.batch_size + 1), args.batches)
+    windows = [frame[start : start + args.batch_size] for start in starts]
+    labels = np.array([int((window.labels == 1).any()) for window in windows])
+
+    print(f"gate: benign <= {gate.low:.0f}, fraud >= {gate.high}")
+    print(
+        f"{'mode':>8} | {'LLM rate':>8} | {'mean':>8} | {'p50':>8} | {'p95':>8} | "
+        f"{'p99':>8} | {'recall':>7}"
+    )
+    print("-" * 74)
+    for name, active in (("no gate", None), ("gated", gate)):
+        row = asyncio.run(run(windows, labels, active, args.concurrency))
+        print(
+            f"{name:>8} | {row['llm_call_rate']:>8.1%} | {row['mean']:>6.0f}ms | "
+            f"{row['p50']:>6.0f}ms | {row['p95']:>6.0f}ms | {row['p99']:>6.0f}ms | "
+            f"{row['recall']:>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
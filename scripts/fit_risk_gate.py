@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Fit the RLM risk gate on the labeled dataset.
+
+Samples windows of consecutive transactions, runs the RLM filter on each
+and records the batch's aggregate risk and whether it contains fraud. The
+gate thresholds are fitted on one half of the windows for a target recall
+(and precision of the fraud verdicts) and evaluated on the other half:
+
+- ``llm_call_rate``: share of batches still sent to the LLM
+- ``recall``: share of fraudulent batches not cleared by the gate
+
+The fitted gate is written to ``RLM_GATE_PATH``, where the RLM agent picks it
+up. It records the batch size and the candidate ranker
+(``RLM_CANDIDATE_RANKER``) it was fitted with: the agent only gates batches
+near that size, and ignores the gate under another ranker. No LLM calls are made; see ``benchmark_risk_gate.py`` for end-to-end
+latency with and without the gate.
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/fit_risk_gate.py --target-recall 0.99 --batch-size 100
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from loguru import logger  # noqa: E402
+
+from app.agents.filter_engine import create_filter  # noqa: E402
+from app.agents.risk_gate import RiskGate  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.data_loader import DataLoader  # noqa: E402
+
+
+def sample_batches(frame, batch_size: int, batches: int, seed: int):
+    """
+    Aggregate risk and fraud label of random windows of consecutive rows.
+
+    Returns:
+        Tuple of (window starts, aggregate risks, labels)
+    """
+    if frame.labels is None:
+        sys.exit("The dataset has no Class column; the gate needs labeled transactions")
+
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, max(1, len(frame) - batch_size + 1), batches)
+    engine = create_filter()
+    risks = np.empty(batches)
+    labels = np.empty(batches, dtype=np.int8)
+    for i, start in enumerate(starts):
+        window = frame[start : start + batch_size]
+        suspicious, _ = engine.run(window.features)
+        risks[i] = RiskGate.aggregate_risk(suspicious)
+        labels[i] = int((window.labels == 1).any())
+    return starts, risks, labels
+
+
+def print_evaluation(name: str, evaluation: dict) -> None:
+    """Print one evaluation row."""
+    print(
+        f"{name:>8} | {evaluation['batches']:>7} | {evaluation['llm_call_rate']:>8.1%} | "
+        f"{evaluation['benign_rate']:>7.1%} | {evaluation['fraud_rate']:>7.1%} | "
+        f"{evaluation['recall']:>7.1%} | {evaluation['fraud_precision']:>9.1%}"
+    )
+
+
+def main() -> None:
+    """Fit, evaluate and save the gate."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100, help="Transactions per batch")
+    parser.add_argument("--batches", type=int, default=4000, help="Sampled batches")
+    parser.add_argument("--target-recall", type=float, default=0.99)
+    parser.add_argument("--target-precision", type=float, default=0.95)
+    parser.add_argument("--min-support", type=int, default=20, help="Batches above `high`")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=settings.rlm_gate_path, help="Gate JSON file")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    loader = DataLoader()
+    loader.load_dataset()
+    _, risks, labels = sample_batches(loader.frame, args.batch_size, args.batches, args.seed)
+    print(
+        f"{len(risks)} batches of {args.batch_size}: {labels.mean():.1%} contain fraud, "
+        f"{(risks == 0).mean():.1%} have no suspects"
+    )
+
+    half = len(risks) // 2
+    gate = RiskGate.fit(
+        risks[:half],
+        labels[:half],
+        target_recall=args.target_recall,
+        target_precision=args.target_precision,
+        batch_size=args.batch_size,
+        min_support=args.min_support,
+        ranker=settings.rlm_candidate_ranker,
+    )
+    print(
+        f"gate: benign <= {gate.low:.0f} (confidence {gate.benign_confidence:.3f}), "
+        f"fraud >= {gate.high} (confidence {gate.fraud_confidence:.3f})\n"
+    )
+
+    ungated = RiskGate(-1.0, None, 1.0, 0.0, 1.0, 1.0, args.batch_size, gate.ranker)
+    print(
+        f"{'split':>8} | {'batches':>7} | {'LLM rate':>8} | {'benign':>7} | {'fraud':>7} | "
+        f"{'recall':>7} | {'precision':>9}"
+    )
+    print("-" * 76)
+    print_evaluation("fit", gate.evaluate(risks[:half], labels[:half]))
+    print_evaluation("holdout", gate.evaluate(risks[half:], labels[half:]))
+    print_evaluation("no gate", ungated.evaluate(risks[half:], labels[half:]))
+
+    gate.save(args.output)
+    print(f"\nSaved gate to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Train the local fraud scorer on the labeled dataset.
+
+Fits a logistic regression or gradient-boosted trees (scikit-learn) on
+V1..V28 and Amount, exports it to plain arrays for the NumPy scorer
+(``app.agents.ml_scorer``) and checks that both agree. The labeled rows are
+split stratified into:
+
+- ``train``: fits the model
+- ``calibration``: picks the decision threshold for ``--target-recall``
+- ``holdout``: reports average precision, ROC AUC, recall and precision
+
+The NumPy scorer is then timed on a batch of ``--bench-rows`` rows. The
+model is written to ``ML_SCORER_PATH``, where the ``score`` approach and the
+RLM candidate ranker (``RLM_CANDIDATE_RANKER=ml``) pick it up. A risk gate
+fitted with the other ranker is not used; refit it with ``fit_risk_gate.py``
+after switching.
+
+Run from the backend directory (so settings pick up .env):
+
+    cd backend && python ../scripts/train_ml_scorer.py --model gbt --target-recall 0.9
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from loguru import logger  # noqa: E402
+from sklearn.ensemble import GradientBoostingClassifier  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.metrics import average_precision_score, roc_auc_score  # noqa: E402
+from sklearn.model_selection import train_test_split  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+
+from app.agents.ml_scorer import MODEL_FEATURES, MLScorer  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models.frame import DATASET_COLUMNS  # noqa: E402
+from app.services.data_loader import DataLoader  # noqa: E402
+
+
+def fit(kind: str, x: np.ndarray, y: np.ndarray, args: argparse.Namespace):
+    """
+    Fit a scikit-learn model and export it.
+
+    Returns:
+        Tuple of (fitted estimator, scaler or None, exported MLScorer)
+    """
+    if kind == "logistic":
+        scaler = StandardScaler().fit(x)
+        model = LogisticRegression(C=args.c, max_iter=2000).fit(scaler.transform(x), y)
+        scorer = MLScorer.from_logistic(
+            model.coef_, model.intercept_[0], scaler.mean_, scaler.scale_
+        )
+        return model, scaler, scorer
+
+    model = GradientBoostingClassifier(
+        n_estimators=args.trees,
+        max_depth=args.depth,
+        learning_rate=args.learning_rate,
+        subsample=args.subsample,
+        random_state=args.seed,
+    ).fit(x, y)
+    prior = model.init_.class_prior_[1]
+    scorer = MLScorer.from_gbt(
+        [estimator.tree_ for estimator in model.estimators_[:, 0]],
+        model.learning_rate,
+        float(np.log(prior / (1 - prior))),
+    )
+    return model, None, scorer
+
+
+def fit_threshold(probability: np.ndarray, y: np.ndarray, target_recall: float) -> float:
+    """Highest threshold that still flags ``target_recall`` of the fraud."""
+    fraud = np.sort(probability[y == 1])[::-1]
+    if not len(fraud):
+        return 0.5
+    needed = max(1, int(np.ceil(target_recall * len(fraud))))
+    return float(fraud[needed - 1])
+
+
+def evaluate(probability: np.ndarray, y: np.ndarray, threshold: float) -> dict:
+    """Ranking and thresholded metrics on labeled rows."""
+    flagged = probability >= threshold
+    both = len(np.unique(y)) == 2
+    return {
+        "rows": int(len(y)),
+        "fraud": int(y.sum()),
+        "average_precision": float(average_precision_score(y, probability)) if both else 0.0,
+        "roc_auc": float(roc_auc_score(y, probability)) if both else 0.0,
+        "recall": float(flagged[y == 1].mean()) if y.any() else 1.0,
+        "precision": float(y[flagged].mean()) if flagged.any() else 0.0,
+        "flag_rate": float(flagged.mean()),
+    }
+
+
+def time_scorer(scorer: MLScorer, matrix: np.ndarray, rows: int, repeats: int = 20) -> float:
+    """Median time in ms for the NumPy scorer on a batch of ``rows`` rows."""
+    batch = np.resize(matrix, (rows, matrix.shape[1]))
+    scorer.predict_proba(batch)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scorer.predict_proba(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main() -> None:
+    """Train, check, evaluate and save the scorer."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", choices=["logistic", "gbt"], default="gbt")
+    parser.add_argument("--target-recall", type=float, default=0.9)
+    parser.add_argument("--test-size", type=float, default=0.4, help="Calibration + holdout")
+    parser.add_argument("--trees", type=int, default=100, help="gbt: boosting stages")
+    parser.add_argument("--depth", type=int, default=3, help="gbt: max tree depth")
+    parser.add_argument("--learning-rate", type=float, default=0.1, help="gbt: shrinkage")
+    parser.add_argument("--subsample", type=float, default=1.0, help="gbt: rows per stage")
+    parser.add_argument("--c", type=float, default=1.0, help="logistic: inverse regularization")
+    parser.add_argument("--bench-rows", type=int, default=10_000, help="Rows per timed batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=settings.ml_scorer_path, help="Model .npz file")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    loader = DataLoader()
+    loader.load_dataset()
+    frame = loader.frame
+    if frame.labels is None:
+        sys.exit("The dataset has no Class column; the scorer needs labeled transactions")
+
+    matrix = frame.features
+    columns = [DATASET_COLUMNS.index(name) for name in MODEL_FEATURES]
+    y = (np.asarray(frame.labels) == 1).astype(np.int8)
+    rows = np.arange(len(y))
+    train, rest = train_test_split(
+        rows, test_size=args.test_size, stratify=y, random_state=args.seed
+    )
+    calibration, holdout = train_test_split(
+        rest, test_size=0.5, stratify=y[rest], random_state=args.seed
+    )
+    print(
+        f"{len(y)} transactions ({y.mean():.2%} fraud): train {len(train)}, "
+        f"calibration {len(calibration)}, holdout {len(holdout)}"
+    )
+
+    start = time.perf_counter()
+    model, scaler, scorer = fit(args.model, matrix[train][:, columns], y[train], args)
+    print(f"Fitted {args.model} in {time.perf_counter() - start:.1f}s")
+
+    # The exported arrays must reproduce scikit-learn's probabilities
+    x_holdout = matrix[holdout][:, columns]
+    reference = model.predict_proba(scaler.transform(x_holdout) if scaler else x_holdout)[:, 1]
+    deviation = float(np.abs(scorer.predict_proba(matrix[holdout]) - reference).max())
+    print(f"NumPy vs scikit-learn: max |Δp| = {deviation:.2e}")
+    if deviation > 1e-6:
+        sys.exit("Exported model does not match scikit-learn; not saving")
+
+    scorer.threshold = fit_threshold(
+        scorer.predict_proba(matrix[calibration]), y[calibration], args.target_recall
+    )
+    splits = {
+        name: evaluate(scorer.predict_proba(matrix[split]), y[split], scorer.threshold)
+        for name, split in (("train", train), ("calibration", calibration), ("holdout", holdout))
+    }
+    print(f"Threshold {scorer.threshold:.4g} (target recall {args.target_recall:.0%})\n")
+    print(
+        f"{'split':>11} | {'rows':>7} | {'fraud':>5} | {'AP':>6} | {'ROC AUC':>7} | "
+        f"{'recall':>7} | {'precision':>9} | {'flagged':>7}"
+    )
+    print("-" * 82)
+    for name, row in splits.items():
+        print(
+            f"{name:>11} | {row['rows']:>7} | {row['fraud']:>5} | "
+            f"{row['average_precision']:>6.3f} | {row['roc_auc']:>7.3f} | {row['recall']:>7.1%} | "
+            f"{row['precision']:>9.1%} | {row['flag_rate']:>7.2%}"
+        )
+
+    elapsed_ms = time_scorer(scorer, matrix, args.bench_rows)
+    print(f"\nNumPy scorer: {args.bench_rows} rows in {elapsed_ms:.2f}ms")
+
+    scorer.metadata = {
+        "train_rows": int(len(train)),
+        "target_recall": args.target_recall,
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "bench_rows")},
+        "holdout": splits["holdout"],
+    }
+    scorer.save(args.output)
+    print(f"Saved {scorer.describe()} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()